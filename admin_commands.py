@@ -1,11 +1,20 @@
 # admin_commands.py
+import asyncio
+import gzip
+import io
+import math
+import time
 import asyncpg
 import discord
 from discord.ext import commands
 from discord.ui import View, Button
 from datetime import datetime, timezone
+from database import pool_stats, cache_stats, set_bumps, catalogo, config, bump_board, balance_board, query_log
+from members import nombres, rss_bytes, MAX_MESSAGES
+from guild_config import CLAVES, parse_valor
+from loop_watchdog import tareas_por_cog
+from profiler import profiler, PROFILE_HZ, PROFILE_MAX_SECONDS, PROFILE_MAX_HZ
 
-ROLE_ID     = 1392903420020658196   # ID del rol para recordar bumps
 EMBED_COLOR = 0x00ffff              # Cyan
 
 # ────────────────────────── Vista persistente y botón ──────────────────────────
@@ -18,7 +27,7 @@ class BumpRoleButton(Button):
         )
 
     async def callback(self, interaction: discord.Interaction) -> None:
-        role = interaction.guild.get_role(ROLE_ID)
+        role = interaction.guild.get_role(config.get(interaction.guild.id, "rol_bump"))
         if not role:
             await interaction.response.send_message(
                 "❌ No se encontró el rol.", ephemeral=True
@@ -64,12 +73,7 @@ class AdminCommands(commands.Cog):
     @commands.command(name="setbumps")
     @commands.has_permissions(administrator=True)
     async def set_bumps(self, ctx, user: discord.Member, cantidad: int):
-        await self.bot.db.execute('''
-            INSERT INTO bumps (user_id, guild_id, count)
-            VALUES ($1, $2, $3)
-            ON CONFLICT (user_id, guild_id)
-            DO UPDATE SET count = $3;
-        ''', str(user.id), str(ctx.guild.id), cantidad)
+        await set_bumps(user.id, ctx.guild.id, cantidad)
         await ctx.send(f"✅ Se establecieron **{cantidad}** bumps para {user.mention}.")
 
     # ────────── !addobj ──────────
@@ -81,6 +85,7 @@ class AdminCommands(commands.Cog):
                 "INSERT INTO tienda (nombre, precio) VALUES ($1, $2)",
                 nombre, precio
             )
+            catalogo.invalidate()
             await ctx.send(f"✅ Objeto **{nombre}** agregado a la tienda por **{precio}€**.")
         except asyncpg.UniqueViolationError:
             await ctx.send("❌ Ese objeto ya existe en la tienda.")
@@ -98,6 +103,7 @@ class AdminCommands(commands.Cog):
         if resultado == "UPDATE 0":
             await ctx.send("❌ No se encontró un objeto con ese nombre.")
         else:
+            catalogo.invalidate()
             await ctx.send(f"✏️ El objeto **{nombre}** ahora cuesta **{nuevo_precio}€**.")
 
     # ────────── !delobj ──────────
@@ -111,8 +117,322 @@ class AdminCommands(commands.Cog):
         if resultado == "DELETE 0":
             await ctx.send("❌ No se encontró un objeto con ese nombre.")
         else:
+            catalogo.invalidate()
             await ctx.send(f"🗑️ El objeto **{nombre}** fue eliminado de la tienda.")
 
+    # ────────── !dbstats ──────────
+    @commands.command(name="dbstats")
+    @commands.has_permissions(administrator=True)
+    async def db_stats(self, ctx: commands.Context) -> None:
+        """Muestra el uso del pool de conexiones y de la caché de balances"""
+        stats = pool_stats()
+        cache = cache_stats()
+        embed = discord.Embed(
+            title="🗄️ Pool de base de datos",
+            description=(
+                f"**En uso:** {stats['in_use']} / {stats['max']} ({stats['saturation']:.0%})\n"
+                f"**Libres:** {stats['idle']}\n"
+                f"**Abiertas:** {stats['size']} (mín. {stats['min']})"
+            ),
+            color=EMBED_COLOR,
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(
+            name="💾 Caché de balances",
+            value=(
+                f"**Entradas:** {cache['size']} / {cache['maxsize']}\n"
+                f"**Aciertos:** {cache['hits']} ({cache['hit_ratio']:.0%})\n"
+                f"**Fallos:** {cache['misses']}\n"
+                f"**Expulsiones:** {cache['evictions']} · **Expiradas:** {cache['expirations']}"
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    # ────────── !slowq ──────────
+    @commands.command(name="slowq")
+    @commands.is_owner()  # datos de todos los servidores
+    async def slowq(self, ctx: commands.Context, n: int = 10, orden: str = "total") -> None:
+        """Top-N de sentencias SQL por tiempo total, promedio (avg) o máximo (max)"""
+        if orden not in ("total", "avg", "max"):
+            await ctx.send("❌ El orden debe ser `total`, `avg` o `max`.")
+            return
+        top = query_log.top(max(1, min(n, 25)), orden)
+        if not top:
+            await ctx.send("📭 Todavía no se registraron consultas.")
+            return
+
+        lineas = [
+            f"**{i}.** `{st.sql[:90]}`\n"
+            f"{st.calls} llamadas · prom. {st.avg * 1000:.1f} ms · máx. {st.max * 1000:.1f} ms · "
+            f"{st.slow} lentas · {st.errors} errores{' · 📄 plan' if st.plan else ''}"
+            for i, st in enumerate(top, start=1)
+        ]
+        embed = discord.Embed(
+            title=f"🐢 Consultas por tiempo {orden}",
+            description="\n".join(lineas)[:4000],
+            color=EMBED_COLOR,
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.set_footer(text=f"Umbral de lentitud: {query_log.threshold * 1000:.0f} ms · {len(query_log.stats)} sentencias")
+
+        # SQL completo y último plan de cada una, como adjunto
+        detalle = "\n\n".join(
+            f"#{i} total={st.total:.3f}s calls={st.calls} avg={st.avg * 1000:.1f}ms max={st.max * 1000:.1f}ms\n"
+            f"{st.sql}" + (f"\n-- {st.explain}\n{st.plan}" if st.plan else "")
+            for i, st in enumerate(top, start=1)
+        )
+        archivo = discord.File(io.BytesIO(detalle.encode("utf-8")), filename="consultas.txt")
+        await ctx.send(embed=embed, file=archivo)
+
+    # ────────── !memoria ──────────
+    @commands.command(name="memoria")
+    @commands.is_owner()  # estado de todo el proceso
+    async def memoria(self, ctx: commands.Context) -> None:
+        """Uso de memoria del proceso y tamaño de las cachés"""
+        bot = self.bot
+        miembros = sum(len(guild.members) for guild in bot.guilds)
+        nombres_stats = nombres.stats()
+        boards = [bump_board.stats(), balance_board.stats()]
+        embed = discord.Embed(
+            title="🧠 Memoria",
+            description=f"**RSS:** {rss_bytes() / 1024 ** 2:.1f} MiB",
+            color=EMBED_COLOR,
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(
+            name="📦 Caché de discord.py",
+            value=(
+                f"**Servidores:** {len(bot.guilds)}\n"
+                f"**Miembros:** {miembros}\n"
+                f"**Usuarios:** {len(bot.users)}\n"
+                f"**Mensajes:** {len(bot.cached_messages)} / {MAX_MESSAGES}"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="🏷️ Nombres resueltos",
+            value=(
+                f"**Entradas:** {nombres_stats['size']} / {nombres_stats['maxsize']}\n"
+                f"**Aciertos:** {nombres_stats['hit_ratio']:.0%} · **Consultas al gateway:** {nombres_stats['queries']}"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="🏆 Rankings en memoria",
+            value=f"**Servidores:** {sum(b['guilds'] for b in boards)} · **Filas:** {sum(b['entries'] for b in boards)}",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    # ────────── !shards ──────────
+    @commands.command(name="shards")
+    @commands.has_permissions(administrator=True)
+    async def shards(self, ctx: commands.Context) -> None:
+        """Estado, latencia, servidores y reconexiones de cada shard"""
+        monitor = self.bot.shard_monitor
+        filas = monitor.snapshot()
+        lineas = []
+        for fila in filas:
+            estado = "🟢" if fila["connected"] else "🔴"
+            latencia = "—" if math.isnan(fila["latency"]) else f"{fila['latency'] * 1000:.0f} ms"
+            limite = " · ⏳ rate limited" if fila["ratelimited"] else ""
+            marca = " ⬅️" if ctx.guild.shard_id == fila["id"] else ""
+            lineas.append(
+                f"{estado} **Shard {fila['id']}** — {latencia} · {fila['guilds']} servidores · "
+                f"{fila['reconnects']} reconexiones{limite}{marca}"
+            )
+        embed = discord.Embed(
+            title="🧩 Shards",
+            description="\n".join(lineas),
+            color=EMBED_COLOR,
+            timestamp=datetime.now(timezone.utc)
+        )
+        total = self.bot.shard_count or 1
+        eventos = "—" if monitor.rate is None else f"{monitor.rate:.0f}"  # del último muestreo periódico
+        embed.set_footer(text=f"{len(filas)} de {total} shards en este proceso · {len(self.bot.guilds)} servidores · "
+                              f"{eventos} eventos/min")
+        await ctx.send(embed=embed)
+
+    # ────────── !diag ──────────
+    @commands.command(name="diag")
+    @commands.is_owner()  # estado de todo el proceso
+    async def diag(self, ctx: commands.Context) -> None:
+        """Lag del event loop, últimos bloqueos y tareas vivas por cog"""
+        watchdog = self.bot.watchdog
+        lag = watchdog.lag()
+        embed = discord.Embed(
+            title="🩺 Diagnóstico del event loop",
+            color=EMBED_COLOR,
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(
+            name="⏱️ Lag (último minuto)",
+            value=(
+                f"**Actual:** {lag['actual'] * 1000:.1f} ms\n"
+                f"**p50:** {lag['p50'] * 1000:.1f} ms · **p99:** {lag['p99'] * 1000:.1f} ms\n"
+                f"**Máximo:** {lag['max'] * 1000:.1f} ms (desde el arranque: {watchdog.max_lag * 1000:.0f} ms)"
+            ),
+            inline=False
+        )
+
+        bloqueos = list(watchdog.bloqueos)[-5:]
+        lineas = [
+            f"<t:{int(b.inicio)}:R> **{b.duracion * 1000:.0f} ms** en `{b.tarea[:80]}`"
+            for b in reversed(bloqueos)
+        ]
+        embed.add_field(
+            name=f"🧱 Bloqueos ≥ {watchdog.umbral * 1000:.0f} ms ({watchdog.total_bloqueos})",
+            value="\n".join(lineas) or "Ninguno",
+            inline=False
+        )
+
+        tareas = tareas_por_cog(self.bot)
+        embed.add_field(
+            name=f"🧵 Tareas ({sum(tareas.values())})",
+            value="\n".join(f"**{dueño}:** {n}" for dueño, n in tareas.most_common(12)),
+            inline=False
+        )
+        embed.set_footer(text="Modo debug de asyncio activo" if watchdog.debug else "LOOP_DEBUG=1 activa el modo debug de asyncio")
+
+        # Stack completo de cada bloqueo, como adjunto
+        if not bloqueos:
+            await ctx.send(embed=embed)
+            return
+        detalle = "\n\n".join(
+            f"{datetime.fromtimestamp(b.inicio, timezone.utc):%Y-%m-%d %H:%M:%S} UTC · "
+            f"{b.duracion * 1000:.0f} ms · {b.tarea}\n{b.stack}"
+            for b in watchdog.bloqueos
+        )
+        archivo = discord.File(io.BytesIO(detalle.encode("utf-8")), filename="bloqueos.txt")
+        await ctx.send(embed=embed, file=archivo)
+
+    # ────────── !profile ──────────
+    @commands.command(name="profile")
+    @commands.is_owner()  # perfila todo el proceso, no sólo este servidor
+    async def profile(self, ctx: commands.Context, segundos: int = 30, hz: float = PROFILE_HZ) -> None:
+        """Perfila el proceso por muestreo durante N segundos y adjunta stacks y resumen"""
+        if profiler.ocupado:
+            restante = max(0.0, (profiler.fin or 0) - time.monotonic())
+            await ctx.send(f"⚠️ Ya hay un perfil en curso; termina en {restante:.0f} s.")
+            return
+        if not 1 <= segundos <= PROFILE_MAX_SECONDS:
+            await ctx.send(f"❌ La duración debe estar entre 1 y {PROFILE_MAX_SECONDS} segundos.")
+            return
+        if not 1 <= hz <= PROFILE_MAX_HZ:
+            await ctx.send(f"❌ La frecuencia debe estar entre 1 y {PROFILE_MAX_HZ} Hz.")
+            return
+
+        await ctx.send(f"🔬 Perfilando {segundos} s a {hz:g} Hz...")
+        perfil = await profiler.perfilar(segundos, hz)
+
+        # Armar los textos puede tardar con muchos stacks: fuera del loop
+        def armar():
+            folded = perfil.collapsed().encode("utf-8")
+            nombre = "perfil.folded"
+            if len(folded) > 7 * 1024 ** 2:  # límite de adjuntos de Discord
+                folded, nombre = gzip.compress(folded), "perfil.folded.gz"
+            return folded, nombre, perfil.resumen(), perfil.top(10)[0]
+        folded, nombre_folded, resumen, propias = await asyncio.to_thread(armar)
+
+        total = perfil.muestras or 1
+        embed = discord.Embed(
+            title=f"🔬 Perfil de {perfil.segundos:.0f} s",
+            description="\n".join(
+                f"`{c * 100 / total:5.1f}%` {nombre[:90]}" for nombre, c in propias
+            ) or "Sin muestras",
+            color=EMBED_COLOR,
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.set_footer(text=f"{perfil.muestras} muestras · {perfil.hz_efectivo:.0f} Hz efectivos · "
+                              f"tiempo propio en el hilo del event loop")
+        archivos = [
+            discord.File(io.BytesIO(folded), filename=nombre_folded),
+            discord.File(io.BytesIO(resumen.encode("utf-8")), filename="resumen.txt"),
+        ]
+        await ctx.send(embed=embed, files=archivos)
+
+    # ────────── !config ──────────
+    @commands.command(name="config")
+    @commands.has_permissions(administrator=True)
+    async def configurar(self, ctx: commands.Context, clave: str = None, *, valor: str = None) -> None:
+        """Muestra o cambia la configuración del servidor (`reset` vuelve al valor por defecto)"""
+        guild = ctx.guild
+        if clave is None:
+            propios = config.overrides(guild.id)
+            lineas = []
+            for nombre, info in CLAVES.items():
+                actual = config.get(guild.id, nombre)
+                mostrado = {"canal": f"<#{actual}>", "rol": f"<@&{actual}>"}.get(info.tipo, f"{actual}")
+                origen = "" if nombre in propios else " *(por defecto)*"
+                lineas.append(f"`{nombre}` — {mostrado}{origen}")
+            embed = discord.Embed(
+                title="⚙️ Configuración del servidor",
+                description="\n".join(lineas),
+                color=EMBED_COLOR,
+                timestamp=datetime.now(timezone.utc)
+            )
+            embed.set_footer(text="!config <clave> <valor> · !config <clave> reset")
+            await ctx.send(embed=embed)
+            return
+
+        clave = clave.lower()
+        if clave not in CLAVES:
+            await ctx.send(f"❌ Clave desconocida. Claves válidas: {', '.join(f'`{c}`' for c in CLAVES)}")
+            return
+        if valor is None:
+            await ctx.send(f"ℹ️ `{clave}`: {CLAVES[clave].descripcion}. Valor actual: `{config.get(guild.id, clave)}`")
+            return
+
+        if valor.lower() == "reset":
+            try:
+                await config.reset(guild.id, clave)
+            except ValueError as e:
+                await ctx.send(f"❌ {e}.")
+                return
+            await ctx.send(f"♻️ `{clave}` volvió a su valor por defecto.")
+            return
+
+        try:
+            nuevo = parse_valor(clave, valor)
+        except ValueError as e:
+            await ctx.send(f"❌ Valor inválido para `{clave}`: {e}.")
+            return
+        tipo = CLAVES[clave].tipo
+        if tipo == "canal" and guild.get_channel(nuevo) is None:
+            await ctx.send("❌ Ese canal no existe en este servidor.")
+            return
+        if tipo == "rol" and guild.get_role(nuevo) is None:
+            await ctx.send("❌ Ese rol no existe en este servidor.")
+            return
+
+        try:
+            await config.set(guild.id, clave, nuevo)
+        except ValueError as e:
+            await ctx.send(f"❌ {e}.")
+            return
+        await ctx.send(f"✅ `{clave}` actualizado.")
+
+    # ────────── !rutas ──────────
+    @commands.command(name="rutas")
+    @commands.has_permissions(administrator=True)
+    async def rutas(self, ctx: commands.Context) -> None:
+        """Tiempos por handler del router de mensajes"""
+        router = self.bot.router
+        lineas = [
+            f"**{nombre}** — {st.calls} llamadas · {st.errors} errores · "
+            f"prom. {st.avg * 1000:.1f} ms · máx. {st.max * 1000:.1f} ms"
+            for nombre, st in sorted(router.stats.items())
+        ]
+        embed = discord.Embed(
+            title="🧭 Router de mensajes",
+            description="\n".join(lineas) or "No hay handlers registrados.",
+            color=EMBED_COLOR,
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.set_footer(text=f"{router.messages} mensajes procesados")
+        await ctx.send(embed=embed)
+
 # ────────────────────────── Setup ──────────────────────────
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(AdminCommands(bot))
@@ -0,0 +1,247 @@
+"""Benchmark de los comandos de economía y bumps contra un Postgres local.
+
+Llama a los métodos reales de los cogs (Economia.dar, Economia.top,
+UserCommands.comprar_objeto, BumpTracker.disboard_only_bump y
+BumpTracker.clasificacion) con Context/Message falsos, y reporta
+throughput y latencias p50/p95/p99 por escenario.
+
+Uso:
+    BENCH_DATABASE_URL=postgresql://localhost/bench python -m bench.comandos \\
+        --escenarios dar,comprar,top,bump,clasificacion \\
+        --concurrencia 32 --guilds 4 --usuarios 5000 --operaciones 5000 \\
+        --salida actual.json --base anterior.json
+
+Usa servidores con ids propios (no toca datos reales del servidor) y los
+borra al terminar. Con --base, sale con código 1 si algún escenario empeora
+más que --tolerancia respecto de esa corrida.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+BENCH_URL = os.getenv("BENCH_DATABASE_URL")
+if BENCH_URL:
+    # database lee DATABASE_URL al importarse
+    os.environ["DATABASE_URL"] = BENCH_URL
+
+import database  # noqa: E402
+from bench.estadisticas import percentil  # noqa: E402
+from bench.fakes import FakeContext, FakeGuild, disboard_bump  # noqa: E402
+from bump_tracker import BumpTracker, DISBOARD_BOT_ID  # noqa: E402
+from economia import Economia  # noqa: E402
+from router import MessageRouter  # noqa: E402
+from usercommands import UserCommands  # noqa: E402
+
+GUILD_BASE = 900_000_000_000_000_000
+USER_BASE = 800_000_000_000_000_000
+CHANNEL_BASE = 700_000_000_000_000_000
+OBJETO_BENCH = "__bench__"
+SALDO_INICIAL = 1_000_000.0
+
+
+class Resultado(NamedTuple):
+    escenario: str
+    operaciones: int
+    errores: int
+    segundos: float
+    p50: float
+    p95: float
+    p99: float
+
+    @property
+    def throughput(self) -> float:
+        return self.operaciones / self.segundos if self.segundos else 0.0
+
+
+# ───────────── Datos de prueba ─────────────
+def crear_guilds(n_guilds: int, n_usuarios: int) -> list[FakeGuild]:
+    return [
+        FakeGuild(GUILD_BASE + i, n_usuarios, USER_BASE + i * 10_000_000, CHANNEL_BASE + i)
+        for i in range(n_guilds)
+    ]
+
+
+async def limpiar(guild_ids: list[int]) -> None:
+    pool = database.get_pool()
+    for tabla in ("euros", "bumps", "inventario", "bump_reminders", "ledger"):
+        await pool.execute(f"DELETE FROM {tabla} WHERE guild_id = ANY($1::bigint[])", guild_ids)
+    await pool.execute("DELETE FROM tienda WHERE nombre = $1", OBJETO_BENCH)
+
+
+async def sembrar(guilds: list[FakeGuild]) -> None:
+    pool = database.get_pool()
+    await limpiar([g.id for g in guilds])
+    rnd = random.Random(0)
+    async with pool.acquire() as conn:
+        await conn.copy_records_to_table(
+            "euros", columns=("user_id", "guild_id", "balance"),
+            records=[(uid, g.id, SALDO_INICIAL) for g in guilds for uid in g.member_ids],
+        )
+        await conn.copy_records_to_table(
+            "bumps", columns=("user_id", "guild_id", "count"),
+            records=[(uid, g.id, rnd.randint(0, 500)) for g in guilds for uid in g.member_ids],
+        )
+        await conn.execute("INSERT INTO tienda (nombre, precio) VALUES ($1, 1)", OBJETO_BENCH)
+    database.catalogo.invalidate()
+
+
+# ───────────── Escenarios ─────────────
+Operacion = Callable[[], Awaitable[Optional[FakeContext]]]
+
+
+def escenarios(bot, guilds: list[FakeGuild], rnd: random.Random) -> dict[str, Operacion]:
+    economia = Economia(bot)
+    usuarios = UserCommands(bot)
+    bumps = BumpTracker(bot)
+
+    def contexto() -> tuple[FakeGuild, FakeContext]:
+        guild = rnd.choice(guilds)
+        autor = guild.get_member(rnd.choice(guild.member_ids))
+        return guild, FakeContext(bot, guild, autor)
+
+    async def dar():
+        guild, ctx = contexto()
+        destino = guild.get_member(rnd.choice(guild.member_ids))
+        if destino.id == ctx.author.id:
+            return None
+        await economia.dar.callback(economia, ctx, destino, 0.5)
+        return ctx
+
+    async def comprar():
+        _, ctx = contexto()
+        await usuarios.comprar_objeto.callback(usuarios, ctx, nombre_objeto=OBJETO_BENCH)
+        return ctx
+
+    async def top():
+        _, ctx = contexto()
+        await economia.top.callback(economia, ctx, 10)
+        return ctx
+
+    async def bump():
+        guild, ctx = contexto()
+        await bumps.disboard_only_bump(disboard_bump(guild, ctx.author, DISBOARD_BOT_ID))
+        return None
+
+    async def clasificacion():
+        _, ctx = contexto()
+        await bumps.clasificacion.callback(bumps, ctx)
+        return ctx
+
+    return {"dar": dar, "comprar": comprar, "top": top, "bump": bump, "clasificacion": clasificacion}
+
+
+async def correr(nombre: str, op: Operacion, operaciones: int, concurrencia: int,
+                 calentamiento: int) -> Resultado:
+    for _ in range(calentamiento):
+        await op()
+
+    latencias: list[float] = []
+    errores = 0
+    pendientes = iter(range(operaciones))  # compartido por los workers
+
+    async def worker() -> None:
+        nonlocal errores
+        for _ in pendientes:
+            inicio = time.perf_counter()
+            try:
+                ctx = await op()
+                if ctx is not None and ctx.failed():
+                    errores += 1
+            except Exception:
+                errores += 1
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrencia)))
+    segundos = time.perf_counter() - inicio
+
+    latencias.sort()
+    return Resultado(nombre, len(latencias), errores, segundos,
+                     percentil(latencias, 50), percentil(latencias, 95), percentil(latencias, 99))
+
+
+# ───────────── Reporte ─────────────
+def imprimir(resultados: list[Resultado]) -> None:
+    print(f"{'escenario':<14}{'ops':>8}{'err':>6}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in resultados:
+        print(f"{r.escenario:<14}{r.operaciones:>8}{r.errores:>6}{r.throughput:>10.1f}"
+              f"{r.p50 * 1000:>10.2f}{r.p95 * 1000:>10.2f}{r.p99 * 1000:>10.2f}")
+
+
+def comparar(resultados: list[Resultado], base: dict, tolerancia: float) -> list[str]:
+    """Regresiones respecto de una corrida anterior guardada con --salida."""
+    regresiones = []
+    for r in resultados:
+        anterior = base.get(r.escenario)
+        if not anterior:
+            continue
+        if r.throughput < anterior["throughput"] * (1 - tolerancia):
+            regresiones.append(f"{r.escenario}: throughput {anterior['throughput']:.1f} → {r.throughput:.1f} ops/s")
+        if r.p95 > anterior["p95"] * (1 + tolerancia):
+            regresiones.append(f"{r.escenario}: p95 {anterior['p95'] * 1000:.2f} → {r.p95 * 1000:.2f} ms")
+    return regresiones
+
+
+async def main(args: argparse.Namespace) -> int:
+    pool = await database.create_pool()
+    await database.setup()
+    guilds = crear_guilds(args.guilds, args.usuarios)
+    bot = SimpleNamespace(db=pool, router=MessageRouter(database.config), config=database.config)
+    try:
+        await sembrar(guilds)
+        ops = escenarios(bot, guilds, random.Random(args.semilla))
+        resultados = []
+        for nombre in args.escenarios.split(","):
+            nombre = nombre.strip()
+            if nombre not in ops:
+                print(f"Escenario desconocido: {nombre} (hay: {', '.join(ops)})", file=sys.stderr)
+                return 2
+            resultados.append(await correr(nombre, ops[nombre], args.operaciones,
+                                           args.concurrencia, args.calentamiento))
+            await database.flush_writes()  # lo pendiente no se cuela en el escenario siguiente
+    finally:
+        await database.flush_writes()
+        await limpiar([g.id for g in guilds])
+        await database.close_pool()
+
+    print(f"{args.guilds} servidores × {args.usuarios} usuarios · concurrencia {args.concurrencia}")
+    imprimir(resultados)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({r.escenario: {**r._asdict(), "throughput": r.throughput} for r in resultados}, f, indent=2)
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            regresiones = comparar(resultados, json.load(f), args.tolerancia)
+        for linea in regresiones:
+            print(f"REGRESIÓN {linea}")
+        if regresiones:
+            return 1
+    return 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark de comandos de economía y bumps")
+    parser.add_argument("--escenarios", default="dar,comprar,top,bump,clasificacion")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--guilds", type=int, default=1)
+    parser.add_argument("--usuarios", type=int, default=1000, help="miembros por servidor")
+    parser.add_argument("--operaciones", type=int, default=2000, help="por escenario")
+    parser.add_argument("--calentamiento", type=int, default=50)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", help="guarda los resultados en JSON")
+    parser.add_argument("--base", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    if not BENCH_URL:
+        sys.exit("Definí BENCH_DATABASE_URL con una base local de pruebas (no la de producción).")
+    sys.exit(asyncio.run(main(parse_args())))
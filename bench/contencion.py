@@ -0,0 +1,209 @@
+"""Prueba de contención de transferencias contra un Postgres local.
+
+Siembra --cuentas cuentas con saldo conocido en un servidor de prueba y
+lanza --transferencias llamadas a database.transferir_euros con
+--concurrencia tareas a la vez, mezclando tres patrones:
+
+    cruzadas  pares fijos que se pagan en ambos sentidos (A→B y B→A)
+    embudo    muchos emisores pagándole a una cuenta que todavía no existe
+    azar      emisor y receptor cualesquiera
+
+Al terminar verifica que se conserva el dinero (la suma de saldos no
+cambia), que no hubo doble gasto (ningún saldo negativo y cada saldo final
+es el inicial más lo recibido menos lo enviado en las transferencias
+aceptadas) y reporta throughput, latencias, rechazos por fondos y
+reintentos. Con --legado corre la sentencia anterior (un CTE que bloquea
+emisor y después receptor, sin reintentos) para comparar.
+
+Uso:
+    BENCH_DATABASE_URL=postgresql://localhost/bench python -m bench.contencion \\
+        --cuentas 50 --transferencias 20000 --concurrencia 200
+
+Sale con código 1 si alguna verificación falla.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+BENCH_URL = os.getenv("BENCH_DATABASE_URL")
+if BENCH_URL:
+    # database lee DATABASE_URL al importarse
+    os.environ["DATABASE_URL"] = BENCH_URL
+
+import database  # noqa: E402
+from bench.estadisticas import percentil  # noqa: E402
+
+GUILD_ID = 900_000_000_000_999_999
+USER_BASE = 800_000_000_000_000_000
+MONTOS = (0.25, 0.5, 1.0, 2.0)  # exactos en binario: las sumas se comparan sin tolerancia
+PATRONES = ("cruzadas", "embudo", "azar")
+
+# Transferencia previa a la migración 0008, para comparar
+SQL_LEGADO = '''
+    WITH debito AS (
+        UPDATE euros SET balance = balance - $4
+        WHERE user_id = $1 AND guild_id = $3 AND balance >= $4
+        RETURNING balance
+    ),
+    credito AS (
+        INSERT INTO euros (user_id, guild_id, balance)
+        SELECT $2, $3, $4 FROM debito
+        ON CONFLICT (user_id, guild_id)
+        DO UPDATE SET balance = euros.balance + EXCLUDED.balance
+        RETURNING balance
+    )
+    SELECT EXISTS (SELECT 1 FROM debito) AS ok;
+'''
+
+
+async def limpiar() -> None:
+    pool = database.get_pool()
+    for tabla in ("euros", "ledger"):
+        await pool.execute(f"DELETE FROM {tabla} WHERE guild_id = $1", GUILD_ID)
+
+
+async def sembrar(cuentas: list[int], saldo: float) -> None:
+    await limpiar()
+    async with database.get_pool().acquire() as conn:
+        await conn.copy_records_to_table(
+            "euros", columns=("user_id", "guild_id", "balance"),
+            records=[(uid, GUILD_ID, saldo) for uid in cuentas],
+        )
+
+
+async def saldos() -> dict[int, float]:
+    rows = await database.get_pool().fetch(
+        "SELECT user_id, balance FROM euros WHERE guild_id = $1", GUILD_ID)
+    return {row["user_id"]: row["balance"] for row in rows}
+
+
+def generar(n: int, cuentas: list[int], embudo: int, rnd: random.Random) -> list[tuple[int, int, float]]:
+    """(emisor, receptor, monto) de las n transferencias, repartidas entre los patrones."""
+    pares = [(cuentas[i], cuentas[i + 1]) for i in range(0, len(cuentas) - 1, 2)]
+    transferencias = []
+    for i in range(n):
+        patron = PATRONES[i % len(PATRONES)]
+        if patron == "cruzadas":
+            a, b = rnd.choice(pares)
+            emisor, receptor = (a, b) if rnd.random() < 0.5 else (b, a)
+        elif patron == "embudo":
+            emisor, receptor = rnd.choice(cuentas), embudo
+        else:
+            emisor, receptor = rnd.sample(cuentas, 2)
+        transferencias.append((emisor, receptor, rnd.choice(MONTOS)))
+    return transferencias
+
+
+async def correr(transferencias: list[tuple[int, int, float]], concurrencia: int, legado: bool):
+    pool = database.get_pool()
+    aceptadas: list[tuple[int, int, float]] = []
+    errores: Counter = Counter()
+    latencias: list[float] = []
+    rechazadas = 0
+    pendientes = iter(transferencias)  # compartido por los workers
+
+    async def worker() -> None:
+        nonlocal rechazadas
+        for emisor, receptor, monto in pendientes:
+            inicio = time.perf_counter()
+            try:
+                if legado:
+                    ok = await pool.fetchval(SQL_LEGADO, emisor, receptor, GUILD_ID, monto)
+                else:
+                    ok = (await database.transferir_euros(emisor, receptor, GUILD_ID, monto))["ok"]
+            except Exception as e:
+                errores[type(e).__name__] += 1
+            else:
+                if ok:
+                    aceptadas.append((emisor, receptor, monto))
+                else:
+                    rechazadas += 1
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrencia)))
+    segundos = time.perf_counter() - inicio
+    latencias.sort()
+    return aceptadas, rechazadas, errores, segundos, latencias
+
+
+def verificar(iniciales: dict[int, float], finales: dict[int, float],
+              aceptadas: list[tuple[int, int, float]]) -> list[str]:
+    fallas = []
+    if sum(iniciales.values()) != sum(finales.values()):
+        fallas.append(f"no se conserva el dinero: {sum(iniciales.values())} → {sum(finales.values())}")
+    esperados = dict(iniciales)
+    for emisor, receptor, monto in aceptadas:
+        esperados[emisor] = esperados.get(emisor, 0.0) - monto
+        esperados[receptor] = esperados.get(receptor, 0.0) + monto
+    for uid in esperados.keys() | finales.keys():
+        final = finales.get(uid, 0.0)
+        if final < 0:
+            fallas.append(f"saldo negativo en {uid}: {final}")
+        if final != esperados.get(uid, 0.0):
+            fallas.append(f"saldo de {uid}: esperado {esperados.get(uid, 0.0)}, quedó {final}")
+    return fallas
+
+
+async def main(args: argparse.Namespace) -> int:
+    await database.setup()
+    cuentas = [USER_BASE + i for i in range(args.cuentas)]
+    embudo = USER_BASE + args.cuentas  # no se siembra: la crea la primera transferencia
+    transferencias = generar(args.transferencias, cuentas, embudo, random.Random(args.semilla))
+    reintentos_antes = sum(database.reintentos.values())
+    try:
+        await sembrar(cuentas, args.saldo)
+        iniciales = await saldos()
+        aceptadas, rechazadas, errores, segundos, latencias = await correr(
+            transferencias, args.concurrencia, args.legado)
+        await database.flush_writes()
+        finales = await saldos()
+    finally:
+        await database.flush_writes()
+        await limpiar()
+        await database.close_pool()
+
+    total = len(latencias)
+    print(f"{'legado' if args.legado else 'ordenado'} · {args.cuentas} cuentas · "
+          f"{total} transferencias · concurrencia {args.concurrencia}")
+    print(f"  {total / segundos:.1f} transferencias/s · p50 {percentil(latencias, 50) * 1000:.2f} ms · "
+          f"p99 {percentil(latencias, 99) * 1000:.2f} ms")
+    print(f"  aceptadas {len(aceptadas)} · sin fondos {rechazadas} · "
+          f"reintentos {sum(database.reintentos.values()) - reintentos_antes}")
+    for nombre, n in errores.most_common():
+        print(f"  error {nombre}: {n}")
+
+    fallas = verificar(iniciales, finales, aceptadas)
+    for falla in fallas[:20]:
+        print(f"FALLA {falla}")
+    if fallas or errores:
+        return 1
+    print("OK: dinero conservado y sin doble gasto")
+    return 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Prueba de contención de transferencias")
+    parser.add_argument("--cuentas", type=int, default=50)
+    parser.add_argument("--transferencias", type=int, default=10000)
+    parser.add_argument("--concurrencia", type=int, default=200)
+    parser.add_argument("--saldo", type=float, default=20.0,
+                        help="saldo inicial por cuenta; bajo para que haya rechazos por fondos")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--legado", action="store_true",
+                        help="usa la transferencia anterior a la migración 0008, sin reintentos")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    if not BENCH_URL:
+        sys.exit("Definí BENCH_DATABASE_URL con una base local de pruebas (no la de producción).")
+    args = parse_args()
+    if args.concurrencia > database.POOL_MAX_SIZE:
+        print(f"Nota: las {args.concurrencia} tareas comparten {database.POOL_MAX_SIZE} conexiones "
+              f"(DB_POOL_MAX_SIZE); subilo para más transacciones simultáneas en la base.")
+    sys.exit(asyncio.run(main(args)))
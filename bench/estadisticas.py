@@ -0,0 +1,8 @@
+import math
+
+
+def percentil(ordenadas: list[float], p: float) -> float:
+    """Percentil `p` (0-100) de una lista ya ordenada, por rango más cercano."""
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, max(0, math.ceil(p / 100 * len(ordenadas)) - 1))]
@@ -0,0 +1,131 @@
+"""API HTTP de Discord local para el replay.
+
+Responde lo mínimo que discord.py necesita para seguir (el usuario del bot,
+la aplicación y los mensajes enviados o editados) y 204 para el resto de
+escrituras. Con `latencia` simula el tiempo de ida y vuelta a Discord.
+"""
+import asyncio
+import itertools
+import json
+import time
+from typing import Optional
+
+from aiohttp import web
+
+API_PREFIX = "/api/v10"
+
+_snowflakes = itertools.count((int(time.time() * 1000) - 1420070400000) << 22)
+
+
+def _snowflake() -> str:
+    return str(next(_snowflakes))
+
+
+def _json(data: dict, status: int = 200) -> web.Response:
+    # discord.py sólo decodifica si el content-type es exactamente application/json
+    return web.Response(body=json.dumps(data).encode(), status=status,
+                        headers={"Content-Type": "application/json"})
+
+
+class FakeDiscordAPI:
+    def __init__(self, bot_user: dict, application_id: Optional[str] = None,
+                 latencia: float = 0.0, host: str = "127.0.0.1") -> None:
+        self.bot_user = bot_user
+        self.application_id = application_id or bot_user["id"]
+        self.latencia = latencia  # segundos por pedido
+        self.host = host
+        self.pedidos = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.base = ""
+
+    # ───────────── Respuestas ─────────────
+    def _mensaje(self, channel_id: str, payload: dict, message_id: Optional[str] = None) -> dict:
+        return {
+            "id": message_id or _snowflake(),
+            "channel_id": channel_id,
+            "author": self.bot_user,
+            "content": payload.get("content") or "",
+            "embeds": payload.get("embeds") or [],
+            "components": payload.get("components") or [],
+            "attachments": [],
+            "mentions": [],
+            "mention_roles": [],
+            "mention_everyone": False,
+            "pinned": False,
+            "tts": False,
+            "type": 0,
+            "flags": payload.get("flags") or 0,
+            "timestamp": "2024-01-01T00:00:00+00:00",
+            "edited_timestamp": None,
+        }
+
+    def _aplicacion(self) -> dict:
+        return {
+            "id": self.application_id,
+            "name": self.bot_user["username"],
+            "description": "",
+            "icon": None,
+            "bot_public": False,
+            "bot_require_code_grant": False,
+            "owner": self.bot_user,
+            "verify_key": "",
+            "flags": 0,
+        }
+
+    @staticmethod
+    async def _payload(request: web.Request) -> dict:
+        if not request.can_read_body:
+            return {}
+        if request.content_type.startswith("multipart/"):
+            form = await request.post()
+            return json.loads(form.get("payload_json") or "{}")
+        try:
+            return await request.json()
+        except ValueError:
+            return {}
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.pedidos += 1
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+
+        partes = request.match_info["ruta"].strip("/").split("/")
+        metodo = request.method
+        payload = await self._payload(request)
+
+        if metodo == "GET" and partes == ["users", "@me"]:
+            return _json(self.bot_user)
+        if metodo == "GET" and partes == ["oauth2", "applications", "@me"]:
+            return _json(self._aplicacion())
+        if partes[0] == "channels" and partes[2:3] == ["messages"]:
+            if metodo == "POST" and len(partes) == 3:
+                return _json(self._mensaje(partes[1], payload))
+            if metodo == "PATCH" and len(partes) == 4:
+                return _json(self._mensaje(partes[1], payload, partes[3]))
+        if partes[0] == "interactions" and partes[-1] == "callback":
+            return _json({"interaction": {"id": partes[1], "type": payload.get("type", 4)}})
+        if partes[0] == "webhooks" and metodo in ("POST", "PATCH"):
+            # followups y edición de la respuesta original de una interacción
+            message_id = partes[-1] if metodo == "PATCH" and partes[-1].isdigit() else None
+            return _json(self._mensaje("0", payload, message_id))
+        if metodo == "GET":
+            return _json({"message": "Unknown", "code": 10000}, status=404)
+        return web.Response(status=204)
+
+    # ───────────── Ciclo de vida ─────────────
+    async def start(self) -> str:
+        """Levanta el servidor en un puerto libre y devuelve la URL base de la API."""
+        app = web.Application()
+        app.router.add_route("*", API_PREFIX + "/{ruta:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base = f"http://{self.host}:{port}{API_PREFIX}"
+        return self.base
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,129 @@
+"""Objetos mínimos de discord.py para llamar a los comandos sin gateway.
+
+Sólo implementan lo que usan los cogs en los caminos que se miden: ids,
+`send` (que guarda lo enviado en lugar de mandarlo), permisos y roles.
+"""
+import itertools
+from types import SimpleNamespace
+from typing import Optional
+
+import discord
+
+_ids = itertools.count(1)
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeChannel", author: "FakeMember", content: str = "",
+                 embeds: Optional[list] = None, interaction=None) -> None:
+        self.id = next(_ids)
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embeds = embeds or []
+        self.interaction = interaction
+
+    async def delete(self, *, delay: Optional[float] = None) -> None:
+        pass
+
+    async def edit(self, **kwargs) -> "FakeMessage":
+        return self
+
+    async def add_reaction(self, emoji) -> None:
+        pass
+
+
+class FakeChannel:
+    def __init__(self, guild: "FakeGuild", channel_id: int) -> None:
+        self.id = channel_id
+        self.guild = guild
+        self.mention = f"<#{channel_id}>"
+        self.sent: list[dict] = []
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        self.sent.append({"content": content, **kwargs})
+        if len(self.sent) > 100:  # sólo importa lo último
+            del self.sent[:50]
+        return FakeMessage(self, self.guild.me, content or "")
+
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", user_id: int, bot: bool = False, admin: bool = False) -> None:
+        self.id = user_id
+        self.guild = guild
+        self.bot = bot
+        self.name = self.display_name = f"usuario{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.roles: list = []
+        self.guild_permissions = discord.Permissions.all() if admin else discord.Permissions.none()
+
+    async def add_roles(self, *roles, reason: Optional[str] = None) -> None:
+        self.roles.extend(roles)
+
+    async def remove_roles(self, *roles, reason: Optional[str] = None) -> None:
+        self.roles = [r for r in self.roles if r not in roles]
+
+
+class FakeGuild:
+    """Servidor con `n_members` miembros con ids consecutivos desde `first_user_id`."""
+
+    def __init__(self, guild_id: int, n_members: int, first_user_id: int, channel_id: int) -> None:
+        self.id = guild_id
+        self.shard_id = 0
+        self.me = FakeMember(self, first_user_id - 1, bot=True)
+        self._members = {
+            uid: FakeMember(self, uid) for uid in range(first_user_id, first_user_id + n_members)
+        }
+        self.member_ids = list(self._members)
+        self.channel = FakeChannel(self, channel_id)
+
+    @property
+    def members(self) -> list[FakeMember]:
+        return list(self._members.values())
+
+    def get_member(self, user_id: int) -> Optional[FakeMember]:
+        return self._members.get(user_id)
+
+    def get_role(self, role_id: int):
+        return None
+
+    def get_channel(self, channel_id: int):
+        return self.channel if channel_id == self.channel.id else None
+
+    async def query_members(self, *, user_ids, limit: int = 5, cache: bool = True, **kwargs):
+        return [m for uid in user_ids if (m := self._members.get(uid))]
+
+
+class FakeContext:
+    """Lo que usan los comandos de `commands.Context`."""
+
+    def __init__(self, bot, guild: FakeGuild, author: FakeMember) -> None:
+        self.bot = bot
+        self.guild = guild
+        self.author = author
+        self.channel = guild.channel
+        self.message = FakeMessage(guild.channel, author)
+        self.replies: list[dict] = []
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        self.replies.append({"content": content, **kwargs})
+        return FakeMessage(self.channel, self.guild.me, content or "")
+
+    def failed(self) -> bool:
+        """True si el comando respondió con un mensaje de error interno."""
+        for reply in self.replies:
+            texto = reply["content"] or ""
+            embed = reply.get("embed")
+            if embed is not None:
+                texto += embed.description or ""
+            if "❌ Error" in texto or "⚠️ Error" in texto:
+                return True
+        return False
+
+
+def disboard_bump(guild: FakeGuild, user: FakeMember, disboard_id: int) -> FakeMessage:
+    """Respuesta exitosa de DISBOARD a un /bump de `user`."""
+    disboard = FakeMember(guild, disboard_id, bot=True)
+    embed = discord.Embed(description="Bump done! :thumbsup:")
+    interaction = SimpleNamespace(name="bump", user=user)
+    return FakeMessage(guild.channel, disboard, embeds=[embed], interaction=interaction)
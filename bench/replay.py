@@ -0,0 +1,341 @@
+"""Replay de tráfico real del gateway contra el bot completo.
+
+Reproduce una grabación hecha con GATEWAY_RECORD (ver gateway_record.py)
+sobre el mismo bot que arma main.py (cogs, router, configuración), con la
+API HTTP de Discord reemplazada por un servidor local (bench/fake_api.py).
+Mide, por tipo de evento, la latencia desde que llega hasta que terminan
+todas las tareas que dispara, y los pedidos salientes a la API.
+
+Uso:
+    BENCH_DATABASE_URL=postgresql://localhost/bench python -m bench.replay \\
+        grabacion.jsonl.gz --velocidad 10 --latencia-api 50
+
+Los cogs escriben en la base de BENCH_DATABASE_URL con los ids de la
+grabación: usar una base de pruebas.
+
+Los pedidos hechos por tareas de fondo (la cola de moderación de
+ChannelControl, los recordatorios, los buffers) no se pueden atribuir a un
+evento y aparecen como "(fondo)".
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+BENCH_URL = os.getenv("BENCH_DATABASE_URL")
+if BENCH_URL:
+    os.environ["DATABASE_URL"] = BENCH_URL
+# Un solo proceso sin shards, sin métricas ni grabación, y sin chunking (no hay gateway)
+os.environ.update({
+    "SHARDED": "0", "SHARD_COUNT": "", "SHARD_IDS": "",
+    "CHUNK_GUILDS": "0", "METRICS_PORT": "", "GATEWAY_RECORD": "",
+})
+
+import aiohttp  # noqa: E402
+from discord.http import Route  # noqa: E402
+
+import database  # noqa: E402
+from bench.estadisticas import percentil  # noqa: E402
+from bench.fake_api import API_PREFIX, FakeDiscordAPI  # noqa: E402
+from gateway_record import read_events  # noqa: E402
+from guild_config import CLAVES  # noqa: E402
+
+FONDO = "(fondo)"
+ESTADO = ("READY", "GUILD_CREATE")  # se aplican antes de empezar a medir
+
+
+class Evento:
+    __slots__ = ("clase", "inicio", "tareas")
+
+    def __init__(self, clase: str) -> None:
+        self.clase = clase
+        self.inicio = time.perf_counter()
+        self.tareas: list[asyncio.Task] = []
+
+
+# Evento que se está procesando; las tareas lo heredan al crearse
+_evento: ContextVar[Optional[Evento]] = ContextVar("replay_evento", default=None)
+
+
+def plantilla(path: str) -> str:
+    """Ruta de la API sin ids ni tokens: /channels/{id}/messages."""
+    partes = path.removeprefix(API_PREFIX).strip("/").split("/")
+    for i, parte in enumerate(partes):
+        if parte.isdigit():
+            partes[i] = "{id}"
+        elif i == 2 and partes[0] in ("interactions", "webhooks"):
+            partes[i] = "{token}"
+        elif i > 0 and partes[i - 1] == "reactions":
+            partes[i] = "{emoji}"
+    return "/" + "/".join(partes)
+
+
+class FakeGateway:
+    """Lo que discord.py le pide al websocket fuera de los eventos.
+
+    Sólo los pedidos de miembros (NameResolver): responde con los miembros
+    vistos en la grabación, después de `latencia`.
+    """
+
+    open = False
+    shard_id = None
+    latency = 0.0
+
+    def __init__(self, state, miembros: dict[tuple[int, int], dict], latencia: float) -> None:
+        self._state = state
+        self.miembros = miembros
+        self.latencia = max(latencia, 0.001)  # la respuesta no puede llegar antes de esperarla
+        self.pedidos = 0
+
+    def is_ratelimited(self) -> bool:
+        return False
+
+    async def change_presence(self, **kwargs) -> None:
+        pass
+
+    async def request_chunks(self, guild_id: int, query: Optional[str] = None, *, limit: int,
+                             user_ids: Optional[list[int]] = None, presences: bool = False,
+                             nonce: Optional[str] = None) -> None:
+        self.pedidos += 1
+        user_ids = user_ids or []
+        data = {
+            "guild_id": str(guild_id),
+            "members": [m for uid in user_ids if (m := self.miembros.get((guild_id, uid)))],
+            "not_found": [uid for uid in user_ids if (guild_id, uid) not in self.miembros],
+            "chunk_index": 0,
+            "chunk_count": 1,
+            "nonce": nonce,
+        }
+        asyncio.get_running_loop().call_later(
+            self.latencia, self._state.parsers["GUILD_MEMBERS_CHUNK"], data
+        )
+
+
+class Replayer:
+    def __init__(self, bot, velocidad: float = 1.0, timeout: float = 30.0) -> None:
+        self.bot = bot
+        self.velocidad = velocidad
+        self.timeout = timeout
+        self.latencias: dict[str, list[float]] = defaultdict(list)
+        self.timeouts: Counter = Counter()
+        self.errores: Counter = Counter()
+        self.requests: Counter = Counter()  # (clase, "MÉTODO /ruta")
+        self.atraso_max = 0.0
+        self.segundos = 0.0
+        self._canales: dict[int, str] = {}
+        self._medidas: set[asyncio.Task] = set()
+        prefix = bot.command_prefix
+        self._prefijo = prefix if isinstance(prefix, str) else "!"
+
+    # ───────────── Instrumentación ─────────────
+    def instalar(self) -> None:
+        """Antes de `bot.login`: la sesión HTTP se crea ahí con el trace."""
+        asyncio.get_running_loop().set_task_factory(self._task_factory)
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request)
+        self.bot.http.http_trace = trace
+
+    def _task_factory(self, loop, coro, context=None):
+        task = asyncio.Task(coro, loop=loop, context=context)
+        evento = context.get(_evento) if context is not None else _evento.get()
+        if evento is not None:
+            evento.tareas.append(task)
+        return task
+
+    async def _on_request(self, session, ctx, params) -> None:
+        evento = _evento.get()
+        clase = evento.clase if evento is not None else FONDO
+        self.requests[(clase, f"{params.method} {plantilla(params.url.path)}")] += 1
+
+    # ───────────── Clasificación ─────────────
+    def mapear_canales(self) -> None:
+        """Canal → claves de configuración (canal_bumps, canal_banco, ...) por servidor."""
+        self._canales.clear()
+        for guild in self.bot.guilds:
+            for clave in CLAVES:
+                if clave.startswith("canal_"):
+                    canal = self.bot.config.get(guild.id, clave)
+                    previo = self._canales.get(canal)
+                    self._canales[canal] = f"{previo}/{clave}" if previo else clave
+
+    def clasificar(self, tipo: str, data: dict) -> str:
+        if tipo == "MESSAGE_CREATE":
+            contenido = data.get("content") or ""
+            comando = contenido[len(self._prefijo):].split(maxsplit=1)
+            if contenido.startswith(self._prefijo) and comando:
+                return self._prefijo + comando[0].lower()
+            autor = "bot" if data.get("author", {}).get("bot") else "usuario"
+            clave = self._canales.get(int(data["channel_id"]))
+            return f"mensaje de {autor}" + (f" en #{clave}" if clave else "")
+        if tipo == "INTERACTION_CREATE":
+            datos = data.get("data") or {}
+            if data.get("type") == 2:
+                return "/" + datos.get("name", "")
+            if data.get("type") == 3:
+                return "componente " + datos.get("custom_id", "").split(":")[0]
+        return tipo
+
+    # ───────────── Reproducción ─────────────
+    def alimentar(self, tipo: str, data: dict, clase: Optional[str] = None) -> Optional[Evento]:
+        parser = self.bot._connection.parsers.get(tipo)
+        if parser is None:
+            return None
+        evento = Evento(clase or tipo)
+        token = _evento.set(evento)
+        try:
+            parser(data)
+        except Exception as e:
+            self.errores[f"{evento.clase}: {type(e).__name__}"] += 1
+            return None
+        finally:
+            _evento.reset(token)
+        return evento
+
+    async def _medir(self, evento: Evento) -> None:
+        limite = evento.inicio + self.timeout
+        while True:
+            pendientes = [t for t in evento.tareas if not t.done()]
+            restante = limite - time.perf_counter()
+            if not pendientes:
+                break
+            if restante <= 0:
+                self.timeouts[evento.clase] += 1
+                return
+            await asyncio.wait(pendientes, timeout=restante)
+        self.latencias[evento.clase].append(time.perf_counter() - evento.inicio)
+
+    def _medir_en_fondo(self, evento: Evento) -> None:
+        task = asyncio.get_running_loop().create_task(self._medir(evento))
+        self._medidas.add(task)
+        task.add_done_callback(self._medidas.discard)
+
+    async def reproducir(self, eventos: list[tuple[float, str, dict]]) -> None:
+        if not eventos:
+            return
+        loop = asyncio.get_running_loop()
+        self.requests.clear()  # sin el login ni la carga inicial
+        t0 = eventos[0][0]
+        inicio = loop.time()
+        for t, tipo, data in eventos:
+            objetivo = inicio + (t - t0) / self.velocidad
+            espera = objetivo - loop.time()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            else:
+                self.atraso_max = max(self.atraso_max, -espera)
+                await asyncio.sleep(0)
+            evento = self.alimentar(tipo, data, self.clasificar(tipo, data))
+            if evento is not None:
+                self._medir_en_fondo(evento)
+        if self._medidas:
+            await asyncio.wait(set(self._medidas))
+        self.segundos = loop.time() - inicio
+
+    # ───────────── Reporte ─────────────
+    def reporte(self, gateway: FakeGateway) -> str:
+        lineas = [f"{'evento':<44}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'timeouts':>10}"]
+        clases = sorted(set(self.latencias) | set(self.timeouts),
+                        key=lambda c: -(len(self.latencias.get(c, [])) + self.timeouts[c]))
+        for clase in clases:
+            lat = sorted(self.latencias.get(clase, []))
+            lineas.append(
+                f"{clase[:43]:<44}{len(lat):>7}{percentil(lat, 50) * 1000:>10.2f}"
+                f"{percentil(lat, 95) * 1000:>10.2f}{percentil(lat, 99) * 1000:>10.2f}{self.timeouts[clase]:>10}"
+            )
+
+        total = sum(self.requests.values())
+        por_segundo = total / self.segundos if self.segundos else 0.0
+        lineas += ["", f"Pedidos a la API: {total} ({por_segundo:.1f}/s); "
+                       f"pedidos de miembros al gateway: {gateway.pedidos}"]
+        for (clase, ruta), n in self.requests.most_common():
+            lineas.append(f"  {n:>7}  {ruta:<56} {clase}")
+
+        if self.errores:
+            lineas += ["", "Errores al parsear eventos:"]
+            lineas += [f"  {n:>7}  {error}" for error, n in self.errores.most_common()]
+        return "\n".join(lineas)
+
+
+def miembros_grabados(eventos: list[tuple[float, str, dict]]) -> dict[tuple[int, int], dict]:
+    """Payloads de miembros vistos en los mensajes, para responder pedidos de miembros."""
+    miembros = {}
+    for _, tipo, data in eventos:
+        if tipo == "MESSAGE_CREATE" and data.get("member") and data.get("guild_id"):
+            autor = data["author"]
+            miembros[(int(data["guild_id"]), int(autor["id"]))] = {**data["member"], "user": autor}
+    return miembros
+
+
+async def main(args: argparse.Namespace) -> int:
+    import main as app  # arma el bot igual que en producción
+
+    eventos = list(read_events(args.grabacion))
+    ready = next((data for _, tipo, data in eventos if tipo == "READY"), None)
+    if ready is None:
+        print("La grabación no tiene READY (se grabó después de conectarse).", file=sys.stderr)
+        return 2
+    estado = [(tipo, data) for _, tipo, data in eventos if tipo == "GUILD_CREATE"]
+    linea_tiempo = [e for e in eventos if e[1] not in ESTADO]
+    if args.max_eventos:
+        linea_tiempo = linea_tiempo[:args.max_eventos]
+
+    bot = app.bot
+    application = ready.get("application") or {}
+    api = FakeDiscordAPI(ready["user"], application.get("id"), latencia=args.latencia_api / 1000)
+    Route.BASE = await api.start()
+    replayer = Replayer(bot, args.velocidad, args.timeout)
+    replayer.instalar()
+    gateway = FakeGateway(bot._connection, miembros_grabados(eventos), args.latencia_api / 1000)
+
+    try:
+        async with bot:
+            await app.iniciar()
+            await bot.login("replay")
+            bot.ws = gateway
+
+            replayer.alimentar("READY", {
+                "v": 10, "user": ready["user"], "guilds": [], "session_id": "replay",
+                "resume_gateway_url": "", "application": application or {"id": ready["user"]["id"], "flags": 0},
+            })
+            for tipo, data in estado:
+                replayer.alimentar(tipo, data)
+            await bot.wait_until_ready()
+            replayer.mapear_canales()
+
+            print(f"Reproduciendo {len(linea_tiempo)} eventos de {len(bot.guilds)} servidores "
+                  f"a {args.velocidad:g}x...")
+            await replayer.reproducir(linea_tiempo)
+            await asyncio.sleep(args.espera)  # lo que quedó en colas y buffers
+            await database.flush_writes()
+    finally:
+        await database.close_pool()
+        await api.close()
+
+    print(f"{len(linea_tiempo)} eventos en {replayer.segundos:.1f} s "
+          f"(atraso máximo {replayer.atraso_max * 1000:.0f} ms, API a {args.latencia_api:g} ms)")
+    print(replayer.reporte(gateway))
+    return 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay de eventos del gateway grabados")
+    parser.add_argument("grabacion", help="archivo .jsonl.gz de GATEWAY_RECORD")
+    parser.add_argument("--velocidad", type=float, default=1.0, help="1 = tiempo real, 100 = cien veces más rápido")
+    parser.add_argument("--latencia-api", type=float, default=0.0, help="ms por pedido a la API falsa")
+    parser.add_argument("--timeout", type=float, default=30.0, help="segundos máximos por evento")
+    parser.add_argument("--espera", type=float, default=3.0, help="segundos de gracia al final")
+    parser.add_argument("--max-eventos", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.velocidad <= 0:
+        parser.error("--velocidad tiene que ser positiva")
+    return args
+
+
+if __name__ == "__main__":
+    if not BENCH_URL:
+        sys.exit("Definí BENCH_DATABASE_URL con una base local de pruebas (no la de producción).")
+    sys.exit(asyncio.run(main(parse_args())))
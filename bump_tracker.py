@@ -1,32 +1,53 @@
 import discord
 from discord.ext import commands
-import os, asyncio
+import os, asyncio, time
+import logging
 from datetime import datetime, timezone
-from database import add_bump, get_bumps, get_all_bumps
+from database import (add_bump, bump_board, flush_writes, config,
+                      guardar_recordatorio, borrar_recordatorio, get_recordatorios)
+from scheduler import Scheduler
+from sharding import local_shards
+from views.ranking_buttons import Paginador, RankingButton
 
 DISBOARD_BOT_ID  = 302050872383242240
-ROLE_ID_TO_PING  = 1392903420020658196
-CHANNEL_ID       = 1392893710848622734
 COUNTDOWN        = 2 * 60 * 60  # 2 horas
 EMBED_COLOR      = 0x00ffff
 
+logger = logging.getLogger(__name__)
+
+def linea_bumps(guild: discord.Guild, puesto: int, user_id: int, count: float) -> str:
+    return f"**{puesto}.** <@{user_id}> — **{int(count)}** bumps"
+
+ranking_bumps = Paginador("b", bump_board, "🏆 Clasificación de Bumps", EMBED_COLOR, linea_bumps)
+
 class BumpTracker(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.tasks: dict[int, asyncio.Task] = {}
         self.pending_bumps: dict[int, int] = {}  # user_id que ejecutó el bump
-
-    # ───────────── listener para TODOS los mensajes del canal ─────────────
-    @commands.Cog.listener("on_message")
-    async def monitor_all_messages(self, message: discord.Message):
-        if message.channel.id != CHANNEL_ID:
-            return
-
+        # Un único timer para los recordatorios de todos los servidores (guild_id -> channel_id)
+        self.scheduler = Scheduler(self._recordatorio)
+
+    async def cog_load(self):
+        self.bot.router.register(self.monitor_all_messages, channel_key="canal_bumps", name="bump_tracker")
+        # Los recordatorios persistidos se retoman; los vencidos se envían al arrancar.
+        # Con varios procesos, cada uno carga sólo los de sus shards.
+        for row in await get_recordatorios(*local_shards(self.bot)):
+            self.scheduler.schedule(row["guild_id"], row["due_at"].timestamp(), row["channel_id"])
+        self.scheduler.start()
+
+    async def cog_unload(self):
+        self.bot.router.unregister(self.monitor_all_messages)
+        await self.scheduler.close()  # quedan en la base para la próxima carga
+        # Los bumps contados en memoria se escriben antes de descargar el cog
+        await flush_writes()
+
+    # ───────────── handler para TODOS los mensajes del canal (vía router) ─────────────
+    async def monitor_all_messages(self, message: discord.Message, content: str):
         if message.author.id == DISBOARD_BOT_ID:
             await self.disboard_only_bump(message)
             return
 
-        if message.content.strip().lower() == "/bump":
+        if content == "/bump":
             self.pending_bumps[message.guild.id] = message.author.id
 
     # ───────────── procesamiento de mensajes de DISBOARD ─────────────
@@ -81,17 +102,24 @@ class BumpTracker(commands.Cog):
         )
         await message.channel.send(embed=thanks)
 
-        if task := self.tasks.get(guild_id):
-            task.cancel()
-        self.tasks[guild_id] = self.bot.loop.create_task(self._recordatorio(message.channel))
+        due = time.time() + COUNTDOWN
+        await guardar_recordatorio(guild_id, message.channel.id, datetime.fromtimestamp(due, timezone.utc))
+        self.scheduler.schedule(guild_id, due, message.channel.id)
 
-    async def _recordatorio(self, channel: discord.TextChannel):
+    async def _recordatorio(self, guild_id: int, channel_id: int, due: float):
+        # La fila se borra sólo si el aviso salió o si el canal ya no sirve; si el
+        # scheduler se cierra (CancelledError) o falla el envío, queda para la próxima carga
+        await self.bot.wait_until_ready()
         try:
-            await asyncio.sleep(COUNTDOWN)
-        except asyncio.CancelledError:
-            return
-
-        role = channel.guild.get_role(ROLE_ID_TO_PING)
+            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+            await self._enviar_recordatorio(channel)
+        except (discord.NotFound, discord.Forbidden) as e:
+            logger.warning(f"Recordatorio descartado para el canal {channel_id}: {e}")
+        # Si se reprogramó mientras se enviaba, el nuevo vencimiento se conserva
+        await borrar_recordatorio(guild_id, datetime.fromtimestamp(due, timezone.utc))
+
+    async def _enviar_recordatorio(self, channel: discord.TextChannel):
+        role = channel.guild.get_role(config.get(channel.guild.id, "rol_bump"))
         mention = role.mention if role else "@here"
 
         embed = discord.Embed(
@@ -108,26 +136,47 @@ class BumpTracker(commands.Cog):
     @commands.command(name="clasificacion")
     async def clasificacion(self, ctx):
         """Muestra el ranking de usuarios por cantidad de bumps"""
-        bumps = await get_all_bumps(ctx.guild.id)
-        if not bumps:
+        pagina = await ranking_bumps.primera(ctx.guild, 10)
+        if pagina is None:
             await ctx.send("❌ No hay bumps registrados aún.")
             return
 
-        top = "\n".join(
-            f"**{i+1}.** <@{uid}> — **{count}** bumps"
-            for i, (uid, count) in enumerate(bumps[:10])
-        )
-
+        embed, view = pagina
+        await ctx.send(embed=embed, view=view)
+
+    # ───────────── administración de recordatorios ─────────────
+    @commands.command(name="recordatorios")
+    @commands.has_permissions(administrator=True)
+    async def recordatorios(self, ctx):
+        """Muestra el próximo recordatorio de bump programado"""
+        entry = self.scheduler.get(ctx.guild.id)
+        if entry is None:
+            descripcion = "📭 No hay ningún recordatorio programado en este servidor."
+        else:
+            descripcion = f"🕒 Próximo recordatorio en <#{entry.payload}> <t:{int(entry.due)}:R>."
         embed = discord.Embed(
-            title="🏆 Clasificación de Bumps",
-            description=top,
-            color=EMBED_COLOR
+            title="⏰ Recordatorios de bump",
+            description=descripcion,
+            color=EMBED_COLOR,
+            timestamp=datetime.now(timezone.utc)
         )
+        embed.set_footer(text=f"{len(self.scheduler)} recordatorios programados en total")
         await ctx.send(embed=embed)
 
+    @commands.command(name="cancelarrecordatorio")
+    @commands.has_permissions(administrator=True)
+    async def cancelar_recordatorio(self, ctx):
+        """Cancela el recordatorio de bump pendiente del servidor"""
+        if self.scheduler.cancel(ctx.guild.id) is None:
+            await ctx.send("❌ No hay ningún recordatorio programado.")
+            return
+        await borrar_recordatorio(ctx.guild.id)
+        await ctx.send("🗑️ Recordatorio de bump cancelado.")
+
     @commands.Cog.listener()
     async def on_ready(self):
         print("[BumpTracker] Módulo de bumps listo")
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(BumpTracker(bot))
\ No newline at end of file
+    await bot.add_cog(BumpTracker(bot))
+    bot.add_dynamic_items(RankingButton)  # Botones de paginación persistentes
\ No newline at end of file
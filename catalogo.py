@@ -0,0 +1,67 @@
+import asyncio
+import difflib
+from bisect import bisect_left
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+
+class Objeto(NamedTuple):
+    id: int
+    nombre: str
+    precio: int
+
+
+class Catalogo:
+    """Copia en memoria de la tabla `tienda`.
+
+    Indexa los nombres en minúsculas (casefold) para resolver un objeto con un
+    diccionario y guarda la lista ordenada de nombres para búsquedas por
+    prefijo. Los comandos que modifican la tienda llaman a `invalidate()`.
+    """
+
+    def __init__(self, load: Callable[[], Awaitable[list]]) -> None:
+        self._load = load
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._version = 0  # cambia en cada invalidate() para descartar cargas en curso
+        self._por_nombre: dict[str, Objeto] = {}
+        self._nombres: list[str] = []          # claves casefold ordenadas
+        self._por_precio: list[Objeto] = []    # orden de !tienda
+
+    async def _ensure(self) -> None:
+        if self._loaded:
+            return
+        async with self._lock:
+            while not self._loaded:
+                version = self._version
+                objetos = [Objeto(r["id"], r["nombre"], r["precio"]) for r in await self._load()]
+                self._por_nombre = {o.nombre.casefold(): o for o in objetos}
+                self._nombres = sorted(self._por_nombre)
+                self._por_precio = sorted(objetos, key=lambda o: (o.precio, o.id))
+                self._loaded = version == self._version
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._loaded = False
+
+    async def objetos(self) -> list[Objeto]:
+        """Todos los objetos, del más barato al más caro."""
+        await self._ensure()
+        return list(self._por_precio)
+
+    async def buscar(self, nombre: str) -> Optional[Objeto]:
+        await self._ensure()
+        return self._por_nombre.get(nombre.strip().casefold())
+
+    async def sugerencias(self, texto: str, limite: int = 5) -> list[Objeto]:
+        """Objetos cuyo nombre empieza por `texto`; si no hay, los más parecidos."""
+        await self._ensure()
+        clave = texto.strip().casefold()
+        resultado = []
+        i = bisect_left(self._nombres, clave)
+        while i < len(self._nombres) and len(resultado) < limite and self._nombres[i].startswith(clave):
+            resultado.append(self._por_nombre[self._nombres[i]])
+            i += 1
+        if not resultado:
+            parecidos = difflib.get_close_matches(clave, self._nombres, n=limite, cutoff=0.6)
+            resultado = [self._por_nombre[n] for n in parecidos]
+        return resultado
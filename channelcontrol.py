@@ -1,44 +1,167 @@
 import discord
 from discord.ext import commands
 import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Optional
+
+VENTANA_LOTE = 1.0        # segundos que se juntan mensajes antes de borrarlos en lote
+AVISO_DURACION = 10.0     # segundos que queda visible el aviso tras la última infracción
+AVISO_MIN_EDICION = 3.0   # mínimo entre ediciones del mismo aviso
+TAM_BULK = 100            # máximo de mensajes por bulk delete de Discord
+
+logger = logging.getLogger(__name__)
+
+class Aviso:
+    """Aviso activo de un canal: se edita en lugar de publicar uno nuevo."""
+
+    def __init__(self, message: discord.Message, borrados: int) -> None:
+        self.message = message
+        self.borrados = borrados
+        self.expira = time.monotonic() + AVISO_DURACION
+        self.editado = time.monotonic()
+        self.pendiente = False  # hay un contador nuevo sin mostrar
+
+    @property
+    def proxima_edicion(self) -> float:
+        return self.editado + AVISO_MIN_EDICION
 
 class ChannelControl(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.bump_channel_id = 1392893710848622734  # ID real del canal de bumps
         self.allowed_commands = {"/bump", "!misbumps", "!clasificacion"}  # comandos visibles permitidos
+        self.cola: asyncio.Queue[discord.Message] = asyncio.Queue()
+        self.avisos: dict[int, Aviso] = {}  # channel_id -> aviso activo
+        self.worker: Optional[asyncio.Task] = None
+
+    async def cog_load(self):
+        # Sólo mensajes humanos del canal de bumps de cada servidor (config "canal_bumps")
+        self.bot.router.register(self.controlar_canal, channel_key="canal_bumps",
+                                 name="channelcontrol", ignore_bots=True)
+        # Un único task borra en lote, edita y expira los avisos de todos los canales
+        self.worker = asyncio.create_task(self._moderar())
+
+    async def cog_unload(self):
+        self.bot.router.unregister(self.controlar_canal)
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+        for aviso in self.avisos.values():
+            try:
+                await aviso.message.delete()
+            except discord.HTTPException:
+                pass
+        self.avisos.clear()
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot:
+    async def controlar_canal(self, message: discord.Message, content: str):
+        # Permitir si el autor tiene permisos de administrador y usa un comando (!...)
+        if message.author.guild_permissions.administrator and content.startswith("!"):
+            return  # se permite
+
+        # Permitir comandos normales
+        if content in self.allowed_commands:
             return
 
-        if message.channel.id == self.bump_channel_id:
-            content = message.content.strip().lower()
+        # Si no está permitido, se encola para borrarlo en el próximo lote
+        self.cola.put_nowait(message)
 
-            # Permitir si el autor tiene permisos de administrador y usa un comando (!...)
-            if message.author.guild_permissions.administrator and content.startswith("!"):
-                return  # se permite
+    # ───────────── Moderación en lote ─────────────
+    def _proximo_evento(self) -> Optional[float]:
+        # Segundos hasta el próximo aviso que vence o que tiene una edición pendiente
+        momentos = [a.expira for a in self.avisos.values()]
+        momentos += [a.proxima_edicion for a in self.avisos.values() if a.pendiente]
+        if not momentos:
+            return None
+        return max(0.0, min(momentos) - time.monotonic())
 
-            # Permitir comandos normales
-            if content in self.allowed_commands:
-                return
+    async def _moderar(self):
+        while True:
+            try:
+                primero = await asyncio.wait_for(self.cola.get(), timeout=self._proximo_evento())
+            except asyncio.TimeoutError:
+                primero = None
+
+            if primero is not None:
+                # Se deja llegar el resto de la ráfaga y se procesa junta
+                await asyncio.sleep(VENTANA_LOTE)
+                lote = [primero]
+                while not self.cola.empty():
+                    lote.append(self.cola.get_nowait())
+
+                por_canal: dict[int, list[discord.Message]] = defaultdict(list)
+                for message in lote:
+                    por_canal[message.channel.id].append(message)
+                for channel_id, mensajes in por_canal.items():
+                    # Un error en un canal no frena al worker ni a los demás canales
+                    try:
+                        await self._borrar(mensajes)
+                        await self._avisar(mensajes[0].channel, len(mensajes))
+                    except Exception as e:
+                        logger.error(f"Error moderando el canal {channel_id}: {e}")
 
-            # Si no está permitido, borrar y enviar aviso
             try:
-                await message.delete()
-            except discord.Forbidden:
-                pass
+                await self._mantener_avisos()
+            except Exception as e:
+                logger.error(f"Error actualizando los avisos: {e}")
 
-            allowed_str = ", ".join(self.allowed_commands)
-            alert = await message.channel.send(
-                f"⚠️ Sólo se permiten los comandos:{allowed_str} en este canal."
-            )
-            await asyncio.sleep(10)
+    async def _borrar(self, mensajes: list[discord.Message]):
+        channel = mensajes[0].channel
+        for i in range(0, len(mensajes), TAM_BULK):
+            chunk = mensajes[i:i + TAM_BULK]
             try:
-                await alert.delete()
+                await channel.delete_messages(chunk)
             except discord.Forbidden:
-                pass
+                return
+            except discord.HTTPException:
+                # Algún mensaje ya no existe: se reintenta de a uno
+                for message in chunk:
+                    try:
+                        await message.delete()
+                    except discord.HTTPException:
+                        pass
+
+    def _texto_aviso(self, borrados: int) -> str:
+        allowed_str = ", ".join(self.allowed_commands)
+        texto = f"⚠️ Sólo se permiten los comandos:{allowed_str} en este canal."
+        if borrados > 1:
+            texto += f"\n🧹 Se eliminaron {borrados} mensajes."
+        return texto
+
+    async def _avisar(self, channel: discord.abc.Messageable, borrados: int):
+        aviso = self.avisos.get(channel.id)
+        if aviso is None:
+            try:
+                message = await channel.send(self._texto_aviso(borrados))
+            except discord.HTTPException:
+                return
+            self.avisos[channel.id] = Aviso(message, borrados)
+            return
+
+        aviso.borrados += borrados
+        aviso.expira = time.monotonic() + AVISO_DURACION
+        aviso.pendiente = True
+
+    async def _mantener_avisos(self):
+        ahora = time.monotonic()
+        for channel_id, aviso in list(self.avisos.items()):
+            if aviso.expira <= ahora:
+                del self.avisos[channel_id]
+                try:
+                    await aviso.message.delete()
+                except discord.HTTPException:
+                    pass
+            elif aviso.pendiente and aviso.proxima_edicion <= ahora:
+                aviso.pendiente = False
+                aviso.editado = ahora
+                try:
+                    await aviso.message.edit(content=self._texto_aviso(aviso.borrados))
+                except discord.HTTPException:
+                    pass
 
 # setup asíncrono
 async def setup(bot):
@@ -1,161 +1,559 @@
 import asyncpg
 import os
 import asyncio
+import json
+import logging
+import random
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
 from dotenv import load_dotenv
+from write_buffer import CounterBuffer, BatchWriter, merge_rows
+from leaderboard import Leaderboards
+from cache import LRUCache
+from catalogo import Catalogo
+from guild_config import GuildConfig
+from querylog import QueryLog
+from ledger import Ledger
+from migrate import migrate
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 DB_URL = os.getenv("DATABASE_URL")
 
-async def connect():
-    return await asyncpg.connect(DB_URL)
+# Configuración del pool (se puede ajustar por variables de entorno)
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_MAX_INACTIVE_LIFETIME = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300"))
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+# Buffer write-behind de bumps y créditos de euros
+WRITE_BUFFER_INTERVAL = float(os.getenv("WRITE_BUFFER_INTERVAL", "5"))
+WRITE_BUFFER_THRESHOLD = int(os.getenv("WRITE_BUFFER_THRESHOLD", "200"))
+WRITE_BUFFER_MAX_KEYS = int(os.getenv("WRITE_BUFFER_MAX_KEYS", "50000"))  # totales recordados por buffer
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "2"))
+
+# Reintentos de operaciones que pueden chocar con otra transacción
+DB_RETRY_ATTEMPTS = int(os.getenv("DB_RETRY_ATTEMPTS", "5"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.02"))  # segundos, se duplica por intento
+
+# Caché de balances (lectura a través, escritura directa)
+BALANCE_CACHE_SIZE = int(os.getenv("BALANCE_CACHE_SIZE", "10000"))
+BALANCE_CACHE_TTL = float(os.getenv("BALANCE_CACHE_TTL", "300"))
+
+_pool: Optional[asyncpg.Pool] = None
+
+# Observadores de cada consulta ejecutada (métricas, log de lentas); reciben
+# el LoggedQuery de asyncpg con la consulta, sus argumentos y la duración.
+_query_observers: list[Callable[[Any], None]] = []
+
+def add_query_observer(observer: Callable[[Any], None]) -> None:
+    if observer not in _query_observers:
+        _query_observers.append(observer)
+
+def _on_query(record) -> None:
+    for observer in _query_observers:
+        try:
+            observer(record)
+        except Exception as e:
+            logger.error(f"Error en un observador de consultas: {e}")
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    conn.add_query_logger(_on_query)
+
+# ───────────── Pool de conexiones compartido ─────────────
+async def create_pool() -> asyncpg.Pool:
+    """Crea (una sola vez) el pool compartido por el bot, los cogs y este módulo."""
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            DB_URL,
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=POOL_MAX_INACTIVE_LIFETIME,
+            statement_cache_size=STATEMENT_CACHE_SIZE,
+            init=_init_connection,
+        )
+        await _warm_up(_pool)
+        bump_buffer.start()
+        euro_buffer.start()
+        audit_buffer.start()
+        ledger.start()
+    return _pool
+
+async def _warm_up(pool: asyncpg.Pool) -> None:
+    # Toma las min_size conexiones a la vez y hace un round trip en cada una,
+    # así el primer comando no paga el handshake ni descubre una conexión rota.
+    conns = [await pool.acquire() for _ in range(pool.get_min_size())]
+    try:
+        await asyncio.gather(*(conn.execute("SELECT 1") for conn in conns))
+    finally:
+        for conn in conns:
+            await pool.release(conn)
+
+def get_pool() -> asyncpg.Pool:
+    if _pool is None:
+        raise RuntimeError("El pool de base de datos no está inicializado (llamá a create_pool()).")
+    return _pool
+
+def acquire():
+    """Context manager asíncrono que presta una conexión del pool."""
+    return get_pool().acquire()
+
+# Estadísticas por sentencia y log de consultas lentas (!slowq)
+query_log = QueryLog(get_pool)
+add_query_observer(query_log.observe)
+
+async def flush_writes() -> None:
+    """Escribe ya todo lo pendiente de los buffers write-behind."""
+    await bump_buffer.flush()
+    await euro_buffer.flush()
+    await audit_buffer.flush()
+    await ledger.flush()
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        try:
+            await config.close()
+            await bump_buffer.close()
+            await euro_buffer.close()
+            await audit_buffer.close()
+            await ledger.close()
+        finally:
+            await _pool.close()
+        _pool = None
+
+def pool_stats() -> dict:
+    """Estado de saturación del pool para los comandos de administración."""
+    pool = get_pool()
+    size = pool.get_size()
+    idle = pool.get_idle_size()
+    max_size = pool.get_max_size()
+    return {
+        "min": pool.get_min_size(),
+        "max": max_size,
+        "size": size,
+        "idle": idle,
+        "in_use": size - idle,
+        "saturation": (size - idle) / max_size if max_size else 0.0,
+    }
+
+def cache_stats() -> dict:
+    return balance_cache.stats()
+
+# ───────────── Reintentos ─────────────
+_REINTENTABLES = (asyncpg.DeadlockDetectedError, asyncpg.SerializationError)
+reintentos: dict[str, int] = {}  # por tipo de error, para métricas
+
+async def _con_reintentos(operacion: Callable, *args):
+    """Ejecuta `operacion(*args)` reintentando deadlocks y fallas de serialización.
+
+    Sólo para sentencias únicas (o funciones) sin efectos fuera de la base:
+    la que falla se revierte entera. Espera con backoff exponencial y jitter.
+    """
+    for intento in range(DB_RETRY_ATTEMPTS):
+        try:
+            return await operacion(*args)
+        except _REINTENTABLES as e:
+            nombre = type(e).__name__
+            reintentos[nombre] = reintentos.get(nombre, 0) + 1
+            if intento == DB_RETRY_ATTEMPTS - 1:
+                raise
+            demora = DB_RETRY_BASE_DELAY * 2 ** intento * random.uniform(0.5, 1.5)
+            logger.warning(f"{nombre}, reintento {intento + 1} en {demora * 1000:.0f} ms")
+            await asyncio.sleep(demora)
 
 async def setup():
-    conn = await connect()
-
-    # Tabla de bumps
-    await conn.execute('''
-        CREATE TABLE IF NOT EXISTS bumps (
-            user_id TEXT NOT NULL,
-            guild_id TEXT NOT NULL,
-            count INT DEFAULT 1,
-            PRIMARY KEY (user_id, guild_id)
-        );
-    ''')
-
-    # Tabla de euros
-    await conn.execute('''
-        CREATE TABLE IF NOT EXISTS euros (
-            user_id TEXT NOT NULL,
-            guild_id TEXT NOT NULL,
-            balance FLOAT DEFAULT 0,
-            PRIMARY KEY (user_id, guild_id)
-        );
-    ''')
-
-    # Tabla de tienda
-    await conn.execute('''
-        CREATE TABLE IF NOT EXISTS tienda (
-            id SERIAL PRIMARY KEY,
-            nombre TEXT NOT NULL UNIQUE,
-            precio INTEGER NOT NULL CHECK (precio >= 0)
-        );
-    ''')
-
-    # Tabla de inventario
-    await conn.execute('''
-        CREATE TABLE IF NOT EXISTS inventario (
-            id SERIAL PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            guild_id TEXT NOT NULL,
-            objeto_id INTEGER NOT NULL REFERENCES tienda(id) ON DELETE CASCADE,
-            cantidad INTEGER NOT NULL DEFAULT 1 CHECK (cantidad > 0)
-        );
-    ''')
-
-    await conn.close()
+    """Aplica las migraciones pendientes (no hace DDL si el esquema está al día)."""
+    pool = await create_pool()
+    await migrate(pool)
 
-# Funciones de bumps
-async def add_bump(user_id: int, guild_id: int) -> int:
-    conn = await connect()
-    await conn.execute('''
+# ───────────── Buffers write-behind ─────────────
+# Las claves son (guild_id, user_id) como enteros (BIGINT en la base).
+async def _load_bumps(guild_id: int, user_id: int) -> int:
+    return await get_pool().fetchval('''
+        SELECT count FROM bumps WHERE user_id = $1 AND guild_id = $2;
+    ''', user_id, guild_id)
+
+async def _write_bumps(batch) -> None:
+    await get_pool().executemany('''
         INSERT INTO bumps (user_id, guild_id, count)
-        VALUES ($1, $2, 1)
+        VALUES ($2, $1, $3)
         ON CONFLICT (user_id, guild_id)
-        DO UPDATE SET count = bumps.count + 1;
-    ''', str(user_id), str(guild_id))
-    result = await conn.fetchval('''
-        SELECT count FROM bumps
-        WHERE user_id = $1 AND guild_id = $2;
-    ''', str(user_id), str(guild_id))
-    await conn.close()
-    return result or 0
+        DO UPDATE SET count = bumps.count + EXCLUDED.count;
+    ''', batch)
 
-async def get_bumps(user_id, guild_id):
-    conn = await connect()
-    result = await conn.fetchval('''
-        SELECT count FROM bumps WHERE user_id = $1 AND guild_id = $2;
-    ''', str(user_id), str(guild_id))
-    await conn.close()
-    return result or 0
-
-async def get_all_bumps(guild_id):
-    conn = await connect()
-    rows = await conn.fetch('''
-        SELECT user_id, count
-        FROM bumps
-        WHERE guild_id = $1
-        ORDER BY count DESC;
-    ''', str(guild_id))
-    await conn.close()
-    return [(row['user_id'], row['count']) for row in rows]
-
-# Función para agregar euros
-async def add_euros(user_id, guild_id, amount):
-    conn = await connect()
-    await conn.execute('''
+async def _load_euros(guild_id: int, user_id: int) -> float:
+    return await get_pool().fetchval('''
+        SELECT balance FROM euros WHERE user_id = $1 AND guild_id = $2;
+    ''', user_id, guild_id)
+
+async def _write_euros(batch) -> None:
+    await get_pool().executemany('''
         INSERT INTO euros (user_id, guild_id, balance)
-        VALUES ($1, $2, $3)
+        VALUES ($2, $1, $3)
         ON CONFLICT (user_id, guild_id)
-        DO UPDATE SET balance = euros.balance + $3;
-    ''', str(user_id), str(guild_id), amount)
-    await conn.close()
+        DO UPDATE SET balance = euros.balance + EXCLUDED.balance;
+    ''', batch)
+
+bump_buffer = CounterBuffer("bumps", _load_bumps, _write_bumps,
+                            WRITE_BUFFER_INTERVAL, WRITE_BUFFER_THRESHOLD,
+                            max_keys=WRITE_BUFFER_MAX_KEYS)
+# Guarda el balance persistido por (guild_id, user_id); al leer se le suma lo
+# pendiente del buffer de euros, y cada flush lo ajusta con su delta.
+balance_cache = LRUCache(BALANCE_CACHE_SIZE, BALANCE_CACHE_TTL)
+
+def _on_euros_flushed(batch) -> None:
+    for guild_id, user_id, delta in batch:
+        balance_cache.adjust((guild_id, user_id), delta)
+
+euro_buffer = CounterBuffer("euros", _load_euros, _write_euros,
+                            WRITE_BUFFER_INTERVAL, WRITE_BUFFER_THRESHOLD,
+                            on_flushed=_on_euros_flushed, max_keys=WRITE_BUFFER_MAX_KEYS)
+
+# ───────────── Auditoría ─────────────
+# Acciones de administración que mueven dinero, insertadas en lote: registrar
+# una no espera a la base.
+async def _write_audit(batch) -> None:
+    await get_pool().executemany('''
+        INSERT INTO audit_log (ts, guild_id, actor_id, accion, target_id, monto, saldo, detalle)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8::jsonb);
+    ''', batch)
+
+audit_buffer = BatchWriter("auditoría", _write_audit, AUDIT_FLUSH_INTERVAL)
+AUDIT_COLUMNS = ("ts", "guild_id", "actor_id", "accion", "target_id", "monto", "saldo", "detalle")
+
+def auditar(guild_id: int, actor_id: int, accion: str, target_id: Optional[int] = None,
+            monto: Optional[float] = None, saldo: Optional[float] = None, **detalle) -> None:
+    """Encola un registro de auditoría; `detalle` se guarda como JSON."""
+    audit_buffer.add((
+        datetime.now(timezone.utc), guild_id, actor_id, accion, target_id, monto, saldo,
+        json.dumps(detalle, default=str) if detalle else None,
+    ))
 
-# Función para obtener balance
+async def get_auditoria(guild_id: int, target_id: Optional[int] = None, limite: int = 20) -> list:
+    """Últimos registros del servidor (o de un usuario), del más nuevo al más viejo.
+
+    Lo encolado y todavía no escrito se mezcla en memoria, sin forzar un flush.
+    """
+    pendientes = [
+        dict(zip(AUDIT_COLUMNS, row))
+        for row in audit_buffer.unwritten(
+            lambda row: row[1] == guild_id and (target_id is None or row[4] == target_id))
+    ]
+    rows = await get_pool().fetch('''
+        SELECT ts, actor_id, accion, target_id, monto, saldo, detalle
+        FROM audit_log
+        WHERE guild_id = $1 AND ($2::bigint IS NULL OR target_id = $2)
+        ORDER BY ts DESC
+        LIMIT $3;
+    ''', guild_id, target_id, limite)
+    return merge_rows(rows, pendientes, ("ts", "actor_id", "accion", "target_id"), limite)
+
+# ───────────── Ledger ─────────────
+# Un movimiento por cuenta en cada operación de dinero, encolado después de
+# que la base confirmó el cambio (la escritura va en lote, fuera del camino).
+ledger = Ledger(get_pool)
+
+async def get_historial(guild_id: int, user_id: int, limite: int = 15):
+    return await ledger.historial(guild_id, user_id, limite)
+
+# ───────────── Rankings en memoria ─────────────
+# Se cargan una vez por servidor; después los mantiene cada camino de escritura.
+async def _load_bump_board(guild_id: int) -> dict:
+    # Lo pendiente del buffer se escribe antes; lo que llegue durante la carga
+    # lo aplica Leaderboards al terminar.
+    await bump_buffer.flush()
+    rows = await get_pool().fetch('''
+        SELECT user_id, count FROM bumps WHERE guild_id = $1;
+    ''', guild_id)
+    return {row['user_id']: row['count'] for row in rows}
+
+async def _load_balance_board(guild_id: int) -> dict:
+    await euro_buffer.flush()
+    rows = await get_pool().fetch('''
+        SELECT user_id, balance FROM euros WHERE guild_id = $1;
+    ''', guild_id)
+    return {row['user_id']: row['balance'] for row in rows}
+
+bump_board = Leaderboards(_load_bump_board)
+balance_board = Leaderboards(_load_balance_board)
+
+async def bump_rank(user_id, guild_id) -> Optional[tuple[int, int]]:
+    """(puesto, total) del usuario en el ranking de bumps, o None si no tiene."""
+    board = await bump_board.get(guild_id)
+    return board.rank(user_id)
+
+async def balance_rank(user_id, guild_id) -> Optional[tuple[int, int]]:
+    """(puesto, total) del usuario entre las cuentas del servidor, o None si no tiene."""
+    board = await balance_board.get(guild_id)
+    return board.rank(user_id)
+
+# Las escrituras directas de euros van dentro de `euro_buffer.direct(...)`:
+# antes se escriben los créditos pendientes de esas cuentas (la validación de
+# saldo los ve) y ningún flush corre mientras tanto, así el balance que
+# devuelve la base se guarda sin cruzarse con un lote a medio escribir.
+def _store_balance(guild_id: int, user_id: int, balance: float) -> None:
+    # Caché y ranking quedan con el balance que devolvió la base
+    balance_cache.set((guild_id, user_id), balance)
+    balance_board.update(guild_id, user_id, balance)
+
+# Funciones de bumps
+async def add_bump(user_id: int, guild_id: int) -> int:
+    total = await bump_buffer.add(guild_id, user_id, 1)
+    bump_board.update(guild_id, user_id, total)
+    return total
+
+async def set_bumps(user_id, guild_id, cantidad: int) -> None:
+    async def write():
+        await get_pool().execute('''
+            INSERT INTO bumps (user_id, guild_id, count)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (user_id, guild_id)
+            DO UPDATE SET count = $3;
+        ''', user_id, guild_id, cantidad)
+    await bump_buffer.assign(guild_id, user_id, cantidad, write)
+    bump_board.update(guild_id, user_id, cantidad)
+
+async def get_bumps(user_id, guild_id):
+    result = await bump_buffer.persisted(guild_id, user_id)
+    return result + bump_buffer.pending(guild_id, user_id)
+
+# ───────────── Recordatorios de bump ─────────────
+async def guardar_recordatorio(guild_id: int, channel_id: int, due_at: datetime) -> None:
+    await get_pool().execute('''
+        INSERT INTO bump_reminders (guild_id, channel_id, due_at)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (guild_id)
+        DO UPDATE SET channel_id = EXCLUDED.channel_id, due_at = EXCLUDED.due_at;
+    ''', guild_id, channel_id, due_at)
+
+async def borrar_recordatorio(guild_id: int, due_at: Optional[datetime] = None) -> None:
+    """Borra el recordatorio; con `due_at`, sólo si no se reprogramó mientras tanto."""
+    await get_pool().execute('''
+        DELETE FROM bump_reminders
+        WHERE guild_id = $1 AND ($2::timestamptz IS NULL OR due_at = $2);
+    ''', guild_id, due_at)
+
+async def get_recordatorios(shard_count: Optional[int] = None, shard_ids: Optional[list[int]] = None):
+    """Recordatorios pendientes; con shards, sólo los de los servidores locales."""
+    return await get_pool().fetch('''
+        SELECT guild_id, channel_id, due_at FROM bump_reminders
+        WHERE $1::int IS NULL OR ((guild_id >> 22) % $1) = ANY($2::int[])
+        ORDER BY due_at;
+    ''', shard_count, shard_ids)
+
+# ───────────── Operaciones de economía ─────────────
+# Cada operación es una única sentencia atómica (un round trip): crea la cuenta
+# sólo cuando hace falta, valida saldo/stock y devuelve el estado resultante.
+
+# Función para agregar euros (crédito en buffer, devuelve el nuevo balance).
+# Para créditos automáticos y frecuentes: si el proceso muere se pierde lo
+# pendiente de los últimos WRITE_BUFFER_INTERVAL segundos.
+async def add_euros(user_id, guild_id, amount, motivo: str = "credito") -> float:
+    balance = await euro_buffer.add(guild_id, user_id, amount)
+    balance_board.update(guild_id, user_id, balance)
+    ledger.registrar(guild_id, user_id, amount, balance, motivo)
+    return balance
+
+async def acreditar_euros(user_id, guild_id, amount, motivo: str = "credito") -> float:
+    """Crédito escrito en la base antes de volver (p. ej. !adde). Devuelve el nuevo balance."""
+    async with euro_buffer.direct(guild_id, user_id):
+        balance = await get_pool().fetchval('''
+            INSERT INTO euros (user_id, guild_id, balance)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (user_id, guild_id)
+            DO UPDATE SET balance = euros.balance + EXCLUDED.balance
+            RETURNING balance;
+        ''', user_id, guild_id, amount)
+        _store_balance(guild_id, user_id, balance)
+        ledger.registrar(guild_id, user_id, amount, balance, motivo)
+    return balance
+
+# Función para obtener balance (sólo lectura: no crea la cuenta)
 async def get_balance(user_id, guild_id):
-    conn = await connect()
-    balance = await conn.fetchval('''
-        SELECT balance FROM euros
-        WHERE user_id = $1 AND guild_id = $2;
-    ''', str(user_id), str(guild_id))
-    await conn.close()
-    return balance or 0
+    key = (guild_id, user_id)
+    balance = balance_cache.get(key)
+    if balance is None:
+        balance = await euro_buffer.persisted(*key)
+        balance_cache.set(key, balance)
+    return balance + euro_buffer.pending(*key)
+
+async def quitar_euros(user_id, guild_id, amount, motivo: str = "debito") -> tuple[float, float]:
+    """Resta hasta `amount` sin bajar de 0. Devuelve (removido, nuevo_balance)."""
+    async with euro_buffer.direct(guild_id, user_id):
+        row = await _con_reintentos(get_pool().fetchrow, '''
+            WITH previo AS (
+                SELECT balance FROM euros
+                WHERE user_id = $1 AND guild_id = $2
+                FOR UPDATE
+            )
+            UPDATE euros e
+            SET balance = GREATEST(previo.balance - $3, 0)
+            FROM previo
+            WHERE e.user_id = $1 AND e.guild_id = $2
+            RETURNING previo.balance - e.balance AS removido, e.balance;
+        ''', user_id, guild_id, amount)
+        if not row:
+            return 0.0, 0.0
+        _store_balance(guild_id, user_id, row["balance"])
+        if row["removido"]:
+            ledger.registrar(guild_id, user_id, -row["removido"], row["balance"], motivo)
+    return row["removido"], row["balance"]
+
+async def transferir_euros(sender_id, receiver_id, guild_id, amount):
+    """Mueve `amount` de sender a receiver si hay fondos.
+
+    Devuelve un Record con `ok`, `sender_balance` y `receiver_balance`
+    (si no hubo fondos, `sender_balance` es el saldo actual del emisor).
+    """
+    # La función (migración 0008) bloquea las dos cuentas ordenadas por
+    # user_id, así dos !dar cruzados no se bloquean mutuamente.
+    async with euro_buffer.direct(guild_id, sender_id, receiver_id):
+        row = await _con_reintentos(get_pool().fetchrow, '''
+            SELECT ok, sender_balance, receiver_balance FROM transferir_euros($1, $2, $3, $4);
+        ''', sender_id, receiver_id, guild_id, amount)
+        if row["ok"]:
+            _store_balance(guild_id, sender_id, row["sender_balance"])
+            _store_balance(guild_id, receiver_id, row["receiver_balance"])
+            ledger.registrar(guild_id, sender_id, -amount, row["sender_balance"], "dar", receiver_id)
+            ledger.registrar(guild_id, receiver_id, amount, row["receiver_balance"], "dar", sender_id)
+    return row
+
+async def reset_euros(guild_id):
+    """Borra todas las cuentas del servidor. Devuelve un Record con `cuentas` y `total` borrados.
+
+    Cada cuenta borrada deja en el ledger un movimiento por su saldo, en la
+    misma sentencia (puede ser una fila por miembro: no pasa por el buffer).
+    """
+    await ledger.asegurar_particion(datetime.now(timezone.utc))
+
+    async def borrar():
+        row = await get_pool().fetchrow('''
+            WITH borradas AS (
+                DELETE FROM euros WHERE guild_id = $1
+                RETURNING user_id, balance
+            ),
+            movimientos AS (
+                INSERT INTO ledger (ts, guild_id, user_id, delta, saldo, motivo)
+                SELECT now(), $1, user_id, -balance, 0, 'reset' FROM borradas
+                WHERE balance <> 0
+            )
+            SELECT count(*) AS cuentas, COALESCE(sum(balance), 0) AS total FROM borradas;
+        ''', guild_id)
+        euro_buffer.forget_guild(guild_id)
+        balance_cache.discard_if(lambda key: key[0] == guild_id)
+        balance_board.clear_guild(guild_id)
+        return row
+
+    # Los créditos pendientes ya tienen su movimiento encolado: se escriben
+    # antes (bajo el mismo lock) para que el reset los descuente también. Los
+    # que lleguen durante el DELETE son posteriores al reset y se conservan.
+    return await euro_buffer.exclusive(borrar)
 
 # Función para ver tienda
 async def get_tienda():
-    conn = await connect()
-    rows = await conn.fetch('SELECT id, nombre, precio FROM tienda ORDER BY id')
-    await conn.close()
-    return rows
+    return await get_pool().fetch('SELECT id, nombre, precio FROM tienda ORDER BY id')
+
+# Catálogo en memoria: resuelve nombres sin consultar la tabla
+catalogo = Catalogo(get_tienda)
+
+# Configuración por servidor (canales, roles, montos), cacheada en memoria
+config = GuildConfig(get_pool)
+
+async def get_inventario(user_id, guild_id):
+    return await get_pool().fetch('''
+        SELECT t.nombre, i.cantidad
+        FROM inventario i
+        JOIN tienda t ON i.objeto_id = t.id
+        WHERE i.user_id = $1 AND i.guild_id = $2
+        ORDER BY t.nombre;
+    ''', user_id, guild_id)
 
 # Función para comprar
-async def comprar_objeto(user_id, guild_id, objeto_id):
-    conn = await connect()
+async def comprar_objeto(user_id, guild_id, objeto_id: int):
+    """Compra una unidad del objeto `objeto_id` al precio vigente en la tabla.
 
-    # Obtener precio del objeto
-    objeto = await conn.fetchrow('SELECT precio FROM tienda WHERE id = $1', objeto_id)
-    if not objeto:
-        await conn.close()
-        return "❌ Objeto no encontrado."
+    Devuelve None si el objeto ya no existe; si no, un Record con `id`, `nombre`,
+    `precio`, `ok`, `balance` (saldo resultante o actual) y `cantidad`.
+    """
+    async with euro_buffer.direct(guild_id, user_id):
+        row = await _con_reintentos(get_pool().fetchrow, '''
+            WITH objeto AS (
+                SELECT id, nombre, precio FROM tienda WHERE id = $3
+            ),
+            cargo AS (
+                INSERT INTO euros (user_id, guild_id, balance)
+                SELECT $1, $2, -precio FROM objeto
+                WHERE precio = 0
+                   OR EXISTS (SELECT 1 FROM euros WHERE user_id = $1 AND guild_id = $2)
+                ON CONFLICT (user_id, guild_id)
+                DO UPDATE SET balance = euros.balance + EXCLUDED.balance
+                WHERE euros.balance + EXCLUDED.balance >= 0
+                RETURNING balance
+            ),
+            item AS (
+                INSERT INTO inventario (user_id, guild_id, objeto_id, cantidad)
+                SELECT $1, $2, id, 1 FROM objeto
+                WHERE EXISTS (SELECT 1 FROM cargo)
+                ON CONFLICT (user_id, guild_id, objeto_id)
+                DO UPDATE SET cantidad = inventario.cantidad + 1
+                RETURNING cantidad
+            )
+            SELECT
+                o.id, o.nombre, o.precio,
+                EXISTS (SELECT 1 FROM cargo) AS ok,
+                COALESCE(
+                    (SELECT balance FROM cargo),
+                    (SELECT balance FROM euros WHERE user_id = $1 AND guild_id = $2),
+                    0
+                ) AS balance,
+                (SELECT cantidad FROM item) AS cantidad
+            FROM objeto o;
+        ''', user_id, guild_id, objeto_id)
+        if row and row["ok"]:
+            _store_balance(guild_id, user_id, row["balance"])
+            if row["precio"]:
+                ledger.registrar(guild_id, user_id, -row["precio"], row["balance"], "compra",
+                                 ref=row["nombre"])
+    return row
 
-    precio = objeto["precio"]
+async def usar_objeto(user_id, guild_id, objeto_id: int):
+    """Consume una unidad del objeto `objeto_id` del inventario.
 
-    # Verificar saldo
-    balance = await conn.fetchval('''
-        SELECT balance FROM euros WHERE user_id = $1 AND guild_id = $2;
-    ''', str(user_id), str(guild_id))
-
-    if balance is None or balance < precio:
-        await conn.close()
-        return "💸 No tienes suficientes euros."
-
-    # Restar euros
-    await conn.execute('''
-        UPDATE euros
-        SET balance = balance - $1
-        WHERE user_id = $2 AND guild_id = $3;
-    ''', precio, str(user_id), str(guild_id))
-
-    # Insertar objeto al inventario o sumar cantidad
-    await conn.execute('''
-        INSERT INTO inventario (user_id, guild_id, objeto_id, cantidad)
-        VALUES ($1, $2, $3, 1)
-        ON CONFLICT (user_id, guild_id, objeto_id)
-        DO UPDATE SET cantidad = inventario.cantidad + 1;
-    ''', str(user_id), str(guild_id), objeto_id)
-
-    await conn.close()
-    return f"✅ Has comprado el objeto con ID {objeto_id} por {precio}€."
+    Devuelve None si el objeto ya no existe; si no, un Record con `id`, `nombre`
+    y `restante` (None si el usuario no lo tenía).
+    """
+    return await get_pool().fetchrow('''
+        WITH objeto AS (
+            SELECT id, nombre FROM tienda WHERE id = $3
+        ),
+        gasto AS (
+            UPDATE inventario i SET cantidad = i.cantidad - 1
+            FROM objeto o
+            WHERE i.user_id = $1 AND i.guild_id = $2 AND i.objeto_id = o.id
+              AND i.cantidad > 1
+            RETURNING i.cantidad
+        ),
+        borrado AS (
+            DELETE FROM inventario i
+            USING objeto o
+            WHERE i.user_id = $1 AND i.guild_id = $2 AND i.objeto_id = o.id
+              AND i.cantidad = 1
+            RETURNING 0 AS cantidad
+        )
+        SELECT
+            o.id, o.nombre,
+            COALESCE((SELECT cantidad FROM gasto), (SELECT cantidad FROM borrado)) AS restante
+        FROM objeto o;
+    ''', user_id, guild_id, objeto_id)
 
 # Ejecutar setup
+async def _main():
+    try:
+        await setup()
+    finally:
+        await close_pool()
+
 if __name__ == "__main__":
-    asyncio.run(setup())
+    asyncio.run(_main())
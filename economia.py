@@ -1,88 +1,64 @@
 import discord
 from discord.ext import commands
-import asyncpg
-import os
 import logging
-from contextlib import asynccontextmanager
 from typing import Optional
+import database
+from leaderboard import format_rank
+from members import nombres
+from views.ranking_buttons import Paginador, RankingButton
 
-# Configuración de logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-DB_URL = os.getenv("DATABASE_URL")
-
-# Constantes
-MAX_AMOUNT = 10.0
-MIN_AMOUNT = 0.01
-
 def format_currency(amount: float) -> str:
     return f"{amount:,.2f}€"
 
-async def connect():
-    try:
-        return await asyncpg.connect(DB_URL)
-    except Exception as e:
-        logger.error(f"Error conectando a la base de datos: {e}")
-        raise
-
-@asynccontextmanager
-async def get_connection():
-    conn = None
-    try:
-        conn = await connect()
-        yield conn
-    except Exception as e:
-        logger.error(f"Error en conexión de base de datos: {e}")
-        raise
-    finally:
-        if conn:
-            await conn.close()
+MEDALLAS = ["🥇", "🥈", "🥉"]
+
+def linea_balance(guild: discord.Guild, puesto: int, user_id: int, balance: float) -> str:
+    # El Paginador ya resolvió los nombres de la página con `nombres.resolve`
+    name = nombres.cached(guild, user_id) or "Usuario desconocido"
+    medal = MEDALLAS[puesto-1] if puesto <= 3 else f"**#{puesto}**"
+    return f"{medal} {name} — ```{format_currency(balance)}```"
+
+ranking_banco = Paginador("e", database.balance_board, "🏦 Top - Banco del Servidor",
+                          discord.Color.gold(), linea_balance, preparar=nombres.resolve)
 
 class Economia(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    async def ensure_user(self, user_id: str, guild_id: str) -> bool:
+    async def cog_unload(self):
+        # Los créditos en buffer se escriben antes de descargar el cog
+        await database.flush_writes()
+
+    async def get_balance(self, user_id: int, guild_id: int) -> Optional[float]:
         try:
-            async with get_connection() as conn:
-                await conn.execute("""
-                    INSERT INTO euros (user_id, guild_id, balance)
-                    VALUES ($1, $2, 0)
-                    ON CONFLICT (user_id, guild_id) DO NOTHING;
-                """, user_id, guild_id)
-            return True
+            return await database.get_balance(user_id, guild_id)
         except Exception as e:
-            logger.error(f"Error en ensure_user: {e}")
-            return False
+            logger.error(f"Error obteniendo balance: {e}")
+            return None
 
-    async def get_balance(self, user_id: str, guild_id: str) -> Optional[float]:
+    async def get_rank(self, user_id: int, guild_id: int) -> Optional[tuple[int, int]]:
         try:
-            async with get_connection() as conn:
-                row = await conn.fetchrow("""
-                    SELECT balance FROM euros
-                    WHERE user_id = $1 AND guild_id = $2;
-                """, user_id, guild_id)
-                return row["balance"] if row else None
+            return await database.balance_rank(user_id, guild_id)
         except Exception as e:
-            logger.error(f"Error obteniendo balance: {e}")
+            logger.error(f"Error obteniendo ranking: {e}")
             return None
 
-    def validate_amount(self, amount: float) -> tuple[bool, str]:
-        if amount < MIN_AMOUNT:
-            return False, f"❌ El monto mínimo es {format_currency(MIN_AMOUNT)}."
-        if amount > MAX_AMOUNT:
-            return False, f"❌ El monto máximo es {format_currency(MAX_AMOUNT)}."
+    def validate_amount(self, amount: float, guild_id: int) -> tuple[bool, str]:
+        # Límites configurables por servidor (monto_minimo / monto_maximo)
+        min_amount = database.config.get(guild_id, "monto_minimo")
+        max_amount = database.config.get(guild_id, "monto_maximo")
+        if amount < min_amount:
+            return False, f"❌ El monto mínimo es {format_currency(min_amount)}."
+        if amount > max_amount:
+            return False, f"❌ El monto máximo es {format_currency(max_amount)}."
         return True, ""
 
     @commands.command(name="banco")
     async def banco(self, ctx):
-        guild_id = str(ctx.guild.id)
-        user_id = str(ctx.author.id)
-
-        if not await self.ensure_user(user_id, guild_id):
-            await ctx.send("❌ Error al acceder a la base de datos.")
-            return
+        guild_id = ctx.guild.id
+        user_id = ctx.author.id
 
         balance = await self.get_balance(user_id, guild_id)
         if balance is None:
@@ -94,6 +70,8 @@ class Economia(commands.Cog):
             description=f"{ctx.author.mention}, tienes:\n\n```{format_currency(balance)}```",
             color=discord.Color.blue()
         )
+        if rank := await self.get_rank(user_id, guild_id):
+            embed.add_field(name="🏅 Ranking", value=format_rank(*rank))
         await ctx.send(embed=embed)
 
     @commands.command(name="dar")
@@ -106,40 +84,20 @@ class Economia(commands.Cog):
             await ctx.send("❌ No puedes dar dinero a un bot.")
             return
 
-        valid, error_msg = self.validate_amount(amount)
+        valid, error_msg = self.validate_amount(amount, ctx.guild.id)
         if not valid:
             await ctx.send(error_msg)
             return
 
-        guild_id = str(ctx.guild.id)
-        sender_id = str(ctx.author.id)
-        receiver_id = str(member.id)
-
-        if not await self.ensure_user(sender_id, guild_id):
-            await ctx.send("❌ Error al acceder a la base de datos.")
-            return
-        if not await self.ensure_user(receiver_id, guild_id):
-            await ctx.send("❌ Error al acceder a la base de datos.")
-            return
+        guild_id = ctx.guild.id
+        sender_id = ctx.author.id
+        receiver_id = member.id
 
         try:
-            async with get_connection() as conn:
-                async with conn.transaction():
-                    sender = await conn.fetchrow("""
-                        SELECT balance FROM euros WHERE user_id = $1 AND guild_id = $2;
-                    """, sender_id, guild_id)
-
-                    if not sender or sender["balance"] < amount:
-                        await ctx.send(f"❌ No tienes suficiente dinero. Balance actual:\n```{format_currency(sender['balance'] if sender else 0)}```")
-                        return
-
-                    await conn.execute("""
-                        UPDATE euros SET balance = balance - $1 WHERE user_id = $2 AND guild_id = $3;
-                    """, amount, sender_id, guild_id)
-
-                    await conn.execute("""
-                        UPDATE euros SET balance = balance + $1 WHERE user_id = $2 AND guild_id = $3;
-                    """, amount, receiver_id, guild_id)
+            result = await database.transferir_euros(sender_id, receiver_id, guild_id, amount)
+            if not result["ok"]:
+                await ctx.send(f"❌ No tienes suficiente dinero. Balance actual:\n```{format_currency(result['sender_balance'])}```")
+                return
 
             embed = discord.Embed(
                 title="Transferencia Exitosa",
@@ -154,41 +112,20 @@ class Economia(commands.Cog):
 
     @commands.command(name="top")
     async def top(self, ctx, limit: int = 10):
+        """Ranking de balances paginado (`limit` = filas por página)."""
         if limit < 1 or limit > 20:
             await ctx.send("❌ El límite debe estar entre 1 y 20.")
             return
 
-        guild_id = str(ctx.guild.id)
-
         try:
-            async with get_connection() as conn:
-                rows = await conn.fetch("""
-                    SELECT user_id, balance FROM euros
-                    WHERE guild_id = $1 AND balance > 0
-                    ORDER BY balance DESC
-                    LIMIT $2;
-                """, guild_id, limit)
-
-            if not rows:
+            pagina = await ranking_banco.primera(ctx.guild, limit)
+
+            if pagina is None:
                 await ctx.send("🏦 No hay usuarios en el ranking aún.")
                 return
 
-            description = ""
-            medals = ["🥇", "🥈", "🥉"]
-
-            for i, row in enumerate(rows, start=1):
-                user = ctx.guild.get_member(int(row["user_id"]))
-                name = user.display_name if user else "Usuario desconocido"
-                medal = medals[i-1] if i <= 3 else f"**#{i}**"
-                description += f"{medal} {name} — ```{format_currency(row['balance'])}```\n"
-
-            embed = discord.Embed(
-                title=f"Top {len(rows)} - Banco del Servidor",
-                description=description,
-                color=discord.Color.gold()
-            )
-            embed.set_footer(text=f"Solicitado por {ctx.author.display_name}")
-            await ctx.send(embed=embed)
+            embed, view = pagina
+            await ctx.send(embed=embed, view=view)
 
         except Exception as e:
             logger.error(f"Error en comando top: {e}")
@@ -197,12 +134,8 @@ class Economia(commands.Cog):
     @commands.command(name="cuenta")
     async def cuenta(self, ctx, member: discord.Member = None):
         target = member or ctx.author
-        guild_id = str(ctx.guild.id)
-        user_id = str(target.id)
-
-        if not await self.ensure_user(user_id, guild_id):
-            await ctx.send("❌ Error al acceder a la base de datos.")
-            return
+        guild_id = ctx.guild.id
+        user_id = target.id
 
         balance = await self.get_balance(user_id, guild_id)
         if balance is None:
@@ -214,34 +147,31 @@ class Economia(commands.Cog):
             description=f"{target.mention} tiene:\n\n```{format_currency(balance)}```",
             color=discord.Color.blue()
         )
+        if rank := await self.get_rank(user_id, guild_id):
+            embed.add_field(name="🏅 Ranking", value=format_rank(*rank))
         await ctx.send(embed=embed)
     
     @commands.command(name="adde")
     @commands.has_permissions(administrator=True)
     async def adde(self, ctx, member: discord.Member, amount: float):
         """Agrega euros a un usuario (solo admins)."""
-        valid, error_msg = self.validate_amount(amount)
+        valid, error_msg = self.validate_amount(amount, ctx.guild.id)
         if not valid:
             await ctx.send(error_msg)
             return
 
-        guild_id = str(ctx.guild.id)
-        user_id = str(member.id)
-
-        if not await self.ensure_user(user_id, guild_id):
-            await ctx.send("❌ Error al acceder a la base de datos.")
-            return
+        guild_id = ctx.guild.id
+        user_id = member.id
 
         try:
-            async with get_connection() as conn:
-                await conn.execute("""
-                    UPDATE euros
-                    SET balance = balance + $1
-                    WHERE user_id = $2 AND guild_id = $3;
-                """, amount, user_id, guild_id)
+            balance = await database.acreditar_euros(user_id, guild_id, amount, motivo="adde")
+            database.auditar(guild_id, ctx.author.id, "adde", user_id, amount, balance)
+            logger.info("Euros añadidos por un admin", extra={
+                "accion": "adde", "guild_id": guild_id, "actor_id": ctx.author.id,
+                "target_id": user_id, "monto": amount,
+            })
 
             await ctx.send(f"Se añadieron {amount:,.2f}€ a {member.mention}.")
-            logger.info(f"Admin {ctx.author.id} añadió {amount} a {member.id} en guild {guild_id}")
 
         except Exception as e:
             logger.error(f"Error en comando adde: {e}")
@@ -252,36 +182,24 @@ class Economia(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def removee(self, ctx, member: discord.Member, amount: float):
         """Remueve euros de un usuario (solo admins)."""
-        valid, error_msg = self.validate_amount(amount)
+        valid, error_msg = self.validate_amount(amount, ctx.guild.id)
         if not valid:
             await ctx.send(error_msg)
             return
 
-        guild_id = str(ctx.guild.id)
-        user_id = str(member.id)
-
-        if not await self.ensure_user(user_id, guild_id):
-            await ctx.send("❌ Error al acceder a la base de datos.")
-            return
+        guild_id = ctx.guild.id
+        user_id = member.id
 
         try:
-            async with get_connection() as conn:
-                current_balance = await self.get_balance(user_id, guild_id)
-                if current_balance is None:
-                    await ctx.send("❌ Error al obtener el balance del usuario.")
-                    return
-
-                new_balance = max(0, current_balance - amount)
-                actual_removed = current_balance - new_balance
-
-                await conn.execute("""
-                    UPDATE euros
-                    SET balance = $1
-                    WHERE user_id = $2 AND guild_id = $3;
-                """, new_balance, user_id, guild_id)
+            actual_removed, balance = await database.quitar_euros(user_id, guild_id, amount, motivo="removee")
+            database.auditar(guild_id, ctx.author.id, "removee", user_id, actual_removed, balance,
+                             solicitado=amount)
+            logger.info("Euros removidos por un admin", extra={
+                "accion": "removee", "guild_id": guild_id, "actor_id": ctx.author.id,
+                "target_id": user_id, "monto": actual_removed,
+            })
 
             await ctx.send(f"Se removieron {actual_removed:,.2f}€ de {member.mention}.")
-            logger.info(f"Admin {ctx.author.id} removió {actual_removed} de {member.id} en guild {guild_id}")
 
         except Exception as e:
             logger.error(f"Error en comando removee: {e}")
@@ -292,7 +210,7 @@ class Economia(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def reset_economia(self, ctx):
         """Resetea toda la economía del servidor (solo admins)."""
-        guild_id = str(ctx.guild.id)
+        guild_id = ctx.guild.id
 
         embed = discord.Embed(
             title="⚠️ Confirmación Requerida",
@@ -311,13 +229,15 @@ class Economia(commands.Cog):
             reaction, user = await self.bot.wait_for("reaction_add", timeout=30.0, check=check)
 
             if str(reaction.emoji) == "✅":
-                async with get_connection() as conn:
-                    await conn.execute("""
-                        DELETE FROM euros WHERE guild_id = $1;
-                    """, guild_id)
+                borrado = await database.reset_euros(guild_id)
+                database.auditar(guild_id, ctx.author.id, "reset_economia", monto=borrado["total"],
+                                 cuentas=borrado["cuentas"])
+                logger.info("Economía reseteada por un admin", extra={
+                    "accion": "reset_economia", "guild_id": guild_id, "actor_id": ctx.author.id,
+                    "cuentas": borrado["cuentas"], "monto": borrado["total"],
+                })
 
                 await ctx.send("Economía del servidor reseteada exitosamente.")
-                logger.info(f"Admin {ctx.author.id} reseteó la economía del guild {guild_id}")
 
             else:
                 await ctx.send("Operación cancelada.")
@@ -326,6 +246,72 @@ class Economia(commands.Cog):
             logger.error(f"Error en reset_economia: {e}")
             await ctx.send("❌ Error al resetear la economía.")
 
+    @commands.command(name="auditoria")
+    @commands.has_permissions(administrator=True)
+    async def auditoria(self, ctx, member: Optional[discord.Member] = None, limite: int = 15):
+        """Últimas acciones de admins sobre el dinero del servidor o de un usuario."""
+        limite = max(1, min(limite, 30))
+        try:
+            registros = await database.get_auditoria(ctx.guild.id, member.id if member else None, limite)
+        except Exception as e:
+            logger.error(f"Error en auditoria: {e}")
+            await ctx.send("❌ Error al consultar la auditoría.")
+            return
+
+        if not registros:
+            await ctx.send("📭 No hay acciones registradas.")
+            return
+
+        lineas = []
+        for r in registros:
+            objetivo = f" → <@{r['target_id']}>" if r["target_id"] else ""
+            monto = f" **{format_currency(r['monto'])}**" if r["monto"] is not None else ""
+            saldo = f" (saldo {format_currency(r['saldo'])})" if r["saldo"] is not None else ""
+            lineas.append(f"<t:{int(r['ts'].timestamp())}:f> `{r['accion']}` por <@{r['actor_id']}>{objetivo}{monto}{saldo}")
+
+        embed = discord.Embed(
+            title="📜 Auditoría de economía" + (f" — {member.display_name}" if member else ""),
+            description="\n".join(lineas)[:4000],
+            color=discord.Color.dark_gold()
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="historial")
+    async def historial(self, ctx, member: Optional[discord.Member] = None, limite: int = 15):
+        """Últimos movimientos de euros propios (o de otro usuario, solo admins)."""
+        member = member or ctx.author
+        if member != ctx.author and not ctx.author.guild_permissions.administrator:
+            await ctx.send("❌ Solo los admins pueden ver el historial de otros usuarios.")
+            return
+        limite = max(1, min(limite, 30))
+        try:
+            movimientos = await database.get_historial(ctx.guild.id, member.id, limite)
+        except Exception as e:
+            logger.error(f"Error en historial: {e}")
+            await ctx.send("❌ Error al consultar el historial.")
+            return
+
+        if not movimientos:
+            await ctx.send("📭 No hay movimientos registrados.")
+            return
+
+        lineas = []
+        for m in movimientos:
+            signo = "+" if m["delta"] >= 0 else "−"
+            detalle = f" con <@{m['contraparte']}>" if m["contraparte"] else ""
+            detalle += f" ({m['ref']})" if m["ref"] else ""
+            saldo = f" → {format_currency(m['saldo'])}" if m["saldo"] is not None else ""
+            lineas.append(f"<t:{int(m['ts'].timestamp())}:f> `{m['motivo']}`{detalle} "
+                          f"**{signo}{format_currency(abs(m['delta']))}**{saldo}")
+
+        embed = discord.Embed(
+            title=f"🧾 Historial de {member.display_name}",
+            description="\n".join(lineas)[:4000],
+            color=discord.Color.gold()
+        )
+        await ctx.send(embed=embed)
+
 
 async def setup(bot):
-    await bot.add_cog(Economia(bot))
\ No newline at end of file
+    await bot.add_cog(Economia(bot))
+    bot.add_dynamic_items(RankingButton)  # Botones de paginación persistentes
\ No newline at end of file
@@ -2,11 +2,9 @@ import discord
 from discord.ext import commands
 from datetime import datetime, timezone
 import asyncio
+from database import config
 from views.role_buttons import RoleButtonView, VerificacionView, VerAvisosView
 
-BUMPER_ROLE_ID = 1392903420020658196
-RESEÑADOR_ROLE_ID = 1394444010436956316
-
 class EmbedCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -121,7 +119,7 @@ class EmbedCommands(commands.Cog):
             timestamp=datetime.now(timezone.utc)
         )
         embed.set_footer(text="1€Bot • Sistema de Bumps")
-        await ctx.send(embed=embed, view=RoleButtonView(BUMPER_ROLE_ID))
+        await ctx.send(embed=embed, view=RoleButtonView(config.get(ctx.guild.id, "rol_bump")))
 
     @commands.command(name='eresenas')
     @commands.has_permissions(administrator=True)
@@ -141,7 +139,7 @@ class EmbedCommands(commands.Cog):
             color=discord.Color.purple()
         )
         embed.set_footer(text="1€Bot • ¡Participá gratis con reseñas!")
-        await ctx.send(embed=embed, view=RoleButtonView(RESEÑADOR_ROLE_ID))
+        await ctx.send(embed=embed, view=RoleButtonView(config.get(ctx.guild.id, "rol_resenador")))
 
     @commands.command(name="everificacion")
     @commands.has_permissions(administrator=True)
@@ -159,11 +157,10 @@ class EmbedCommands(commands.Cog):
     @commands.command(name="eeconomia")
     @commands.has_permissions(administrator=True)
     async def eeconomia(self, ctx):
-        canal_id = 1395050940486385734
-        canal_destino = ctx.guild.get_channel(canal_id)
+        canal_destino = ctx.guild.get_channel(config.get(ctx.guild.id, "canal_banco"))
 
         if canal_destino is None:
-            await ctx.send("❌ No pude encontrar el canal de economía. Revisá el ID.")
+            await ctx.send("❌ No pude encontrar el canal de economía. Configuralo con `!config canal_banco #canal`.")
             return
 
         embed = discord.Embed(
@@ -174,6 +171,7 @@ class EmbedCommands(commands.Cog):
                 "`!cuenta` - Consulta tu saldo o el de otro usuario.\n"
                 "`!dar @usuario cantidad` - Envía euros a otro usuario.\n"
                 "`!top [n]` - Muestra el ranking de los usuarios con más euros (máx 20).\n"
+                "`!historial [n]` - Muestra tus últimos movimientos de euros.\n"
             ),
             color=discord.Color.green()
         )
@@ -185,15 +183,12 @@ class EmbedCommands(commands.Cog):
     @commands.command(name="eresena")
     @commands.has_permissions(administrator=True)
     async def aviso_resena(self, ctx, cantidad: int = 2): 
-        rol_id_mencion = 1394444010436956316
-        canal_id_aviso = 1394797177351573514
-
-        rol_mencion = ctx.guild.get_role(rol_id_mencion)
-        canal_destino = ctx.guild.get_channel(canal_id_aviso)
+        rol_mencion = ctx.guild.get_role(config.get(ctx.guild.id, "rol_resenador"))
+        canal_destino = ctx.guild.get_channel(config.get(ctx.guild.id, "canal_resenas"))
 
         try:
             if canal_destino is None:
-                await ctx.send("❌ No pude encontrar el canal de avisos. Revisá el ID.")
+                await ctx.send("❌ No pude encontrar el canal de avisos. Configuralo con `!config canal_resenas #canal`.")
                 return
 
             embed = discord.Embed(
@@ -218,11 +213,8 @@ class EmbedCommands(commands.Cog):
     @commands.command(name="aviso")
     @commands.has_permissions(administrator=True)
     async def aviso(self, ctx):
-        rol_id_mencion = 1394757542919540776
-        canal_id_aviso = 1391833217815941253
-
-        rol_mencion = ctx.guild.get_role(rol_id_mencion)
-        canal_destino = ctx.guild.get_channel(canal_id_aviso)
+        rol_mencion = ctx.guild.get_role(config.get(ctx.guild.id, "rol_avisos"))
+        canal_destino = ctx.guild.get_channel(config.get(ctx.guild.id, "canal_avisos"))
 
         def check(m):
             return m.author == ctx.author and m.channel == ctx.channel
@@ -230,7 +222,7 @@ class EmbedCommands(commands.Cog):
         try:
             # Verificar si el canal existe antes de continuar
             if canal_destino is None:
-                await ctx.send("❌ No pude encontrar el canal de avisos. Revisá el ID.")
+                await ctx.send("❌ No pude encontrar el canal de avisos. Configuralo con `!config canal_avisos #canal`.")
                 return
 
             await ctx.send("📌 ¿Cuál es el **título** del aviso?")
@@ -267,15 +259,14 @@ class EmbedCommands(commands.Cog):
     @commands.command(name='efuncionamiento')
     @commands.has_permissions(administrator=True)
     async def canal_funcionamiento(self, ctx):
-        # Reemplazá estos IDs por los reales
-        canal_banco_id = 1395050940486385734  # 💸-banco
-        canal_tienda_id = 1395783024662024223  # 🛒-tienda
-        canal_resenas_id = 1394797177351573514  # 📝-reseñas
+        # Referencias de canales (configurables con !config)
+        canal_banco = ctx.guild.get_channel(config.get(ctx.guild.id, "canal_banco"))
+        canal_tienda = ctx.guild.get_channel(config.get(ctx.guild.id, "canal_tienda"))
+        canal_resenas = ctx.guild.get_channel(config.get(ctx.guild.id, "canal_resenas"))
 
-        # Referencias de canales
-        canal_banco = ctx.guild.get_channel(canal_banco_id)
-        canal_tienda = ctx.guild.get_channel(canal_tienda_id)
-        canal_resenas = ctx.guild.get_channel(canal_resenas_id)
+        if None in (canal_banco, canal_tienda, canal_resenas):
+            await ctx.send("❌ Faltan canales por configurar: `canal_banco`, `canal_tienda` y `canal_resenas`.")
+            return
 
         embed = discord.Embed(
             title="💸 𝑭𝑼𝑵𝑪𝑰𝑶𝑵𝑨𝑴𝑰𝑬𝑵𝑻𝑶 – Economía del Servidor",
@@ -346,16 +337,14 @@ class EmbedCommands(commands.Cog):
     @commands.command(name="partner")
     @commands.has_permissions(administrator=True)
     async def partner(self, ctx):
-        canal_id_partner = 1399434651428323399
-
-        canal_destino = ctx.guild.get_channel(canal_id_partner)
+        canal_destino = ctx.guild.get_channel(config.get(ctx.guild.id, "canal_partners"))
 
         def check(m):
             return m.author == ctx.author and m.channel == ctx.channel
 
         try:
             if canal_destino is None:
-                await ctx.send("❌ No pude encontrar el canal de partners. Revisá el ID.")
+                await ctx.send("❌ No pude encontrar el canal de partners. Configuralo con `!config canal_partners #canal`.")
                 return
 
             await ctx.send("💬 Dime el contenido del partner:")
@@ -0,0 +1,159 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Iterator, Optional
+
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_RECORD = os.getenv("GATEWAY_RECORD")  # ruta del .jsonl.gz; sin definir = no se graba
+GATEWAY_RECORD_MAX = int(os.getenv("GATEWAY_RECORD_MAX", "200000"))  # eventos, luego se detiene
+
+FORMATO = 1
+FLUSH_INTERVAL = 1.0
+
+# Lo que hace falta para reproducir el tráfico de los cogs: el estado de los
+# servidores (GUILD_CREATE) y los eventos que lo generan.
+EVENTOS = frozenset({
+    "READY",
+    "GUILD_CREATE",
+    "GUILD_MEMBER_ADD",
+    "GUILD_MEMBER_REMOVE",
+    "MESSAGE_CREATE",
+    "MESSAGE_UPDATE",
+    "MESSAGE_DELETE",
+    "MESSAGE_DELETE_BULK",
+    "MESSAGE_REACTION_ADD",
+    "MESSAGE_REACTION_REMOVE",
+    "INTERACTION_CREATE",
+})
+
+
+def _compactar(evento: str, data: dict, self_id: Optional[int]) -> dict:
+    """Quita lo que el replay no usa (y el token de las interacciones)."""
+    if evento == "READY":
+        return {"user": data["user"], "application": data.get("application")}
+    if evento == "GUILD_CREATE":
+        data = {k: v for k, v in data.items() if k not in ("presences", "voice_states")}
+        # Los miembros llegan con cada mensaje; sólo se guarda el propio bot (guild.me)
+        data["members"] = [m for m in data.get("members", []) if int(m["user"]["id"]) == self_id]
+        return data
+    if evento == "INTERACTION_CREATE":
+        return {**data, "token": "grabado"}
+    return data
+
+
+class GatewayRecorder:
+    """Graba los eventos del gateway en un JSON lines comprimido.
+
+    Escucha `on_socket_raw_receive`, que discord.py sólo emite si el bot se
+    creó con `enable_debug_events=True` (main.py lo activa con GATEWAY_RECORD).
+    Cada línea es {"t": segundos desde el inicio, "e": evento, "d": payload}.
+    La escritura va a un hilo una vez por segundo. El archivo contiene el
+    contenido de los mensajes: no debe salir del servidor.
+    """
+
+    def __init__(self, path: str, max_events: int = GATEWAY_RECORD_MAX) -> None:
+        self.path = path
+        self.max_events = max_events
+        self.events = 0
+        self._bot: Optional[commands.Bot] = None
+        self._lineas: list[str] = []
+        self._inicio = time.monotonic()
+        self._self_id: Optional[int] = None
+        self._file = None
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, bot: commands.Bot) -> None:
+        self._bot = bot
+        bot.add_listener(self._on_socket_raw_receive, "on_socket_raw_receive")
+
+    def detach(self) -> None:
+        if self._bot is not None:
+            self._bot.remove_listener(self._on_socket_raw_receive, "on_socket_raw_receive")
+            self._bot = None
+
+    async def _on_socket_raw_receive(self, msg) -> None:
+        if self._bot is None:
+            return  # ya se completó la grabación
+        try:
+            payload = json.loads(msg)
+        except ValueError:
+            return
+        evento = payload.get("t")
+        if payload.get("op") == 0 and evento in EVENTOS:
+            self._grabar(evento, payload["d"])
+
+    def _grabar(self, evento: str, data: dict) -> None:
+        if evento == "READY":
+            self._self_id = int(data["user"]["id"])
+        try:
+            linea = json.dumps({
+                "t": round(time.monotonic() - self._inicio, 4),
+                "e": evento,
+                "d": _compactar(evento, data, self._self_id),
+            }, separators=(",", ":"))
+        except (TypeError, KeyError, ValueError) as e:
+            logger.warning(f"No se pudo grabar {evento}: {e}")
+            return
+        self._lineas.append(linea)
+        self.events += 1
+        if self.events >= self.max_events:
+            logger.info(f"Grabación del gateway completa ({self.events} eventos): {self.path}")
+            self.detach()
+
+    # ───────────── Escritura ─────────────
+    def _escribir(self, lineas: list[str]) -> None:
+        if self._file is None:
+            self._file = gzip.open(self.path, "wt", encoding="utf-8")
+            self._file.write(json.dumps({"formato": FORMATO, "inicio": time.time()}) + "\n")
+        self._file.write("\n".join(lineas) + "\n")
+
+    async def flush(self) -> None:
+        if not self._lineas:
+            return
+        lineas, self._lineas = self._lineas, []
+        await asyncio.to_thread(self._escribir, lineas)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Grabando eventos del gateway en {self.path}")
+
+    async def close(self) -> None:
+        self.detach()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except OSError as e:
+                logger.error(f"Error escribiendo la grabación del gateway: {e}")
+
+
+def read_events(path: str) -> Iterator[tuple[float, str, dict]]:
+    """(t, evento, payload) de una grabación, en orden."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for linea in f:
+            registro = json.loads(linea)
+            if "formato" in registro:
+                if registro["formato"] != FORMATO:
+                    raise ValueError(f"Formato de grabación no soportado: {registro['formato']}")
+                continue
+            yield registro["t"], registro["e"], registro["d"]
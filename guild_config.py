@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import re
+from typing import Any, Callable, NamedTuple, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+CANAL_NOTIFY = "guild_config"  # NOTIFY con el guild_id cuando cambia su configuración
+
+
+class Clave(NamedTuple):
+    tipo: str        # "canal", "rol" o "monto"
+    default: Any     # valor del servidor original, mientras no se configure
+    descripcion: str
+
+
+CLAVES: dict[str, Clave] = {
+    "canal_bumps":     Clave("canal", 1392893710848622734, "Canal donde se hace /bump"),
+    "canal_comandos":  Clave("canal", 1392893710848622734, "Canal de !misbumps"),
+    "canal_banco":     Clave("canal", 1395050940486385734, "Canal de economía"),
+    "canal_tienda":    Clave("canal", 1395783024662024223, "Canal de la tienda"),
+    "canal_resenas":   Clave("canal", 1394797177351573514, "Canal de avisos de reseñas"),
+    "canal_avisos":    Clave("canal", 1391833217815941253, "Canal de avisos del staff"),
+    "canal_partners":  Clave("canal", 1399434651428323399, "Canal de partners"),
+    "rol_bump":        Clave("rol", 1392903420020658196, "Rol que recibe los recordatorios de bump"),
+    "rol_resenador":   Clave("rol", 1394444010436956316, "Rol de reseñadores"),
+    "rol_entrada":     Clave("rol", 1394791826812043326, "Rol que otorga el objeto entrada"),
+    "rol_verificado":  Clave("rol", 1391832974361886740, "Rol de verificación"),
+    "rol_avisos":      Clave("rol", 1394757542919540776, "Rol de notificaciones"),
+    "monto_minimo":    Clave("monto", 0.01, "Monto mínimo de !dar, !adde y !removee"),
+    "monto_maximo":    Clave("monto", 10.0, "Monto máximo de !dar, !adde y !removee"),
+}
+
+_ID = re.compile(r"^(?:<#|<@&)?(\d{15,20})>?$")
+
+
+def parse_valor(clave: str, texto: str):
+    """Convierte el texto de un comando (o de la base) al tipo de la clave."""
+    tipo = CLAVES[clave].tipo
+    if tipo == "monto":
+        valor = float(texto.replace(",", "."))
+        if valor < 0:
+            raise ValueError("el monto no puede ser negativo")
+        return valor
+    match = _ID.match(texto.strip())
+    if not match:
+        raise ValueError(f"se esperaba una mención o un ID de {tipo}")
+    return int(match.group(1))
+
+
+class GuildConfig:
+    """Configuración por servidor, cacheada entera en memoria.
+
+    Se carga una vez al arrancar y cada lectura es un acceso a diccionario.
+    Los cambios se escriben en `guild_config` y se avisan con NOTIFY, así
+    cualquier proceso que comparta la base recarga sólo ese servidor.
+    """
+
+    def __init__(self, get_pool: Callable[[], asyncpg.Pool]) -> None:
+        self._get_pool = get_pool
+        self._valores: dict[int, dict[str, Any]] = {}
+        self._conn: Optional[asyncpg.Connection] = None
+        self._shards: tuple[Optional[int], Optional[list[int]]] = (None, None)
+        self._tasks: set[asyncio.Task] = set()  # recargas disparadas por NOTIFY
+
+    def get(self, guild_id: int, clave: str):
+        guild = self._valores.get(guild_id)
+        if guild is not None and clave in guild:
+            return guild[clave]
+        return CLAVES[clave].default
+
+    def overrides(self, guild_id: int) -> dict[str, Any]:
+        return dict(self._valores.get(guild_id, {}))
+
+    def _parse_rows(self, rows) -> dict[int, dict[str, Any]]:
+        valores: dict[int, dict[str, Any]] = {}
+        for row in rows:
+            if row["clave"] not in CLAVES:
+                continue  # clave retirada del código
+            try:
+                valor = parse_valor(row["clave"], row["valor"])
+            except ValueError:
+                logger.warning(f"Valor inválido en guild_config: {row['guild_id']} {row['clave']}={row['valor']!r}")
+                continue
+            valores.setdefault(row["guild_id"], {})[row["clave"]] = valor
+        return valores
+
+    def _is_local(self, guild_id: int) -> bool:
+        shard_count, shard_ids = self._shards
+        return shard_count is None or (guild_id >> 22) % shard_count in shard_ids
+
+    async def load_all(self, shard_count: Optional[int] = None,
+                       shard_ids: Optional[list[int]] = None) -> None:
+        """Carga todo; con `shard_count`/`shard_ids`, sólo los servidores de esas shards."""
+        self._shards = (shard_count, shard_ids)
+        rows = await self._get_pool().fetch('''
+            SELECT guild_id, clave, valor FROM guild_config
+            WHERE $1::int IS NULL OR ((guild_id >> 22) % $1) = ANY($2::int[]);
+        ''', shard_count, shard_ids)
+        self._valores = self._parse_rows(rows)
+
+    async def refresh(self, guild_id: int) -> None:
+        rows = await self._get_pool().fetch(
+            "SELECT guild_id, clave, valor FROM guild_config WHERE guild_id = $1", guild_id
+        )
+        self._valores[guild_id] = self._parse_rows(rows).get(guild_id, {})
+
+    def validar(self, guild_id: int, clave: str, valor) -> None:
+        """ValueError si el cambio deja monto_minimo por encima de monto_maximo."""
+        if clave not in ("monto_minimo", "monto_maximo"):
+            return
+        minimo = valor if clave == "monto_minimo" else self.get(guild_id, "monto_minimo")
+        maximo = valor if clave == "monto_maximo" else self.get(guild_id, "monto_maximo")
+        if minimo > maximo:
+            raise ValueError(f"monto_minimo ({minimo:g}) no puede superar a monto_maximo ({maximo:g})")
+
+    async def set(self, guild_id: int, clave: str, valor) -> None:
+        self.validar(guild_id, clave, valor)
+        await self._get_pool().execute(f'''
+            WITH cambio AS (
+                INSERT INTO guild_config (guild_id, clave, valor)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (guild_id, clave) DO UPDATE SET valor = EXCLUDED.valor
+                RETURNING guild_id
+            )
+            SELECT pg_notify('{CANAL_NOTIFY}', guild_id::text) FROM cambio;
+        ''', guild_id, clave, str(valor))
+        self._valores.setdefault(guild_id, {})[clave] = valor
+
+    async def reset(self, guild_id: int, clave: str) -> None:
+        self.validar(guild_id, clave, CLAVES[clave].default)
+        await self._get_pool().execute(f'''
+            WITH cambio AS (
+                DELETE FROM guild_config WHERE guild_id = $1 AND clave = $2
+                RETURNING guild_id
+            )
+            SELECT pg_notify('{CANAL_NOTIFY}', guild_id::text) FROM cambio;
+        ''', guild_id, clave)
+        self._valores.get(guild_id, {}).pop(clave, None)
+
+    # ───────────── Cambios hechos por otros procesos ─────────────
+    async def listen(self) -> None:
+        if self._conn is None:
+            self._conn = await self._get_pool().acquire()
+            await self._conn.add_listener(CANAL_NOTIFY, self._on_notify)
+
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        guild_id = int(payload)
+        if self._is_local(guild_id):
+            task = asyncio.get_running_loop().create_task(self.refresh(guild_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error recargando la configuración: {task.exception()}")
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await conn.remove_listener(CANAL_NOTIFY, self._on_notify)
+            await self._get_pool().release(conn)
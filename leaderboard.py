@@ -0,0 +1,150 @@
+import asyncio
+import math
+from typing import Awaitable, Callable, Hashable, Optional, Union
+
+from sortedcontainers import SortedList
+
+Number = Union[int, float]
+
+
+class GuildBoard:
+    """Ranking ordenado de un servidor, de mayor a menor puntaje.
+
+    Se guarda como SortedList de (-puntaje, user_id): actualizar y ubicar a un
+    usuario cuestan O(log n) y el top-k es un slice.
+    """
+
+    def __init__(self, scores: dict[Hashable, Number]) -> None:
+        self._scores = dict(scores)
+        self._order = SortedList((-score, uid) for uid, score in self._scores.items())
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def score(self, user_id) -> Optional[Number]:
+        return self._scores.get(user_id)
+
+    def update(self, user_id, score: Number) -> None:
+        self.remove(user_id)
+        self._scores[user_id] = score
+        self._order.add((-score, user_id))
+
+    def remove(self, user_id) -> None:
+        old = self._scores.pop(user_id, None)
+        if old is None:
+            return
+        self._order.remove((-old, user_id))
+
+    def top(self, k: int) -> list[tuple[Hashable, Number]]:
+        return [(uid, -neg) for neg, uid in self._order[:k]]
+
+    def count_above(self, score: Number) -> int:
+        """Cuántas entradas tienen un puntaje estrictamente mayor que `score`."""
+        return self._order.bisect_left((-score,))
+
+    # ───────────── Paginación por cursor (keyset) ─────────────
+    # El cursor es (puntaje, user_id) de la primera/última fila de la página
+    # vista: ubicarlo cuesta O(log n) sin importar en qué página se esté.
+    def page_after(self, cursor: Optional[tuple[Number, Hashable]], k: int) -> tuple[int, list]:
+        """(índice inicial, filas) de las k filas que siguen al cursor."""
+        start = 0 if cursor is None else self._order.bisect_right((-cursor[0], cursor[1]))
+        return start, [(uid, -neg) for neg, uid in self._order[start:start + k]]
+
+    def page_before(self, cursor: tuple[Number, Hashable], k: int) -> tuple[int, list]:
+        """(índice inicial, filas) de las k filas anteriores al cursor."""
+        end = self._order.bisect_left((-cursor[0], cursor[1]))
+        start = max(0, end - k)
+        return start, [(uid, -neg) for neg, uid in self._order[start:end]]
+
+    def page_of(self, user_id, k: int) -> Optional[tuple[int, list]]:
+        """(índice inicial, filas) de la página donde está el usuario."""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        start = self._order.bisect_left((-score, user_id)) // k * k
+        return start, [(uid, -neg) for neg, uid in self._order[start:start + k]]
+
+    def rank(self, user_id) -> Optional[tuple[int, int]]:
+        """Devuelve (puesto, total) en O(log n); los empates comparten puesto.
+
+        Como en !top, sólo cuentan los puntajes positivos: sin puntaje no hay puesto.
+        """
+        score = self._scores.get(user_id)
+        if score is None or score <= 0:
+            return None
+        # (-score,) ordena antes que cualquier (-score, uid): primer puesto con ese puntaje
+        return self._order.bisect_left((-score,)) + 1, self.count_above(0)
+
+
+def format_rank(rank: int, total: int) -> str:
+    percentile = max(1, math.ceil(rank * 100 / total))
+    return f"#{rank:,} de {total:,}, top {percentile}%"
+
+
+class Leaderboards:
+    """Rankings por servidor, cargados una vez y mantenidos por los caminos de escritura."""
+
+    def __init__(self, load: Callable[[Hashable], Awaitable[dict[Hashable, Number]]]) -> None:
+        self._load = load
+        self._boards: dict[Hashable, GuildBoard] = {}
+        self._loading: dict[Hashable, asyncio.Future] = {}
+        # Escrituras que llegan mientras el ranking del servidor se está cargando
+        self._early: dict[Hashable, dict[Hashable, Optional[Number]]] = {}
+
+    async def get(self, guild_id) -> GuildBoard:
+        board = self._boards.get(guild_id)
+        if board is not None:
+            return board
+
+        future = self._loading.get(guild_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._loading[guild_id] = future
+            self._early[guild_id] = {}
+            try:
+                board = GuildBoard(await self._load(guild_id))
+            except Exception as e:
+                del self._loading[guild_id]
+                self._early.pop(guild_id, None)
+                future.set_exception(e)
+                future.exception()  # evita el aviso de excepción no recuperada
+                raise
+            early = self._early.pop(guild_id)
+            if guild_id in self._boards:
+                # Se vació con clear_guild() durante la carga: manda ese estado
+                board = self._boards[guild_id]
+            else:
+                for uid, score in early.items():
+                    if score is None:
+                        board.remove(uid)
+                    else:
+                        board.update(uid, score)
+                self._boards[guild_id] = board
+            del self._loading[guild_id]
+            future.set_result(board)
+            return board
+        return await asyncio.shield(future)
+
+    def update(self, guild_id, user_id, score: Number) -> None:
+        if (board := self._boards.get(guild_id)) is not None:
+            board.update(user_id, score)
+        elif guild_id in self._early:
+            self._early[guild_id][user_id] = score
+        # Si el servidor nunca se cargó no hace falta nada: se leerá de la base
+
+    def remove(self, guild_id, user_id) -> None:
+        if (board := self._boards.get(guild_id)) is not None:
+            board.remove(user_id)
+        elif guild_id in self._early:
+            self._early[guild_id][user_id] = None
+
+    def stats(self) -> dict:
+        """Servidores cargados y filas en memoria."""
+        return {
+            "guilds": len(self._boards),
+            "entries": sum(len(board) for board in self._boards.values()),
+        }
+
+    def clear_guild(self, guild_id) -> None:
+        """Deja vacío el ranking de un servidor (p. ej. tras un reset)."""
+        self._boards[guild_id] = GuildBoard({})
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import asyncpg
+
+from write_buffer import BatchWriter, merge_rows
+
+logger = logging.getLogger(__name__)
+
+LEDGER_FLUSH_INTERVAL = float(os.getenv("LEDGER_FLUSH_INTERVAL", "2"))
+LEDGER_RETENTION_MONTHS = int(os.getenv("LEDGER_RETENTION_MONTHS", "12"))  # 0 = no compacta
+LEDGER_MAINTENANCE_INTERVAL = 6 * 3600
+LEDGER_RETRY_INTERVAL = 60  # tras un error (p. ej. la migración todavía no corrió)
+MESES_ADELANTADOS = 2  # particiones creadas por adelantado, además de la del mes en curso
+LOCK_ID = 0x6C656467  # advisory lock de mantenimiento, compartido entre procesos
+
+_PARTICION = re.compile(r"^ledger_p(\d{4})(\d{2})$")
+COLUMNAS = ("ts", "guild_id", "user_id", "delta", "saldo", "motivo", "contraparte", "ref")
+
+
+def _mes(ts: datetime) -> datetime:
+    return datetime(ts.year, ts.month, 1, tzinfo=timezone.utc)
+
+
+def _sumar_meses(mes: datetime, n: int) -> datetime:
+    total = mes.year * 12 + mes.month - 1 + n
+    return datetime(total // 12, total % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _nombre(mes: datetime) -> str:
+    return f"ledger_p{mes.year:04d}{mes.month:02d}"
+
+
+class Ledger:
+    """Libro mayor append-only de los movimientos de euros.
+
+    `registrar` sólo encola la fila (el camino de `!dar` no espera a la
+    base); un BatchWriter las copia en lote con COPY. El saldo vigente sigue
+    siendo la fila de `euros` (lectura O(1), cacheada), y cada movimiento
+    guarda el saldo resultante. Un task de mantenimiento crea las
+    particiones mensuales por adelantado y compacta las que superan la
+    retención: las suma a `ledger_snapshots` y las borra.
+    """
+
+    def __init__(self, get_pool: Callable[[], asyncpg.Pool],
+                 retencion_meses: int = LEDGER_RETENTION_MONTHS) -> None:
+        self._get_pool = get_pool
+        self.retencion_meses = retencion_meses
+        self.buffer = BatchWriter("ledger", self._escribir, LEDGER_FLUSH_INTERVAL,
+                                  threshold=500, max_pending=100000)
+        self._particiones: set[datetime] = set()  # meses con partición ya creada
+        self._task: Optional[asyncio.Task] = None
+
+    # ───────────── Escritura ─────────────
+    def registrar(self, guild_id: int, user_id: int, delta: float, saldo: Optional[float],
+                  motivo: str, contraparte: Optional[int] = None, ref: Optional[str] = None) -> None:
+        """Encola un movimiento; `saldo` es el de la cuenta después de aplicarlo."""
+        self.buffer.add((datetime.now(timezone.utc), guild_id, user_id, float(delta),
+                         saldo, motivo, contraparte, ref))
+
+    async def _escribir(self, batch: list[tuple]) -> None:
+        for mes in {_mes(row[0]) for row in batch}:
+            await self.asegurar_particion(mes)
+        async with self._get_pool().acquire() as conn:
+            await conn.copy_records_to_table("ledger", records=batch, columns=COLUMNAS)
+
+    async def flush(self) -> None:
+        await self.buffer.flush()
+
+    # ───────────── Lectura ─────────────
+    async def historial(self, guild_id: int, user_id: int, limite: int = 15) -> list:
+        """Últimos movimientos de una cuenta, del más nuevo al más viejo (por índice).
+
+        Lo encolado y todavía no escrito se mezcla en memoria, sin forzar un flush.
+        """
+        pendientes = [
+            dict(zip(COLUMNAS, row))
+            for row in self.buffer.unwritten(lambda row: row[1] == guild_id and row[2] == user_id)
+        ]
+        rows = await self._get_pool().fetch('''
+            SELECT ts, delta, saldo, motivo, contraparte, ref
+            FROM ledger
+            WHERE guild_id = $1 AND user_id = $2
+            ORDER BY ts DESC
+            LIMIT $3;
+        ''', guild_id, user_id, limite)
+        return merge_rows(rows, pendientes, ("ts", "delta", "motivo", "contraparte", "ref"), limite)
+
+    # ───────────── Particiones y compactación ─────────────
+    async def asegurar_particion(self, mes: datetime) -> None:
+        """Crea la partición del mes de `mes` si falta (idempotente entre procesos)."""
+        mes = _mes(mes)
+        if mes in self._particiones:
+            return
+        nombre = _nombre(mes)
+        async with self._get_pool().acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", LOCK_ID)
+                await conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {nombre} PARTITION OF ledger "
+                    f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{_sumar_meses(mes, 1).isoformat()}')"
+                )
+        self._particiones.add(mes)
+
+    async def _particiones_existentes(self, conn) -> list[tuple[datetime, str]]:
+        rows = await conn.fetch('''
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'ledger'::regclass;
+        ''')
+        particiones = []
+        for row in rows:
+            match = _PARTICION.match(row["relname"])
+            if match:
+                mes = datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+                particiones.append((mes, row["relname"]))
+        return sorted(particiones)
+
+    async def compactar(self, ahora: Optional[datetime] = None) -> list[str]:
+        """Suma a los snapshots las particiones fuera de la retención y las borra.
+
+        Cada partición se compacta en su propia transacción; si otro proceso
+        ya está compactando no hace nada. Devuelve las particiones borradas.
+        """
+        if self.retencion_meses <= 0:
+            return []
+        limite = _sumar_meses(_mes(ahora or datetime.now(timezone.utc)), -self.retencion_meses)
+        borradas = []
+        async with self._get_pool().acquire() as conn:
+            for mes, nombre in await self._particiones_existentes(conn):
+                if mes >= limite:
+                    break
+                hasta = _sumar_meses(mes, 1)
+                async with conn.transaction():
+                    if not await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", LOCK_ID):
+                        break
+                    await conn.execute(f'''
+                        INSERT INTO ledger_snapshots (guild_id, user_id, saldo, hasta)
+                        SELECT guild_id, user_id, sum(delta), $1 FROM {nombre}
+                        GROUP BY guild_id, user_id
+                        ON CONFLICT (guild_id, user_id)
+                        DO UPDATE SET saldo = ledger_snapshots.saldo + EXCLUDED.saldo,
+                                      hasta = EXCLUDED.hasta;
+                    ''', hasta)
+                    await conn.execute(f"DROP TABLE {nombre}")
+                self._particiones.discard(mes)
+                borradas.append(nombre)
+                logger.info(f"Ledger: partición {nombre} compactada en ledger_snapshots")
+        return borradas
+
+    async def mantenimiento(self) -> None:
+        mes = _mes(datetime.now(timezone.utc))
+        for n in range(MESES_ADELANTADOS + 1):
+            await self.asegurar_particion(_sumar_meses(mes, n))
+        await self.compactar()
+
+    # ───────────── Ciclo de vida ─────────────
+    def start(self) -> None:
+        self.buffer.start()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.buffer.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.mantenimiento()
+            except Exception as e:
+                logger.error(f"Error en el mantenimiento del ledger: {e}")
+                await asyncio.sleep(LEDGER_RETRY_INTERVAL)
+            else:
+                await asyncio.sleep(LEDGER_MAINTENANCE_INTERVAL)
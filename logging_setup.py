@@ -0,0 +1,81 @@
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" o "text"
+LOG_FILE = os.getenv("LOG_FILE")              # además de stderr
+
+# Atributos propios de LogRecord; el resto son campos pasados con `extra=`
+_ESTANDAR = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro: ts, level, logger, msg, los campos de `extra` y exc."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ESTANDAR and not clave.startswith("_"):
+                data[clave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = record.stack_info
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # El mensaje se arma acá (los args podrían cambiar después) pero el
+        # formato final lo aplica el hilo del listener; la excepción viaja
+        # como texto porque el traceback retiene frames vivos.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: str = LOG_LEVEL, formato: str = LOG_FORMAT,
+                  archivo: Optional[str] = LOG_FILE) -> logging.handlers.QueueListener:
+    """Deja al logger raíz encolando registros; un hilo los formatea y escribe.
+
+    Desde el event loop loguear es sólo un `put` en una cola. Devuelve el
+    listener, que hay que detener al salir para escribir lo que quede.
+    """
+    if formato == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    handlers: list[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+    if archivo:
+        handlers.append(logging.handlers.WatchedFileHandler(archivo, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    cola: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(cola))
+    root.setLevel(level.upper())
+
+    listener = logging.handlers.QueueListener(cola, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,171 @@
+import asyncio
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Iterator, NamedTuple, Optional
+
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))    # segundos entre muestras
+LOOP_BLOCK_MS = float(os.getenv("LOOP_BLOCK_MS", "250"))             # bloqueo a partir del cual se captura el stack
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "0") == "1"                     # modo debug de asyncio (caro)
+VENTANA = 60.0          # segundos de muestras que se guardan
+MAX_BLOQUEOS = 20
+STACK_LIMIT = 30
+LIBRERIAS = frozenset({"asyncio", "discord", "aiohttp", "asyncpg"})
+
+
+class Bloqueo(NamedTuple):
+    inicio: float       # time.time()
+    duracion: float     # segundos (mínimo conocido si todavía no terminó)
+    tarea: str
+    stack: str
+
+
+class LoopWatchdog:
+    """Mide el lag del event loop y captura qué lo bloquea.
+
+    Un hilo aparte le manda un ping al loop cada `intervalo` con
+    `call_soon_threadsafe`; lo que tarda en atenderse es el lag. Si un ping
+    lleva más de `umbral_ms` sin respuesta, el hilo toma el stack del hilo
+    del loop (`sys._current_frames`), que es justamente el código que no
+    suelta el loop, y lo loguea junto con la corrutina de más afuera de ese
+    stack (la que ejecuta la tarea).
+    """
+
+    def __init__(self, intervalo: float = LOOP_LAG_INTERVAL, umbral_ms: float = LOOP_BLOCK_MS,
+                 debug: bool = LOOP_DEBUG) -> None:
+        self.intervalo = intervalo
+        self.umbral = umbral_ms / 1000
+        self.debug = debug
+        self.muestras: deque[tuple[float, float]] = deque()  # (monotonic, lag)
+        self.bloqueos: deque[Bloqueo] = deque(maxlen=MAX_BLOQUEOS)
+        self.total_bloqueos = 0
+        self.max_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._ping: Optional[float] = None     # envío del ping pendiente
+        self._capturado: Optional[Bloqueo] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ───────────── Ciclo de vida ─────────────
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if self.debug:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.umbral
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._vigilar, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def close(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    # ───────────── Hilo vigía ─────────────
+    def _vigilar(self) -> None:
+        paso = min(self.intervalo, self.umbral / 4)
+        proximo = time.monotonic()
+        while not self._stop.wait(paso):
+            ahora = time.monotonic()
+            if self._ping is None:
+                if ahora >= proximo:
+                    self._ping = ahora
+                    proximo = ahora + self.intervalo
+                    try:
+                        self._loop.call_soon_threadsafe(self._pong, ahora)
+                    except RuntimeError:  # loop cerrado
+                        return
+            elif ahora - self._ping >= self.umbral and self._capturado is None:
+                self._capturar(ahora - self._ping)
+
+    def _capturar(self, transcurrido: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT)) if frame else ""
+        self._capturado = Bloqueo(time.time() - transcurrido, transcurrido, _corrutina(frame), stack)
+        logger.warning(
+            f"Event loop bloqueado hace {transcurrido * 1000:.0f} ms en {self._capturado.tarea}:\n{stack}"
+        )
+
+    # ───────────── En el loop ─────────────
+    def _pong(self, enviado: float) -> None:
+        ahora = time.monotonic()
+        lag = ahora - enviado
+        self._ping = None
+        self.muestras.append((ahora, lag))
+        while self.muestras and self.muestras[0][0] < ahora - VENTANA:
+            self.muestras.popleft()
+        self.max_lag = max(self.max_lag, lag)
+
+        capturado, self._capturado = self._capturado, None
+        if capturado is not None:
+            self.total_bloqueos += 1
+            self.bloqueos.append(capturado._replace(duracion=lag))
+            logger.warning(f"Event loop liberado tras {lag * 1000:.0f} ms ({capturado.tarea})")
+
+    def lag(self) -> dict:
+        """Lag actual, p50, p99 y máximo de la ventana (segundos)."""
+        valores = sorted(lag for _, lag in self.muestras)
+        if not valores:
+            return {"actual": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "actual": self.muestras[-1][1],
+            "p50": valores[len(valores) // 2],
+            "p99": valores[min(len(valores) - 1, int(len(valores) * 0.99))],
+            "max": valores[-1],
+        }
+
+
+def _corrutina(frame) -> str:
+    """module.qualname de la corrutina más externa del stack (la que corre la tarea)."""
+    externa = None
+    while frame is not None:
+        if frame.f_code.co_flags & inspect.CO_COROUTINE:
+            externa = frame
+        frame = frame.f_back
+    if externa is None:
+        return "(callback fuera de una tarea)"
+    codigo = externa.f_code
+    return f"{externa.f_globals.get('__name__', '?')}.{getattr(codigo, 'co_qualname', codigo.co_name)}"
+
+
+# ───────────── Tareas por cog ─────────────
+def _modulos(coro) -> Iterator[str]:
+    """Módulos de la cadena de awaits de una corrutina, de afuera hacia adentro."""
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            return
+        yield frame.f_globals.get("__name__", "")
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+
+
+def tareas_por_cog(bot: commands.Bot) -> Counter:
+    """Tareas vivas agrupadas por el cog que las está ejecutando.
+
+    Las que no pasan por ningún cog se agrupan por el primer módulo propio
+    (scheduler, write_buffer, ...) o por la librería (discord, asyncpg, ...).
+    """
+    cogs = {type(cog).__module__: nombre for nombre, cog in bot.cogs.items()}
+    conteo: Counter = Counter()
+    for tarea in asyncio.all_tasks():
+        modulos = list(_modulos(tarea.get_coro()))
+        dueño = next((cogs[m] for m in modulos if m in cogs), None)
+        if dueño is None:
+            propios = [m for m in modulos if m.split(".")[0] not in LIBRERIAS]
+            dueño = propios[0] if propios else (modulos[0].split(".")[0] if modulos else "?")
+        conteo[dueño] += 1
+    return conteo
@@ -3,14 +3,58 @@ from discord.ext import commands
 import os
 from dotenv import load_dotenv
 import asyncio
-from database import setup, connect  # ← Asegúrate de importar también `connect`
+from database import setup, create_pool, close_pool, config
+from router import MessageRouter
+from sharding import create_bot, ShardMonitor, local_shards
+from members import cache_policy
+from metrics import instrument, MetricsServer, METRICS_PORT
+from gateway_record import GatewayRecorder, GATEWAY_RECORD
+from loop_watchdog import LoopWatchdog
+from logging_setup import setup_logging
 
 load_dotenv()
 
+# Logging por cola: el loop sólo encola, un hilo formatea (JSON) y escribe
+log_listener = setup_logging()
+
 intents = discord.Intents.default()
 intents.message_content = True
+intents.members = os.getenv("MEMBERS_INTENT") == "1"  # privilegiado: necesario para MEMBER_CACHE=joined
+
+# Bot común, o AutoShardedBot si se configuró SHARDED / SHARD_COUNT / SHARD_IDS
+# con caché de miembros y mensajes acotada (MEMBER_CACHE, MAX_MESSAGES, CHUNK_GUILDS).
+# Los eventos crudos (on_socket_raw_receive) sólo se emiten si se graba el gateway.
+bot = create_bot(command_prefix='!', intents=intents, enable_debug_events=bool(GATEWAY_RECORD),
+                 **cache_policy())
+bot.shard_monitor = ShardMonitor(bot)
+
+# Lag del event loop y stack de lo que lo bloquea (LOOP_LAG_INTERVAL, LOOP_BLOCK_MS)
+bot.watchdog = LoopWatchdog()
+
+# Configuración por servidor (canales, roles, montos) compartida por los cogs
+bot.config = config
+
+# Router único de on_message: los cogs registran sus handlers por canal/autor
+bot.router = MessageRouter(config)
+bot.add_listener(bot.router.dispatch, "on_message")
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Métricas de comandos, consultas y gateway (expuestas si hay METRICS_PORT)
+instrument(bot)
+metrics_server = MetricsServer() if METRICS_PORT else None
+
+# Grabación de eventos del gateway para bench/replay.py (si hay GATEWAY_RECORD)
+recorder = GatewayRecorder(GATEWAY_RECORD) if GATEWAY_RECORD else None
+if recorder:
+    recorder.attach(bot)
+
+EXTENSIONS = (
+    "admin_commands",
+    "bump_tracker",
+    "channelcontrol",
+    "usercommands",
+    "embed_commands",
+    "economia",
+)
 
 @bot.command()
 async def test(ctx):
@@ -20,18 +64,40 @@ async def test(ctx):
 async def on_ready():
     print(f"Estoy en línea como {bot.user.name} (ID: {bot.user.id})")
 
+async def iniciar():
+    """Todo lo previo a conectarse al gateway (también lo usa bench/replay.py)."""
+    bot.db = await create_pool()  # ✅ Pool compartido para usar en cogs como `self.bot.db`
+    await setup()
+    await config.load_all(*local_shards(bot))  # sólo los servidores de las shards locales
+    await config.listen()  # recarga lo que cambien otros procesos
+
+    for extension in EXTENSIONS:
+        await bot.load_extension(extension)
+
 async def main():
     async with bot:
-        await setup()
-        bot.db = await connect()  # ✅ Conexión global para usar en cogs como `self.bot.db`
-
-        await bot.load_extension("admin_commands")
-        await bot.load_extension("bump_tracker")
-        await bot.load_extension("channelcontrol")
-        await bot.load_extension("usercommands")
-        await bot.load_extension("embed_commands")
-        await bot.load_extension("economia")
+        bot.watchdog.start()  # antes de cargar los cogs: también mide el arranque
+        await iniciar()
 
-        await bot.start(os.getenv('TOKEN'))
+        bot.shard_monitor.start()
+        if metrics_server:
+            await metrics_server.start()
+        if recorder:
+            recorder.start()
+        try:
+            await bot.start(os.getenv('TOKEN'))
+        finally:
+            # Primero el bot: cierra el gateway y descarga los cogs (que escriben
+            # sus buffers en cog_unload); close_pool escribe lo que quede y cierra
+            await bot.close()
+            if recorder:
+                await recorder.close()
+            if metrics_server:
+                await metrics_server.close()
+            await bot.shard_monitor.close()
+            await bot.watchdog.close()
+            await close_pool()
+            log_listener.stop()
 
-asyncio.run(main())
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import os
+import resource
+from typing import Iterable, Optional
+
+import discord
+from dotenv import load_dotenv
+
+from cache import LRUCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Política de caché de discord.py (variables de entorno)
+MEMBER_CACHE = os.getenv("MEMBER_CACHE", "voice")          # flags separados por coma: "", "voice", "voice,joined"
+MAX_MESSAGES = int(os.getenv("MAX_MESSAGES", "200"))        # 0 = sin caché de mensajes
+CHUNK_GUILDS = os.getenv("CHUNK_GUILDS", "0") == "1"        # descargar todos los miembros al arrancar
+
+# Caché de nombres para los rankings
+NAME_CACHE_SIZE = int(os.getenv("NAME_CACHE_SIZE", "5000"))
+NAME_CACHE_TTL = float(os.getenv("NAME_CACHE_TTL", "1800"))
+QUERY_CHUNK = 100  # máximo de user_ids por pedido de miembros al gateway
+
+
+def cache_policy() -> dict:
+    """Kwargs del Bot que acotan lo que discord.py guarda en memoria."""
+    flags = discord.MemberCacheFlags.none()
+    for name in filter(None, (n.strip() for n in MEMBER_CACHE.split(","))):
+        setattr(flags, name, True)
+    return {
+        "member_cache_flags": flags,
+        "max_messages": MAX_MESSAGES or None,
+        "chunk_guilds_at_startup": CHUNK_GUILDS,
+    }
+
+
+class NameResolver:
+    """Nombres visibles de miembros sin cachearlos enteros.
+
+    Primero mira la caché de discord.py; lo que falta se pide al gateway en
+    lotes de hasta 100 ids (`query_members` con `cache=False`) y sólo se
+    guarda el nombre en una LRU acotada. Los que ya no están en el servidor
+    se recuerdan como "" para no volver a pedirlos.
+    """
+
+    def __init__(self, maxsize: int = NAME_CACHE_SIZE, ttl: float = NAME_CACHE_TTL) -> None:
+        self._cache = LRUCache(maxsize, ttl)
+        self.queries = 0
+
+    def cached(self, guild: discord.Guild, user_id: int) -> Optional[str]:
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member.display_name
+        return self._cache.get((guild.id, user_id)) or None
+
+    async def resolve(self, guild: discord.Guild, user_ids: Iterable[int]) -> None:
+        """Deja en caché los nombres de `user_ids` que todavía no se conocen."""
+        faltan = [
+            uid for uid in dict.fromkeys(user_ids)
+            if guild.get_member(uid) is None and self._cache.get((guild.id, uid)) is None
+        ]
+        for i in range(0, len(faltan), QUERY_CHUNK):
+            chunk = faltan[i:i + QUERY_CHUNK]
+            try:
+                members = await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False)
+            except (asyncio.TimeoutError, discord.ClientException) as e:
+                logger.warning(f"No se pudieron resolver {len(chunk)} miembros de {guild.id}: {e}")
+                return
+            self.queries += 1
+            encontrados = {m.id: m.display_name for m in members}
+            for uid in chunk:
+                self._cache.set((guild.id, uid), encontrados.get(uid, ""))
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "queries": self.queries}
+
+
+nombres = NameResolver()
+
+
+def rss_bytes() -> int:
+    """Memoria residente actual del proceso (pico si no hay /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,294 @@
+import bisect
+import hashlib
+import logging
+import math
+import os
+import re
+import time
+from typing import Callable, Optional, Union
+
+from aiohttp import web
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+Number = Union[int, float]
+Labels = tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Labels, values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: Number) -> str:
+    if isinstance(value, float) and (math.isinf(value) or math.isnan(value)):
+        return "NaN" if math.isnan(value) else ("+Inf" if value > 0 else "-Inf")
+    return str(value)
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def collect(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[Labels, Number] = {}
+
+    def inc(self, *labels: str, amount: Number = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in self._values.items()]
+
+
+class Histogram(Metric):
+    """Histograma acumulativo; los cuantiles (p99) se calculan en Prometheus."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Labels = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[Labels, list[int]] = {}  # por bucket, no acumulado
+        self._sums: dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def collect(self) -> list[str]:
+        lines = []
+        for labels, counts in self._counts.items():
+            acumulado = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                acumulado += count
+                le = 'le="' + ("+Inf" if math.isinf(bound) else repr(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {acumulado}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(self._sums[labels])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {acumulado}")
+        return lines
+
+
+class Gauge(Metric):
+    """Valor que se lee al momento del scrape desde `fn`.
+
+    `fn` devuelve un número o, si hay labels, un dict {labels: valor}. Con
+    `kind="counter"` expone un contador que ya lleva otro objeto.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Union[Number, dict]],
+                 labelnames: Labels = (), kind: str = "gauge") -> None:
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+        self.kind = kind
+
+    def collect(self) -> list[str]:
+        try:
+            values = self.fn()
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} sin valor: {e}")
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in values.items()]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Todas las métricas en el formato de texto de Prometheus."""
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            samples = metric.collect()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ───────────── Métricas del bot ─────────────
+COMMAND_LATENCY = Histogram("bot_command_duration_seconds", "Duración de los comandos", ("command", "status"))
+COMMAND_ERRORS = Counter("bot_command_errors_total", "Errores de comandos por tipo", ("command", "error"))
+QUERY_LATENCY = Histogram("db_query_duration_seconds", "Duración de las consultas a la base", ("query",))
+QUERY_ERRORS = Counter("db_query_errors_total", "Consultas a la base que fallaron", ("query",))
+GATEWAY_EVENTS = Counter("discord_gateway_events_total", "Eventos recibidos del gateway", ("event",))
+
+_SPACES = re.compile(r"\s+")
+# Literales ('texto', 123, 1.5) pero no los parámetros ($1)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w$])\d+(?:\.\d+)?\b")
+MAX_QUERIES = 500  # las consultas son fijas; esto sólo acota SQL armado a mano
+
+QUERIES: dict[str, str] = {}      # label -> sentencia normalizada (db_query_info)
+_query_labels: dict[str, str] = {}  # SQL tal cual -> label, para no re-hashear
+
+
+def normalize_query(sql: str) -> str:
+    """La sentencia completa en una línea, con los literales como `?`."""
+    return _LITERALS.sub("?", _SPACES.sub(" ", sql).strip())
+
+
+def query_label(sql: str) -> str:
+    """Label estable de una consulta: hash corto de la sentencia normalizada completa.
+
+    El texto de cada label se expone en `db_query_info`. Pasado MAX_QUERIES
+    sentencias distintas, las nuevas se agrupan en "otras".
+    """
+    label = _query_labels.get(sql)
+    if label is not None:
+        return label
+    normalized = normalize_query(sql)
+    label = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    if label not in QUERIES:
+        if len(QUERIES) >= MAX_QUERIES:
+            return "otras"
+        QUERIES[label] = normalized
+    if len(_query_labels) < MAX_QUERIES * 4:
+        _query_labels[sql] = label
+    return label
+
+
+def observe_query(record) -> None:
+    """Observador de consultas de asyncpg (LoggedQuery)."""
+    label = query_label(record.query)
+    QUERY_LATENCY.observe(record.elapsed, label)
+    if record.exception is not None:
+        QUERY_ERRORS.inc(label)
+
+
+def instrument(bot: commands.Bot) -> None:
+    """Engancha los hooks de comandos y gateway y las métricas leídas al scrape."""
+    from database import add_query_observer, pool_stats, cache_stats, reintentos
+    from members import nombres, rss_bytes
+
+    async def on_command(ctx: commands.Context) -> None:
+        ctx.metrics_start = time.perf_counter()
+
+    def _observe(ctx: commands.Context, status: str) -> None:
+        start = getattr(ctx, "metrics_start", None)
+        if start is not None and ctx.command is not None:
+            COMMAND_LATENCY.observe(time.perf_counter() - start, ctx.command.qualified_name, status)
+
+    async def on_command_completion(ctx: commands.Context) -> None:
+        _observe(ctx, "ok")
+
+    async def on_command_error(ctx: commands.Context, error: commands.CommandError) -> None:
+        nombre = ctx.command.qualified_name if ctx.command else ""
+        original = getattr(error, "original", error)
+        COMMAND_ERRORS.inc(nombre, type(original).__name__)
+        _observe(ctx, "error")
+        # Con un listener registrado discord.py ya no loguea el error por su cuenta
+        if ctx.command and ctx.command.has_error_handler():
+            return
+        if ctx.cog and ctx.cog.has_error_handler():
+            return
+        logger.error(f"Error en el comando {nombre}", exc_info=error)
+
+    async def on_socket_event_type(event_type: str) -> None:
+        GATEWAY_EVENTS.inc(event_type)
+
+    bot.add_listener(on_command)
+    bot.add_listener(on_command_completion)
+    bot.add_listener(on_command_error)
+    bot.add_listener(on_socket_event_type)
+    add_query_observer(observe_query)
+
+    def _pool() -> dict:
+        stats = pool_stats()
+        return {("in_use",): stats["in_use"], ("idle",): stats["idle"], ("max",): stats["max"]}
+
+    def _latencies() -> dict:
+        if isinstance(bot, commands.AutoShardedBot):
+            return {(str(sid),): lat for sid, lat in bot.latencies}
+        return {("0",): bot.latency}
+
+    caches = {"balances": cache_stats, "nombres": nombres.stats}
+    Gauge("db_pool_connections", "Conexiones del pool por estado", _pool, ("state",))
+    Gauge("db_query_info", "Sentencia SQL de cada label `query` de las métricas de consultas",
+          lambda: {(label, sql): 1 for label, sql in QUERIES.items()}, ("query", "sql"))
+    Gauge("db_retries_total", "Reintentos por deadlock o falla de serialización",
+          lambda: {(error,): n for error, n in reintentos.items()}, ("error",), kind="counter")
+    Gauge("cache_hit_ratio", "Proporción de aciertos de cada caché",
+          lambda: {(name,): fn()["hit_ratio"] for name, fn in caches.items()}, ("cache",))
+    Gauge("cache_entries", "Entradas de cada caché",
+          lambda: {(name,): fn()["size"] for name, fn in caches.items()}, ("cache",))
+    Gauge("discord_shard_latency_seconds", "Latencia del heartbeat por shard", _latencies, ("shard",))
+    Gauge("discord_guilds", "Servidores atendidos por este proceso", lambda: len(bot.guilds))
+    Gauge("router_messages_total", "Mensajes vistos por el router", lambda: bot.router.messages, kind="counter")
+    Gauge("process_resident_memory_bytes", "Memoria residente del proceso", rss_bytes)
+
+    watchdog = getattr(bot, "watchdog", None)
+    if watchdog is not None:
+        from loop_watchdog import tareas_por_cog
+        Gauge("event_loop_lag_seconds", "Lag del event loop en la última ventana",
+              lambda: {(q,): v for q, v in watchdog.lag().items()}, ("stat",))
+        Gauge("event_loop_blocks_total", "Bloqueos del event loop detectados",
+              lambda: watchdog.total_bloqueos, kind="counter")
+        Gauge("asyncio_tasks", "Tareas vivas por cog o módulo",
+              lambda: {(dueño,): n for dueño, n in tareas_por_cog(bot).items()}, ("owner",))
+
+
+# ───────────── Servidor HTTP ─────────────
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.getenv("METRICS_PORT")  # sin definir = no se expone
+
+
+class MetricsServer:
+    """Sirve GET /metrics en texto de Prometheus."""
+
+    def __init__(self, host: str = METRICS_HOST, port: Optional[int] = None) -> None:
+        self.host = host
+        self.port = port if port is not None else int(METRICS_PORT or 0)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=REGISTRY.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Métricas en http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
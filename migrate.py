@@ -0,0 +1,204 @@
+import asyncio
+import importlib.util
+import logging
+import re
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import NamedTuple, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+NO_TRANSACTION_MARK = "-- sin-transaccion"  # primera línea: CREATE INDEX CONCURRENTLY y similares
+LOCK_ID = 0x1EB07  # pg_advisory_lock para que dos procesos no migren a la vez
+
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+_STATEMENT_END = re.compile(r";\s*$", re.MULTILINE)
+
+
+class Migration(NamedTuple):
+    """Una migración SQL (`sql`) o Python (`module`).
+
+    Las de Python definen `async def upgrade(conn)` y, opcionalmente,
+    `async def downgrade(conn)` y `TRANSACTIONAL = False` si manejan sus
+    propias transacciones (backfills por lotes, índices CONCURRENTLY).
+    """
+    version: int
+    name: str
+    sql: Optional[str]
+    transactional: bool
+    module: Optional[ModuleType] = None
+
+    @property
+    def reversible(self) -> bool:
+        return self.module is not None and hasattr(self.module, "downgrade")
+
+    def describe(self) -> str:
+        if self.module is not None:
+            return (self.module.__doc__ or "").strip()
+        return "\n".join(self.statements())
+
+    def statements(self) -> list[str]:
+        # Sólo hace falta partir las migraciones sin transacción: el resto se
+        # manda entero en un único execute().
+        if self.sql is None:
+            return []
+        chunks = (chunk.strip() for chunk in _STATEMENT_END.split(self.sql))
+        return [
+            chunk for chunk in chunks
+            if any(line.strip() and not line.strip().startswith("--") for line in chunk.splitlines())
+        ]
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Migraciones del directorio, ordenadas por versión."""
+    migrations = []
+    for path in directory.iterdir():
+        match = _FILENAME.match(path.name)
+        if not match:
+            continue
+        version, name, kind = int(match.group(1)), match.group(2), match.group(3)
+        if kind == "py":
+            spec = importlib.util.spec_from_file_location(f"migrations.m{version:04d}_{name}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            migrations.append(Migration(
+                version, name, None,
+                transactional=getattr(module, "TRANSACTIONAL", True),
+                module=module,
+            ))
+            continue
+        sql = path.read_text(encoding="utf-8")
+        migrations.append(Migration(
+            version, name, sql,
+            transactional=not sql.lstrip().startswith(NO_TRANSACTION_MARK),
+        ))
+    migrations.sort(key=lambda m: m.version)
+    return migrations
+
+
+async def applied_versions(conn: asyncpg.Connection) -> set[int]:
+    try:
+        rows = await conn.fetch("SELECT version FROM schema_version")
+    except asyncpg.UndefinedTableError:
+        return set()
+    return {row["version"] for row in rows}
+
+
+async def _apply(conn: asyncpg.Connection, migration: Migration) -> None:
+    record = ("INSERT INTO schema_version (version, name) VALUES ($1, $2)",
+              migration.version, migration.name)
+    if migration.module is not None:
+        if migration.transactional:
+            async with conn.transaction():
+                await migration.module.upgrade(conn)
+                await conn.execute(*record)
+        else:
+            await migration.module.upgrade(conn)
+            await conn.execute(*record)
+    elif migration.transactional:
+        async with conn.transaction():
+            await conn.execute(migration.sql)
+            await conn.execute(*record)
+    else:
+        for statement in migration.statements():
+            await conn.execute(statement)
+        await conn.execute(*record)
+
+
+async def migrate(pool: asyncpg.Pool, dry_run: bool = False) -> list[Migration]:
+    """Aplica las migraciones pendientes en orden y devuelve las que aplicó.
+
+    Si el esquema está al día sólo se hace un SELECT sobre schema_version.
+    Con `dry_run` no se ejecuta nada: sólo se devuelven las pendientes.
+    """
+    migrations = discover()
+    async with pool.acquire() as conn:
+        done = await applied_versions(conn)
+        pending = [m for m in migrations if m.version not in done]
+        if not pending or dry_run:
+            return pending
+
+        await conn.execute("SELECT pg_advisory_lock($1)", LOCK_ID)
+        try:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+            """)
+            # Otro proceso pudo haber migrado mientras esperábamos el lock
+            done = await applied_versions(conn)
+            pending = [m for m in migrations if m.version not in done]
+            for migration in pending:
+                logger.info(f"Aplicando migración {migration.version:04d}_{migration.name}")
+                await _apply(conn, migration)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", LOCK_ID)
+    return pending
+
+
+async def rollback(pool: asyncpg.Pool, dry_run: bool = False) -> Optional[Migration]:
+    """Revierte la última migración aplicada (debe tener `downgrade`)."""
+    migrations = {m.version: m for m in discover()}
+    async with pool.acquire() as conn:
+        done = await applied_versions(conn)
+        if not done:
+            return None
+        migration = migrations.get(max(done))
+        if migration is None or not migration.reversible:
+            raise RuntimeError(f"La migración {max(done):04d} no se puede revertir.")
+        if dry_run:
+            return migration
+
+        await conn.execute("SELECT pg_advisory_lock($1)", LOCK_ID)
+        try:
+            logger.info(f"Revirtiendo migración {migration.version:04d}_{migration.name}")
+            delete = ("DELETE FROM schema_version WHERE version = $1", migration.version)
+            if migration.transactional:
+                async with conn.transaction():
+                    await migration.module.downgrade(conn)
+                    await conn.execute(*delete)
+            else:
+                await migration.module.downgrade(conn)
+                await conn.execute(*delete)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", LOCK_ID)
+    return migration
+
+
+async def _main(dry_run: bool, revert: bool) -> None:
+    from database import create_pool, close_pool
+
+    pool = await create_pool()
+    try:
+        if revert:
+            migration = await rollback(pool, dry_run=dry_run)
+            migrations = [migration] if migration else []
+        else:
+            migrations = await migrate(pool, dry_run=dry_run)
+    finally:
+        await close_pool()
+
+    if not migrations:
+        print("No hay nada que revertir." if revert else "El esquema está al día.")
+        return
+    if revert:
+        verb = "Se revertiría" if dry_run else "Revertida"
+    else:
+        verb = "Pendiente" if dry_run else "Aplicada"
+    for migration in migrations:
+        print(f"{verb}: {migration.version:04d}_{migration.name}"
+              f"{'' if migration.transactional else ' (sin transacción)'}")
+        if dry_run:
+            print("    " + migration.describe().replace("\n", "\n    "))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+    asyncio.run(_main(dry_run="--dry-run" in args, revert="--rollback" in args))
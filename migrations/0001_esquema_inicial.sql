@@ -0,0 +1,29 @@
+-- Esquema base (el que antes creaba database.setup() en cada arranque)
+
+CREATE TABLE IF NOT EXISTS bumps (
+    user_id TEXT NOT NULL,
+    guild_id TEXT NOT NULL,
+    count INT DEFAULT 1,
+    PRIMARY KEY (user_id, guild_id)
+);
+
+CREATE TABLE IF NOT EXISTS euros (
+    user_id TEXT NOT NULL,
+    guild_id TEXT NOT NULL,
+    balance FLOAT DEFAULT 0,
+    PRIMARY KEY (user_id, guild_id)
+);
+
+CREATE TABLE IF NOT EXISTS tienda (
+    id SERIAL PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE,
+    precio INTEGER NOT NULL CHECK (precio >= 0)
+);
+
+CREATE TABLE IF NOT EXISTS inventario (
+    id SERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    guild_id TEXT NOT NULL,
+    objeto_id INTEGER NOT NULL REFERENCES tienda(id) ON DELETE CASCADE,
+    cantidad INTEGER NOT NULL DEFAULT 1 CHECK (cantidad > 0)
+);
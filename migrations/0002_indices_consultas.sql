@@ -0,0 +1,15 @@
+-- sin-transaccion
+-- Índices de las consultas calientes, creados sin bloquear escrituras.
+-- Si un CREATE INDEX CONCURRENTLY falla deja el índice INVALID: hay que
+-- borrarlo (DROP INDEX CONCURRENTLY) antes de volver a correr la migración.
+
+-- El índice único de inventario (ON CONFLICT de las compras) lo crea 0003,
+-- después de adoptar las filas de la tabla vieja (con usuario_id).
+
+-- Ranking de balances por servidor (!top, !banco, !cuenta)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS euros_guild_balance_idx
+    ON euros (guild_id, balance DESC);
+
+-- Ranking de bumps por servidor (!clasificacion, !misbumps)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS bumps_guild_count_idx
+    ON bumps (guild_id, count DESC);
@@ -0,0 +1,240 @@
+"""user_id / guild_id de TEXT a BIGINT en bumps, euros e inventario.
+
+Antes adopta las filas de la versión vieja de inventario (sólo `usuario_id`,
+sin servidor): el servidor es el único en el que el usuario tiene euros o
+bumps; las que no se pueden atribuir quedan en `inventario_legado`.
+
+Tablas chicas: ALTER COLUMN ... TYPE en una transacción. Tablas grandes
+(más de ONLINE_THRESHOLD filas estimadas): columnas sombra mantenidas por
+trigger, backfill por lotes, índices CONCURRENTLY y un swap corto bajo lock.
+El downgrade vuelve a TEXT con un ALTER bloqueante.
+"""
+import logging
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONAL = False  # cada paso maneja su propia transacción
+ONLINE_THRESHOLD = 100_000
+BATCH_SIZE = 10_000
+
+# tabla -> (constraint de PK o None, {índice: (columnas, único)})
+TABLES = {
+    "bumps": ("bumps_pkey", {"bumps_guild_count_idx": ("guild_id, count DESC", False)}),
+    "euros": ("euros_pkey", {"euros_guild_balance_idx": ("guild_id, balance DESC", False)}),
+    "inventario": (None, {"inventario_usuario_objeto_idx": ("user_id, guild_id, objeto_id", True)}),
+}
+
+
+async def _columns(conn: asyncpg.Connection, table: str) -> dict[str, str]:
+    rows = await conn.fetch("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = $1;
+    """, table)
+    return {row["column_name"]: row["data_type"] for row in rows}
+
+
+async def _column_type(conn: asyncpg.Connection, table: str) -> str:
+    return (await _columns(conn, table)).get("user_id")
+
+
+async def _adopt_legacy_inventory(conn: asyncpg.Connection) -> None:
+    # El !comprar original escribía (usuario_id, objeto_id, cantidad), sin servidor
+    columns = await _columns(conn, "inventario")
+    if "usuario_id" not in columns:
+        return
+    tipo = "bigint" if columns.get("user_id") == "bigint" else "text"
+    async with conn.transaction():
+        await conn.execute("""
+            ALTER TABLE inventario
+                ADD COLUMN IF NOT EXISTS user_id TEXT,
+                ADD COLUMN IF NOT EXISTS guild_id TEXT;
+        """)
+        status = await conn.execute(f"""
+            UPDATE inventario i
+            SET user_id = i.usuario_id::text::{tipo}, guild_id = c.guild_id::{tipo}
+            FROM (
+                SELECT user_id, min(guild_id) AS guild_id
+                FROM (
+                    SELECT user_id::text, guild_id::text FROM euros
+                    UNION ALL
+                    SELECT user_id::text, guild_id::text FROM bumps
+                ) cuentas
+                GROUP BY user_id
+                HAVING count(DISTINCT guild_id) = 1
+            ) c
+            WHERE (i.user_id IS NULL OR i.guild_id IS NULL) AND c.user_id = i.usuario_id::text;
+        """)
+        logger.info(f"inventario: {status.split()[-1]} filas viejas asignadas a su servidor")
+
+        # Sin cuenta o con cuentas en varios servidores: se guardan para revisarlas a mano
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS inventario_legado AS
+            SELECT id, usuario_id::text AS usuario_id, objeto_id, cantidad FROM inventario WHERE false;
+        """)
+        status = await conn.execute("""
+            WITH sueltas AS (
+                DELETE FROM inventario WHERE user_id IS NULL OR guild_id IS NULL
+                RETURNING id, usuario_id, objeto_id, cantidad
+            )
+            INSERT INTO inventario_legado (id, usuario_id, objeto_id, cantidad)
+            SELECT id, usuario_id::text, objeto_id, cantidad FROM sueltas;
+        """)
+        if int(status.split()[-1]):
+            logger.warning(f"inventario: {status.split()[-1]} filas sin servidor movidas a inventario_legado")
+
+        # Filas repetidas del mismo objeto se suman en una antes del índice único
+        await conn.execute("""
+            WITH repetidas AS (
+                SELECT min(id) AS queda, user_id, guild_id, objeto_id, sum(cantidad) AS total
+                FROM inventario
+                GROUP BY user_id, guild_id, objeto_id
+                HAVING count(*) > 1
+            ),
+            borradas AS (
+                DELETE FROM inventario i USING repetidas r
+                WHERE i.user_id = r.user_id AND i.guild_id = r.guild_id
+                  AND i.objeto_id = r.objeto_id AND i.id <> r.queda
+            )
+            UPDATE inventario i SET cantidad = r.total
+            FROM repetidas r WHERE i.id = r.queda;
+        """)
+        await conn.execute("""
+            ALTER TABLE inventario
+                DROP COLUMN usuario_id,
+                ALTER COLUMN user_id SET NOT NULL,
+                ALTER COLUMN guild_id SET NOT NULL;
+        """)
+
+
+async def _estimated_rows(conn: asyncpg.Connection, table: str) -> int:
+    return int(await conn.fetchval(
+        "SELECT GREATEST(reltuples, 0) FROM pg_class WHERE oid = $1::regclass", table
+    ))
+
+
+async def _convert_in_place(conn: asyncpg.Connection, table: str) -> None:
+    # Reescribe la tabla y reconstruye PK e índices en una sola transacción
+    async with conn.transaction():
+        await conn.execute(f"""
+            ALTER TABLE {table}
+                ALTER COLUMN user_id TYPE BIGINT USING user_id::bigint,
+                ALTER COLUMN guild_id TYPE BIGINT USING guild_id::bigint;
+        """)
+
+
+def _shadow_columns(columns: str) -> str:
+    return columns.replace("user_id", "user_id_big").replace("guild_id", "guild_id_big")
+
+
+async def _convert_online(conn: asyncpg.Connection, table: str) -> None:
+    pkey, indexes = TABLES[table]
+
+    # 1. Columnas sombra + trigger que las mantiene en cada escritura
+    await conn.execute(f"""
+        ALTER TABLE {table}
+            ADD COLUMN IF NOT EXISTS user_id_big BIGINT,
+            ADD COLUMN IF NOT EXISTS guild_id_big BIGINT;
+    """)
+    await conn.execute("""
+        CREATE OR REPLACE FUNCTION ids_bigint_sync() RETURNS trigger AS $$
+        BEGIN
+            NEW.user_id_big := NEW.user_id::bigint;
+            NEW.guild_id_big := NEW.guild_id::bigint;
+            RETURN NEW;
+        END $$ LANGUAGE plpgsql;
+    """)
+    await conn.execute(f"DROP TRIGGER IF EXISTS {table}_ids_bigint_sync ON {table}")
+    await conn.execute(f"""
+        CREATE TRIGGER {table}_ids_bigint_sync
+        BEFORE INSERT OR UPDATE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION ids_bigint_sync();
+    """)
+
+    # 2. Backfill por lotes, cada uno en su propia transacción
+    total = 0
+    while True:
+        status = await conn.execute(f"""
+            UPDATE {table}
+            SET user_id_big = user_id::bigint, guild_id_big = guild_id::bigint
+            WHERE ctid = ANY (ARRAY(
+                SELECT ctid FROM {table} WHERE user_id_big IS NULL OR guild_id_big IS NULL
+                LIMIT $1
+            ));
+        """, BATCH_SIZE)
+        updated = int(status.split()[-1])
+        if not updated:
+            break
+        total += updated
+        logger.info(f"{table}: {total} filas migradas a BIGINT")
+
+    # 3. NOT NULL validado sin bloquear escrituras e índices nuevos en paralelo
+    await conn.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_ids_big_nn")
+    await conn.execute(f"""
+        ALTER TABLE {table} ADD CONSTRAINT {table}_ids_big_nn
+        CHECK (user_id_big IS NOT NULL AND guild_id_big IS NOT NULL) NOT VALID;
+    """)
+    await conn.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_ids_big_nn")
+
+    new_indexes = dict(indexes)
+    if pkey:
+        new_indexes[pkey] = ("user_id, guild_id", True)
+    for name, (cols, unique) in new_indexes.items():
+        # Un intento fallido anterior pudo dejar el índice INVALID
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}_big")
+        await conn.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY {name}_big "
+            f"ON {table} ({_shadow_columns(cols)})"
+        )
+
+    # 4. Swap: el único paso con lock exclusivo, sin reescribir la tabla
+    async with conn.transaction():
+        await conn.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        await conn.execute(f"DROP TRIGGER {table}_ids_bigint_sync ON {table}")
+        if pkey:
+            await conn.execute(f"ALTER TABLE {table} DROP CONSTRAINT {pkey}")
+        await conn.execute(f"ALTER TABLE {table} DROP COLUMN user_id, DROP COLUMN guild_id")
+        await conn.execute(f"ALTER TABLE {table} RENAME COLUMN user_id_big TO user_id")
+        await conn.execute(f"ALTER TABLE {table} RENAME COLUMN guild_id_big TO guild_id")
+        # El CHECK validado evita que SET NOT NULL recorra la tabla
+        await conn.execute(f"""
+            ALTER TABLE {table}
+                ALTER COLUMN user_id SET NOT NULL,
+                ALTER COLUMN guild_id SET NOT NULL,
+                DROP CONSTRAINT {table}_ids_big_nn;
+        """)
+        if pkey:
+            await conn.execute(f"ALTER TABLE {table} ADD CONSTRAINT {pkey} PRIMARY KEY USING INDEX {pkey}_big")
+        for name in indexes:
+            await conn.execute(f"ALTER INDEX {name}_big RENAME TO {name}")
+
+
+async def upgrade(conn: asyncpg.Connection) -> None:
+    await _adopt_legacy_inventory(conn)
+    # ON CONFLICT (user_id, guild_id, objeto_id) de las compras
+    await conn.execute("""
+        CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS inventario_usuario_objeto_idx
+            ON inventario (user_id, guild_id, objeto_id);
+    """)
+    for table in TABLES:
+        if await _column_type(conn, table) == "bigint":
+            continue  # ya convertida (p. ej. un intento anterior cortado tras el swap)
+        if await _estimated_rows(conn, table) > ONLINE_THRESHOLD:
+            logger.info(f"{table}: migración online a BIGINT")
+            await _convert_online(conn, table)
+        else:
+            await _convert_in_place(conn, table)
+    await conn.execute("DROP FUNCTION IF EXISTS ids_bigint_sync()")
+
+
+async def downgrade(conn: asyncpg.Connection) -> None:
+    for table in TABLES:
+        if await _column_type(conn, table) != "bigint":
+            continue
+        async with conn.transaction():
+            await conn.execute(f"""
+                ALTER TABLE {table}
+                    ALTER COLUMN user_id TYPE TEXT USING user_id::text,
+                    ALTER COLUMN guild_id TYPE TEXT USING guild_id::text;
+            """)
@@ -0,0 +1,10 @@
+-- Recordatorios de bump pendientes (uno por servidor), para que sobrevivan
+-- a reinicios y recargas del cog.
+
+CREATE TABLE IF NOT EXISTS bump_reminders (
+    guild_id BIGINT PRIMARY KEY,
+    channel_id BIGINT NOT NULL,
+    due_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS bump_reminders_due_idx ON bump_reminders (due_at);
@@ -0,0 +1,10 @@
+-- Configuración por servidor (canales, roles y montos) que reemplaza las
+-- constantes de los cogs. Los valores se guardan como texto y los tipa
+-- guild_config.CLAVES.
+
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id BIGINT NOT NULL,
+    clave TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    PRIMARY KEY (guild_id, clave)
+);
@@ -0,0 +1,18 @@
+-- Registro de auditoría de las acciones de administración que mueven dinero
+-- (!adde, !removee, !reset_economia). Se escribe en lotes desde
+-- database.audit_buffer; `ts` es el momento de la acción, no del insert.
+
+CREATE TABLE IF NOT EXISTS audit_log (
+    id BIGSERIAL PRIMARY KEY,
+    ts TIMESTAMPTZ NOT NULL,
+    guild_id BIGINT NOT NULL,
+    actor_id BIGINT NOT NULL,
+    accion TEXT NOT NULL,
+    target_id BIGINT,
+    monto DOUBLE PRECISION,
+    saldo DOUBLE PRECISION,
+    detalle JSONB
+);
+
+CREATE INDEX IF NOT EXISTS audit_log_guild_ts_idx ON audit_log (guild_id, ts DESC);
+CREATE INDEX IF NOT EXISTS audit_log_target_idx ON audit_log (guild_id, target_id, ts DESC);
@@ -0,0 +1,30 @@
+-- Libro mayor de la economía: un movimiento por cuenta afectada (!dar deja
+-- dos), sólo se inserta. Particionado por mes sobre `ts`; las particiones
+-- las crea ledger.Ledger por adelantado y, al compactar, las más viejas se
+-- suman a ledger_snapshots y se borran. Se escribe en lotes, así que `ts` es
+-- el momento del movimiento y el orden de `id` no es el cronológico.
+
+CREATE TABLE IF NOT EXISTS ledger (
+    id BIGSERIAL,
+    ts TIMESTAMPTZ NOT NULL,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    delta DOUBLE PRECISION NOT NULL,
+    saldo DOUBLE PRECISION,
+    motivo TEXT NOT NULL,
+    contraparte BIGINT,
+    ref TEXT,
+    PRIMARY KEY (id, ts)
+) PARTITION BY RANGE (ts);
+
+CREATE INDEX IF NOT EXISTS ledger_cuenta_ts_idx ON ledger (guild_id, user_id, ts DESC);
+
+-- Saldo acumulado de los movimientos ya compactados: el saldo según el
+-- ledger en un instante T es `saldo` + la suma de los deltas con ts >= `hasta`.
+CREATE TABLE IF NOT EXISTS ledger_snapshots (
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    saldo DOUBLE PRECISION NOT NULL,
+    hasta TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
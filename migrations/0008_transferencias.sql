@@ -0,0 +1,36 @@
+-- Transferencia entre dos cuentas con orden de bloqueo determinista. La
+-- versión anterior (un CTE) bloqueaba primero al emisor y después al
+-- receptor, así que dos !dar cruzados (A→B y B→A) podían quedar esperándose
+-- y uno terminaba en deadlock. Acá se toman primero las filas existentes de
+-- las dos cuentas ordenadas por user_id; la del receptor, si no existía, se
+-- crea recién después, cuando nadie más puede tenerla bloqueada.
+
+CREATE OR REPLACE FUNCTION transferir_euros(
+    p_sender BIGINT, p_receiver BIGINT, p_guild BIGINT, p_monto DOUBLE PRECISION,
+    OUT ok BOOLEAN, OUT sender_balance DOUBLE PRECISION, OUT receiver_balance DOUBLE PRECISION
+) LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM 1 FROM euros
+    WHERE guild_id = p_guild AND user_id IN (p_sender, p_receiver)
+    ORDER BY user_id
+    FOR UPDATE;
+
+    UPDATE euros SET balance = balance - p_monto
+    WHERE user_id = p_sender AND guild_id = p_guild AND balance >= p_monto
+    RETURNING balance INTO sender_balance;
+    ok := FOUND;
+
+    IF NOT ok THEN
+        SELECT balance INTO sender_balance
+        FROM euros WHERE user_id = p_sender AND guild_id = p_guild;
+        sender_balance := COALESCE(sender_balance, 0);
+        RETURN;
+    END IF;
+
+    INSERT INTO euros (user_id, guild_id, balance)
+    VALUES (p_receiver, p_guild, p_monto)
+    ON CONFLICT (user_id, guild_id)
+    DO UPDATE SET balance = euros.balance + EXCLUDED.balance
+    RETURNING balance INTO receiver_balance;
+END;
+$$;
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+PROFILE_HZ = float(os.getenv("PROFILE_HZ", "100"))
+PROFILE_MAX_SECONDS = 300
+PROFILE_MAX_HZ = 500
+MAX_OVERHEAD = 0.02     # fracción máxima de tiempo que el muestreo puede quedarse con el GIL
+MAX_STACKS = 20000      # stacks distintos; el resto se suma a "(otros)"
+MAX_DEPTH = 128
+# Marco del event loop: siempre están en el stack y no aportan al acumulado
+_INFRA = ("asyncio.", "selectors.", "threading.", "concurrent.futures.")
+
+
+def _nombre(frame) -> str:
+    code = frame.f_code
+    modulo = frame.f_globals.get("__name__", "?")
+    return f"{modulo}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _stack(frame) -> tuple[str, ...]:
+    """Frames de la raíz a la hoja."""
+    nombres = []
+    while frame is not None and len(nombres) < MAX_DEPTH:
+        nombres.append(_nombre(frame))
+        frame = frame.f_back
+    nombres.reverse()
+    return tuple(nombres)
+
+
+class Perfil:
+    def __init__(self, stacks: Counter, muestras: int, segundos: float, hz_efectivo: float) -> None:
+        self.stacks = stacks
+        self.muestras = muestras
+        self.segundos = segundos
+        self.hz_efectivo = hz_efectivo
+
+    def collapsed(self) -> str:
+        """Formato "a;b;c N" (flamegraph.pl, speedscope, inferno)."""
+        return "\n".join(f"{';'.join(stack)} {n}" for stack, n in self.stacks.most_common()) + "\n"
+
+    def top(self, n: int = 25, hilo: str = "loop") -> tuple[list[tuple[str, int]], list[tuple[str, int]]]:
+        """(propias, acumuladas) de un hilo: muestras en la hoja y en cualquier parte del stack."""
+        raiz = f"[{hilo}]"
+        propias: Counter = Counter()
+        acumuladas: Counter = Counter()
+        for stack, cantidad in self.stacks.items():
+            if stack[0] != raiz:
+                continue
+            propias[stack[-1]] += cantidad
+            for nombre in set(stack[1:]):
+                if not nombre.startswith(_INFRA) and not nombre.endswith(".<module>"):
+                    acumuladas[nombre] += cantidad
+        return propias.most_common(n), acumuladas.most_common(n)
+
+    def resumen(self, n: int = 25) -> str:
+        """Top de funciones del hilo del event loop (el .folded trae todos los hilos)."""
+        propias, acumuladas = self.top(n)
+        total = self.muestras or 1
+        lineas = [
+            f"{self.muestras} muestras en {self.segundos:.1f} s ({self.hz_efectivo:.0f} Hz efectivos)",
+            "Porcentajes sobre las muestras del hilo del event loop; "
+            "selectors.*.select es tiempo ocioso esperando eventos.",
+            "",
+            "Tiempo propio (la función estaba ejecutándose):",
+        ]
+        lineas += [f"  {c * 100 / total:6.2f}%  {c:>7}  {nombre}" for nombre, c in propias]
+        lineas += ["", "Tiempo acumulado (la función estaba en el stack):"]
+        lineas += [f"  {c * 100 / total:6.2f}%  {c:>7}  {nombre}" for nombre, c in acumuladas]
+        return "\n".join(lineas) + "\n"
+
+
+class SamplingProfiler:
+    """Profiler por muestreo de todos los hilos del proceso.
+
+    Un hilo toma `sys._current_frames()` a `hz` muestras por segundo y
+    cuenta stacks iguales; no instrumenta nada, así que el bot no se frena
+    mientras no se está muestreando. Si una muestra cuesta más de lo
+    previsto, se espacian para no pasar de MAX_OVERHEAD. Una sesión a la vez.
+    """
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self.fin: Optional[float] = None  # time.monotonic() en que termina la sesión en curso
+
+    @property
+    def ocupado(self) -> bool:
+        return self._lock.locked()
+
+    async def perfilar(self, segundos: float, hz: float = PROFILE_HZ) -> Perfil:
+        if self._lock.locked():
+            raise RuntimeError("Ya hay una sesión de perfilado en curso.")
+        segundos = max(1.0, min(segundos, PROFILE_MAX_SECONDS))
+        hz = max(1.0, min(hz, PROFILE_MAX_HZ))
+        async with self._lock:
+            self.fin = time.monotonic() + segundos
+            loop_thread = threading.get_ident()
+            try:
+                return await asyncio.to_thread(self._muestrear, segundos, hz, loop_thread)
+            finally:
+                self.fin = None
+
+    @staticmethod
+    def _muestrear(segundos: float, hz: float, loop_thread: int) -> Perfil:
+        propio = threading.get_ident()
+        nombres = {t.ident: t.name for t in threading.enumerate()}
+        stacks: Counter = Counter()
+        muestras = 0
+        intervalo = 1 / hz
+        inicio = time.monotonic()
+        fin = inicio + segundos
+        while time.monotonic() < fin:
+            costo = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                hilo = "loop" if ident == loop_thread else nombres.get(ident, f"hilo-{ident}")
+                stack = (f"[{hilo}]",) + _stack(frame)
+                if stack in stacks or len(stacks) < MAX_STACKS:
+                    stacks[stack] += 1
+                else:
+                    stacks[(f"[{hilo}]", "(otros)")] += 1
+            muestras += 1
+            costo = time.perf_counter() - costo
+            # Con muestras caras se baja la frecuencia en lugar de robarle más GIL al loop
+            time.sleep(max(intervalo - costo, costo / MAX_OVERHEAD - costo, 0))
+        duracion = time.monotonic() - inicio
+        return Perfil(stacks, muestras, duracion, muestras / duracion if duracion else 0.0)
+
+
+profiler = SamplingProfiler()
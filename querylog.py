@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from typing import Callable, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+EXPLAIN_SAMPLE_RATE = float(os.getenv("EXPLAIN_SAMPLE_RATE", "0"))     # 0 = sin EXPLAIN
+EXPLAIN_MIN_INTERVAL = float(os.getenv("EXPLAIN_MIN_INTERVAL", "300"))  # por sentencia, en segundos
+MAX_STATEMENTS = 500  # las consultas son fijas; esto sólo acota SQL armado a mano
+
+_SPACES = re.compile(r"\s+")
+_EXPLAINABLE = re.compile(r"^\s*(select|insert|update|delete|with)\b", re.IGNORECASE)
+_FROM = re.compile(r"\bfrom\b", re.IGNORECASE)  # sin FROM no hay plan que mirar (SELECT pg_advisory_lock($1))
+# Sólo los SELECT de tablas se re-ejecutan con ANALYZE; el resto (los que
+# escriben o llaman a cualquier otra función) con EXPLAIN a secas
+_READ_ONLY = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+_WRITES = re.compile(r"\b(insert|update|delete|for\s+update|for\s+share)\b", re.IGNORECASE)
+_CATALOG = re.compile(r"\bpg_\w+", re.IGNORECASE)
+_CALLS = re.compile(r"\b([a-z_][a-z0-9_.]*)\s*\(", re.IGNORECASE)
+_SAFE_CALLS = frozenset((
+    # palabras clave seguidas de paréntesis
+    "as", "in", "exists", "any", "all", "values", "from", "join", "on", "using", "where",
+    "and", "or", "not", "select", "over", "filter",
+    # funciones sin efectos
+    "count", "sum", "avg", "min", "max", "coalesce", "nullif", "greatest", "least",
+    "lower", "upper", "abs", "round", "now", "row_number", "rank", "dense_rank",
+))
+
+
+def normalize(sql: str) -> str:
+    return _SPACES.sub(" ", sql).strip()
+
+
+def analyzable(sql: str) -> bool:
+    """Si re-ejecutar la sentencia con ANALYZE sólo lee tablas."""
+    if not _READ_ONLY.match(sql) or _WRITES.search(sql) or _CATALOG.search(sql):
+        return False
+    return all(name.lower() in _SAFE_CALLS for name in _CALLS.findall(sql))
+
+
+def redact(args) -> str:
+    """Parámetros sin sus valores: sólo posición y tipo."""
+    if not args:
+        return "[]"
+    return "[" + ", ".join(f"${i}={type(arg).__name__}" for i, arg in enumerate(args, start=1)) + "]"
+
+
+class StatementStats:
+    __slots__ = ("sql", "calls", "errors", "slow", "total", "max", "plan", "explain", "explained_at")
+
+    def __init__(self, sql: str) -> None:
+        self.sql = sql
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+        self.total = 0.0  # segundos
+        self.max = 0.0
+        self.plan: Optional[str] = None
+        self.explain = ""  # forma de EXPLAIN con la que se obtuvo el plan
+        self.explained_at = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class _Rollback(Exception):
+    pass
+
+
+class QueryLog:
+    """Estadísticas por sentencia, log de consultas lentas y EXPLAIN muestreado.
+
+    `observe` se engancha como observador de consultas del pool. Las lentas
+    se loguean con los parámetros redactados; una fracción de ellas
+    (`explain_rate`) se explica, de a una por vez. Los SELECT de tablas se
+    re-ejecutan con EXPLAIN (ANALYZE, BUFFERS) en una transacción READ ONLY
+    que se revierte; las que escriben o llaman a otras funciones (advisory
+    locks, funciones plpgsql) sólo con EXPLAIN, para no tomar locks ni
+    avanzar secuencias.
+    """
+
+    def __init__(self, get_pool: Callable[[], asyncpg.Pool], threshold_ms: float = SLOW_QUERY_MS,
+                 explain_rate: float = EXPLAIN_SAMPLE_RATE) -> None:
+        self._get_pool = get_pool
+        self.threshold = threshold_ms / 1000
+        self.explain_rate = explain_rate
+        self.stats: dict[str, StatementStats] = {}
+        self._explaining = False
+        self._tasks: set[asyncio.Task] = set()  # EXPLAIN en curso (referencia fuerte)
+
+    def observe(self, record) -> None:
+        sql = normalize(record.query)
+        if sql.upper().startswith("EXPLAIN"):
+            return  # los EXPLAIN propios no cuentan
+        stats = self.stats.get(sql)
+        if stats is None:
+            if len(self.stats) >= MAX_STATEMENTS:
+                return
+            stats = self.stats[sql] = StatementStats(sql)
+
+        elapsed = record.elapsed
+        stats.calls += 1
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+        if record.exception is not None:
+            stats.errors += 1
+        if elapsed < self.threshold:
+            return
+
+        stats.slow += 1
+        logger.warning(f"Consulta lenta ({elapsed * 1000:.0f} ms): {sql[:300]} params={redact(record.args)}")
+        if self._should_explain(stats, record):
+            self._explaining = True
+            task = asyncio.get_running_loop().create_task(self._explain(stats, record.query, record.args))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _should_explain(self, stats: StatementStats, record) -> bool:
+        if self._explaining or self.explain_rate <= 0 or record.exception is not None:
+            return False
+        if not _EXPLAINABLE.match(record.query) or not _FROM.search(record.query):
+            return False
+        # executemany registra la lista de filas, no los parámetros de una sentencia
+        if record.args and isinstance(record.args[0], (list, tuple)):
+            return False
+        if time.monotonic() - stats.explained_at < EXPLAIN_MIN_INTERVAL:
+            return False
+        return random.random() < self.explain_rate
+
+    async def _explain(self, stats: StatementStats, query: str, args) -> None:
+        stats.explained_at = time.monotonic()
+        analyze = analyzable(query)
+        try:
+            async with self._get_pool().acquire() as conn:
+                if analyze:
+                    try:
+                        async with conn.transaction(readonly=True):
+                            rows = await conn.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {query}", *(args or ()))
+                            stats.plan = "\n".join(row[0] for row in rows)
+                            stats.explain = "EXPLAIN (ANALYZE, BUFFERS)"
+                            raise _Rollback  # ANALYZE ejecuta la sentencia: no se confirma nada
+                    except _Rollback:
+                        pass
+                    except asyncpg.ReadOnlySQLTransactionError:
+                        analyze = False  # un SELECT que llama a una función que escribe
+                if not analyze:
+                    rows = await conn.fetch(f"EXPLAIN {query}", *(args or ()))
+                    stats.plan = "\n".join(row[0] for row in rows)
+                    stats.explain = "EXPLAIN"
+            logger.info(f"Plan de la consulta lenta {stats.sql[:120]}:\n{stats.plan}")
+        except Exception as e:
+            logger.warning(f"No se pudo obtener el EXPLAIN de {stats.sql[:120]}: {e}")
+        finally:
+            self._explaining = False
+
+    def top(self, n: int = 10, key: str = "total") -> list[StatementStats]:
+        return sorted(self.stats.values(), key=lambda s: getattr(s, key), reverse=True)[:n]
+
+    def reset(self) -> None:
+        self.stats.clear()
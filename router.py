@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Los handlers reciben el mensaje y su contenido ya normalizado (strip + lower)
+Handler = Callable[[discord.Message, str], Awaitable[None]]
+
+
+class Route(NamedTuple):
+    name: str
+    handler: Handler
+    channel_id: Optional[int]
+    channel_key: Optional[str]
+    author_id: Optional[int]
+    ignore_bots: bool
+
+
+class HandlerStats:
+    __slots__ = ("calls", "errors", "total", "max")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0  # segundos acumulados
+        self.max = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class MessageRouter:
+    """Único listener de on_message para los cogs.
+
+    Cada handler se registra por canal y/o por autor; el mensaje se resuelve
+    con una búsqueda en diccionario y sólo se despachan las rutas que
+    coinciden, así que el costo por mensaje no crece con la cantidad de cogs.
+    Con `channel_key` el canal sale de la configuración del servidor del
+    mensaje (p. ej. "canal_bumps"), y se resuelve en memoria en cada mensaje.
+    """
+
+    def __init__(self, config=None) -> None:
+        self.config = config  # GuildConfig para las rutas con channel_key
+        self._by_channel: dict[int, list[Route]] = {}
+        self._by_key: dict[str, list[Route]] = {}
+        self._by_author: dict[int, list[Route]] = {}
+        self._global: list[Route] = []
+        self.stats: dict[str, HandlerStats] = {}
+        self.messages = 0
+
+    def register(self, handler: Handler, *, channel_id: Optional[int] = None,
+                 channel_key: Optional[str] = None, author_id: Optional[int] = None,
+                 name: Optional[str] = None, ignore_bots: bool = False) -> None:
+        route = Route(name or handler.__qualname__, handler, channel_id, channel_key,
+                      author_id, ignore_bots)
+        if channel_id is not None:
+            self._by_channel.setdefault(channel_id, []).append(route)
+        elif channel_key is not None:
+            self._by_key.setdefault(channel_key, []).append(route)
+        elif author_id is not None:
+            self._by_author.setdefault(author_id, []).append(route)
+        else:
+            self._global.append(route)
+        self.stats.setdefault(route.name, HandlerStats())
+
+    def unregister(self, handler: Handler) -> None:
+        for table in (self._by_channel, self._by_key, self._by_author):
+            for key in list(table):
+                table[key] = [r for r in table[key] if r.handler != handler]
+                if not table[key]:
+                    del table[key]
+        self._global = [r for r in self._global if r.handler != handler]
+
+    def _match(self, message: discord.Message) -> list[Route]:
+        author = message.author
+        candidates = list(self._by_channel.get(message.channel.id, ()))
+        if self._by_key and message.guild is not None:
+            for key, keyed in self._by_key.items():
+                if self.config.get(message.guild.id, key) == message.channel.id:
+                    candidates.extend(keyed)
+        routes = [r for r in candidates if r.author_id is None or r.author_id == author.id]
+        routes.extend(self._by_author.get(author.id, ()))
+        routes.extend(self._global)
+        if author.bot:
+            routes = [r for r in routes if not r.ignore_bots]
+        return routes
+
+    async def dispatch(self, message: discord.Message) -> None:
+        self.messages += 1
+        routes = self._match(message)
+        if not routes:
+            return
+        content = message.content.strip().lower()
+        if len(routes) == 1:
+            await self._run(routes[0], message, content)
+        else:
+            await asyncio.gather(*(self._run(r, message, content) for r in routes))
+
+    async def _run(self, route: Route, message: discord.Message, content: str) -> None:
+        stats = self.stats[route.name]
+        start = time.perf_counter()
+        try:
+            await route.handler(message, content)
+        except Exception:
+            stats.errors += 1
+            logger.exception(f"Error en el handler de mensajes {route.name}")
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.calls += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
@@ -0,0 +1,117 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Entry(NamedTuple):
+    due: float      # timestamp UNIX (segundos)
+    payload: Any
+    seq: int        # distingue una reprogramación de la entrada vieja del heap
+
+
+class Scheduler:
+    """Temporizador único para muchos recordatorios, uno por clave.
+
+    Las entradas viven en un min-heap ordenado por vencimiento y un solo task
+    duerme hasta la primera; reprogramar o cancelar deja la entrada vieja en
+    el heap y se descarta al llegar a la cima. Las que ya vencieron (p. ej.
+    cargadas al arrancar) se disparan en cuanto arranca el driver. Cada
+    callback corre en su propio task: uno lento no atrasa a los demás.
+    """
+
+    def __init__(self, callback: Callable[[Hashable, Any, float], Awaitable[None]]) -> None:
+        self._callback = callback  # (clave, payload, vencimiento)
+        self._entries: dict[Hashable, Entry] = {}
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: set[asyncio.Task] = set()  # callbacks en curso
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    # ───────────── API ─────────────
+    def schedule(self, key, due: float, payload: Any = None) -> None:
+        """Programa (o reprograma) `key` para el timestamp `due`."""
+        seq = next(self._seq)
+        self._entries[key] = Entry(due, payload, seq)
+        heapq.heappush(self._heap, (due, seq, key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._compact()
+        self._wake.set()
+
+    def cancel(self, key) -> Optional[Entry]:
+        return self._entries.pop(key, None)
+
+    def get(self, key) -> Optional[Entry]:
+        return self._entries.get(key)
+
+    def upcoming(self, limit: Optional[int] = None) -> list[tuple[Hashable, Entry]]:
+        """Entradas vigentes ordenadas por vencimiento."""
+        items = sorted(self._entries.items(), key=lambda item: item[1].due)
+        return items[:limit] if limit is not None else items
+
+    def _compact(self) -> None:
+        # Quita del heap las entradas canceladas o reprogramadas
+        self._heap = [(e.due, e.seq, key) for key, e in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def _is_current(self, seq: int, key) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.seq == seq
+
+    # ───────────── Ciclo de vida ─────────────
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    def _done(self, key, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error ejecutando el recordatorio {key}", exc_info=task.exception())
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            while self._heap and not self._is_current(self._heap[0][1], self._heap[0][2]):
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                await self._wake.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                # Se despierta antes si se programa algo nuevo
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self._heap)
+            entry = self._entries.pop(key)
+            task = asyncio.get_running_loop().create_task(self._callback(key, entry.payload, entry.due))
+            self._running.add(task)
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
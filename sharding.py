@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from typing import Optional
+
+from discord.ext import commands
+
+
+def _parse_ids(texto: str) -> list[int]:
+    # "0,1,2" o rangos "0-3"
+    ids: list[int] = []
+    for parte in texto.split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if "-" in parte:
+            desde, hasta = parte.split("-", 1)
+            ids.extend(range(int(desde), int(hasta) + 1))
+        else:
+            ids.append(int(parte))
+    return sorted(set(ids))
+
+
+def shard_settings() -> Optional[dict]:
+    """Kwargs de AutoShardedBot según el entorno, o None para un Bot sin shards.
+
+    SHARDED=1 deja que Discord elija la cantidad; SHARD_COUNT fija el total y
+    SHARD_IDS (p. ej. "0-3" o "4,5") las shards que corre este proceso.
+    """
+    count = os.getenv("SHARD_COUNT")
+    ids = os.getenv("SHARD_IDS")
+    if not (count or ids or os.getenv("SHARDED") == "1"):
+        return None
+    kwargs = {}
+    if count:
+        kwargs["shard_count"] = int(count)
+    if ids:
+        if not count:
+            raise RuntimeError("SHARD_IDS necesita SHARD_COUNT.")
+        kwargs["shard_ids"] = _parse_ids(ids)
+    return kwargs
+
+
+def create_bot(**kwargs) -> commands.Bot:
+    settings = shard_settings()
+    if settings is None:
+        return commands.Bot(**kwargs)
+    return commands.AutoShardedBot(**kwargs, **settings)
+
+
+def shard_of(guild_id: int, shard_count: int) -> int:
+    """Shard a la que Discord asigna el servidor."""
+    return (guild_id >> 22) % shard_count
+
+
+def local_shards(bot: commands.Bot) -> tuple[Optional[int], Optional[list[int]]]:
+    """(shard_count, shard_ids) si este proceso corre sólo parte de las shards.
+
+    Devuelve (None, None) cuando el proceso atiende todos los servidores.
+    """
+    shard_ids = getattr(bot, "shard_ids", None)
+    if bot.shard_count and shard_ids is not None and len(shard_ids) < bot.shard_count:
+        return bot.shard_count, list(shard_ids)
+    return None, None
+
+
+class ShardMonitor:
+    """Latencia, servidores, reconexiones y rate limit de cada shard.
+
+    Todo sale de la API pública de ShardInfo. discord.py no expone el shard de
+    cada evento, así que la tasa de eventos es la del proceso: se cuentan con
+    `on_socket_event_type` y se muestrea cada `interval` segundos.
+    """
+
+    def __init__(self, bot: commands.Bot, interval: float = 60.0) -> None:
+        self.bot = bot
+        self.interval = interval
+        self.rate: Optional[float] = None  # eventos/minuto del proceso
+        self.reconnects: Counter = Counter()
+        self._events = 0
+        self._last: Optional[tuple[float, int]] = None
+        self._connected: set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+
+        bot.add_listener(self._on_socket_event_type, "on_socket_event_type")
+        if isinstance(bot, commands.AutoShardedBot):
+            bot.add_listener(self._on_shard_resumed, "on_shard_resumed")
+            bot.add_listener(self._on_shard_connect, "on_shard_connect")
+        else:
+            bot.add_listener(self._on_resumed, "on_resumed")
+
+    async def _on_socket_event_type(self, event_type: str) -> None:
+        self._events += 1
+
+    async def _on_shard_resumed(self, shard_id: int) -> None:
+        self.reconnects[shard_id] += 1
+
+    async def _on_shard_connect(self, shard_id: int) -> None:
+        if shard_id in self._connected:  # la primera conexión no cuenta
+            self.reconnects[shard_id] += 1
+        self._connected.add(shard_id)
+
+    async def _on_resumed(self) -> None:
+        self.reconnects[0] += 1
+
+    def sample(self) -> None:
+        now = time.monotonic()
+        if self._last and now > self._last[0]:
+            self.rate = (self._events - self._last[1]) * 60 / (now - self._last[0])
+        self._last = (now, self._events)
+
+    def snapshot(self) -> list[dict]:
+        """Una fila por shard local: id, conectada, latencia, rate limit, servidores, reconexiones."""
+        guilds = Counter(guild.shard_id for guild in self.bot.guilds)
+        if isinstance(self.bot, commands.AutoShardedBot):
+            shards = [
+                (sid, info.latency, not info.is_closed(), info.is_ws_ratelimited())
+                for sid, info in sorted(self.bot.shards.items())
+            ]
+        else:
+            shards = [(0, self.bot.latency, not self.bot.is_closed(), self.bot.is_ws_ratelimited())]
+        return [
+            {
+                "id": sid,
+                "connected": connected,
+                "latency": latency,
+                "ratelimited": ratelimited,
+                "guilds": guilds.get(sid, 0),
+                "reconnects": self.reconnects.get(sid, 0),
+            }
+            for sid, latency, connected, ratelimited in shards
+        ]
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        await self.bot.wait_until_ready()
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,66 @@
+import asyncio
+import inspect
+import sys
+from pathlib import Path
+
+import pytest
+
+# Los módulos del bot están en la raíz del repo, sin paquete
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    # Los tests `async def` corren cada uno en su event loop (sin pytest-asyncio)
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        kwargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+        asyncio.run(pyfuncitem.obj(**kwargs))
+        return True
+    return None
+
+
+@pytest.fixture
+def persistido() -> dict:
+    """Tabla falsa (guild_id, user_id) -> total, la que lee y escribe `contador`."""
+    return {}
+
+
+@pytest.fixture
+def contador(persistido):
+    from write_buffer import CounterBuffer
+
+    async def load(guild_id, user_id):
+        return persistido.get((guild_id, user_id))
+
+    async def write(rows):
+        for guild_id, user_id, delta in rows:
+            persistido[(guild_id, user_id)] = persistido.get((guild_id, user_id), 0) + delta
+
+    return CounterBuffer("test", load, write)
+
+
+@pytest.fixture
+def filas_tienda() -> list[dict]:
+    """Filas de la tabla `tienda`; un test puede modificarlas antes de recargar."""
+    return [
+        {"id": 1, "nombre": "Entrada VIP", "precio": 50},
+        {"id": 2, "nombre": "Rol Dorado", "precio": 20},
+        {"id": 3, "nombre": "Entrada General", "precio": 10},
+    ]
+
+
+@pytest.fixture
+def catalogo(filas_tienda):
+    from catalogo import Catalogo
+
+    async def load():
+        return list(filas_tienda)
+
+    return Catalogo(load)
+
+
+@pytest.fixture
+def config():
+    """GuildConfig sin base: los tests cargan `_valores` a mano."""
+    from guild_config import GuildConfig
+    return GuildConfig(lambda: None)
@@ -0,0 +1,35 @@
+from cache import LRUCache
+
+
+def test_expulsa_el_menos_usado():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" pasa a ser el menos usado
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_y_contadores(monkeypatch):
+    ahora = [100.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: ahora[0])
+    cache = LRUCache(ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    ahora[0] += 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+
+def test_adjust_solo_si_esta_y_discard_if():
+    cache = LRUCache()
+    cache.adjust("a", 5)
+    assert "a" not in cache
+    cache.set((1, 10), 5)
+    cache.set((2, 10), 5)
+    cache.adjust((1, 10), 2)
+    assert cache.get((1, 10)) == 7
+    assert cache.discard_if(lambda key: key[0] == 1) == 1
+    assert len(cache) == 1
@@ -0,0 +1,17 @@
+async def test_buscar_sin_distinguir_mayusculas_y_una_sola_carga(catalogo):
+    assert (await catalogo.buscar("  entrada vip ")).id == 1
+    assert await catalogo.buscar("nada") is None
+    assert [o.id for o in await catalogo.objetos()] == [3, 2, 1]
+
+
+async def test_sugerencias_por_prefijo_y_parecidos(catalogo):
+    assert [o.id for o in await catalogo.sugerencias("entr")] == [3, 1]
+    assert [o.id for o in await catalogo.sugerencias("rol dorad0")] == [2]
+
+
+async def test_invalidate_recarga(catalogo, filas_tienda):
+    assert await catalogo.buscar("nuevo") is None
+    filas_tienda.append({"id": 4, "nombre": "Nuevo", "precio": 1})
+    assert await catalogo.buscar("nuevo") is None  # sigue la copia en memoria
+    catalogo.invalidate()
+    assert (await catalogo.buscar("nuevo")).id == 4
@@ -0,0 +1,41 @@
+"""Contención de transferencias contra un Postgres de pruebas.
+
+Se saltea si no está BENCH_DATABASE_URL (la misma base que usa bench/).
+"""
+import asyncio
+import os
+import random
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.getenv("BENCH_DATABASE_URL"),
+                                reason="requiere BENCH_DATABASE_URL con un Postgres de pruebas")
+
+
+def test_transferencias_concurrentes_sin_doble_gasto_ni_deadlocks():
+    from bench import contencion
+    import database
+
+    async def main():
+        await database.setup()
+        cuentas = [contencion.USER_BASE + i for i in range(20)]
+        embudo = contencion.USER_BASE + len(cuentas)
+        transferencias = contencion.generar(3000, cuentas, embudo, random.Random(7))
+        try:
+            await contencion.sembrar(cuentas, 10.0)
+            iniciales = await contencion.saldos()
+            aceptadas, rechazadas, errores, segundos, latencias = await contencion.correr(
+                transferencias, 200, legado=False)
+            finales = await contencion.saldos()
+        finally:
+            await database.flush_writes()
+            await contencion.limpiar()
+            await database.close_pool()
+        return iniciales, finales, aceptadas, rechazadas, errores, latencias
+
+    iniciales, finales, aceptadas, rechazadas, errores, latencias = asyncio.run(main())
+    assert not errores  # ni deadlocks ni fallas de serialización que agoten los reintentos
+    assert len(latencias) == 3000
+    assert contencion.verificar(iniciales, finales, aceptadas) == []
+    # Con saldo inicial bajo tiene que haber de las dos: aceptadas y sin fondos
+    assert aceptadas and rechazadas
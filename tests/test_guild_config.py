@@ -0,0 +1,29 @@
+import pytest
+
+from guild_config import CLAVES, parse_valor
+
+
+def test_parse_valor():
+    assert parse_valor("canal_bumps", "<#123456789012345678>") == 123456789012345678
+    assert parse_valor("rol_bump", "<@&123456789012345678>") == 123456789012345678
+    assert parse_valor("monto_maximo", "2,5") == 2.5
+    with pytest.raises(ValueError):
+        parse_valor("monto_minimo", "-1")
+    with pytest.raises(ValueError):
+        parse_valor("canal_bumps", "general")
+
+
+def test_get_usa_el_default_si_no_hay_override(config):
+    config._valores = {1: {"monto_maximo": 50.0}}
+    assert config.get(1, "monto_maximo") == 50.0
+    assert config.get(2, "monto_maximo") == CLAVES["monto_maximo"].default
+
+
+def test_validar_el_par_de_montos(config):
+    config._valores = {1: {"monto_maximo": 5.0}}
+    config.validar(1, "monto_minimo", 5.0)
+    config.validar(1, "canal_bumps", 1)
+    with pytest.raises(ValueError):
+        config.validar(1, "monto_minimo", 6.0)
+    with pytest.raises(ValueError):
+        config.validar(1, "monto_maximo", CLAVES["monto_minimo"].default / 2)
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from leaderboard import GuildBoard, Leaderboards
+from leaderboard import format_rank
+
+
+def test_top_ordena_por_puntaje():
+    board = GuildBoard({1: 10, 2: 30, 3: 20})
+    assert board.top(2) == [(2, 30), (3, 20)]
+    assert len(board) == 3
+
+
+def test_update_y_remove_mantienen_el_orden():
+    board = GuildBoard({1: 10, 2: 20})
+    board.update(1, 50)
+    assert board.top(2) == [(1, 50), (2, 20)]
+    board.remove(1)
+    assert board.top(2) == [(2, 20)]
+    assert board.score(1) is None
+    board.remove(1)  # quitar algo ausente no falla
+
+
+async def test_leaderboards_carga_una_vez_y_aplica_escrituras_tempranas():
+    cargas = 0
+    seguir = asyncio.Event()
+
+    async def load(guild_id):
+        nonlocal cargas
+        cargas += 1
+        await seguir.wait()
+        return {1: 10, 2: 20}
+
+    boards = Leaderboards(load)
+    primera = asyncio.create_task(boards.get(7))
+    segunda = asyncio.create_task(boards.get(7))
+    await asyncio.sleep(0)
+    boards.update(7, 1, 99)   # llega mientras se carga
+    boards.remove(7, 2)
+    seguir.set()
+    a, b = await asyncio.gather(primera, segunda)
+    assert a is b
+    assert cargas == 1
+    assert a.top(5) == [(1, 99)]
+
+
+async def test_leaderboards_reintenta_si_la_carga_falla():
+    intentos = 0
+
+    async def load(guild_id):
+        nonlocal intentos
+        intentos += 1
+        if intentos == 1:
+            raise RuntimeError("base caída")
+        return {1: 1}
+
+    boards = Leaderboards(load)
+    with pytest.raises(RuntimeError):
+        await boards.get(7)
+    assert (await boards.get(7)).top(1) == [(1, 1)]
+
+
+async def test_clear_guild():
+    async def load(guild_id):
+        return {1: 10}
+
+    boards = Leaderboards(load)
+    await boards.get(7)
+    boards.clear_guild(7)
+    assert len(await boards.get(7)) == 0
+
+
+def test_rank_con_empates():
+    board = GuildBoard({1: 10, 2: 30, 3: 30, 4: 5})
+    assert board.rank(2) == (1, 4)
+    assert board.rank(3) == (1, 4)  # empate: mismo puesto
+    assert board.rank(1) == (3, 4)
+    assert board.rank(99) is None
+
+
+def test_rank_cuenta_como_top_solo_los_positivos():
+    board = GuildBoard({1: 10, 2: 0, 3: -4, 4: 5})
+    assert board.rank(1) == (1, 2)
+    assert board.rank(4) == (2, 2)
+    assert board.rank(2) is None
+    assert board.rank(3) is None
+
+
+def test_format_rank():
+    assert format_rank(1, 200) == "#1 de 200, top 1%"
+    assert format_rank(50, 100) == "#50 de 100, top 50%"
+
+
+def test_paginacion_por_cursor():
+    board = GuildBoard({uid: 100 - uid for uid in range(10)})
+    start, filas = board.page_after(None, 3)
+    assert start == 0 and [uid for uid, _ in filas] == [0, 1, 2]
+    uid, score = filas[-1]
+    start, filas = board.page_after((score, uid), 3)
+    assert start == 3 and [uid for uid, _ in filas] == [3, 4, 5]
+    uid, score = filas[0]
+    start, filas = board.page_before((score, uid), 3)
+    assert start == 0 and [uid for uid, _ in filas] == [0, 1, 2]
+    assert board.page_of(7, 3)[0] == 6
+
+
+def test_count_above():
+    board = GuildBoard({1: 0, 2: 0, 3: 5})
+    assert board.count_above(0) == 1
@@ -0,0 +1,11 @@
+from metrics import QUERIES, query_label
+
+
+def test_query_label_usa_la_sentencia_completa_normalizada():
+    prefijo = "SELECT balance FROM euros WHERE guild_id = $1 AND user_id = $2 AND balance > 0 ORDER BY balance"
+    a = query_label(prefijo + " LIMIT 10")
+    b = query_label(prefijo + "\n   LIMIT 25")  # mismo texto salvo espacios y literales
+    c = query_label(prefijo + " DESC LIMIT 10")  # difiere después de los 80 caracteres
+    assert a == b
+    assert a != c
+    assert QUERIES[a] == prefijo.replace("> 0", "> ?") + " LIMIT ?"
@@ -0,0 +1,33 @@
+from migrate import MIGRATIONS_DIR, NO_TRANSACTION_MARK, discover
+
+
+def test_discover_ordena_por_version_y_detecta_sin_transaccion(tmp_path):
+    (tmp_path / "0002_indices.sql").write_text(
+        f"{NO_TRANSACTION_MARK}\nCREATE INDEX CONCURRENTLY a ON t (x);\nCREATE INDEX CONCURRENTLY b ON t (y);\n")
+    (tmp_path / "0001_inicial.sql").write_text("-- tablas\nCREATE TABLE t (x INT);\n")
+    (tmp_path / "notas.txt").write_text("no es una migración")
+
+    migraciones = discover(tmp_path)
+    assert [(m.version, m.name) for m in migraciones] == [(1, "inicial"), (2, "indices")]
+    inicial, indices = migraciones
+    assert inicial.transactional
+    assert not indices.transactional
+    assert len(indices.statements()) == 2
+
+
+def test_migraciones_del_repo_sin_versiones_repetidas():
+    versiones = [m.version for m in discover(MIGRATIONS_DIR)]
+    assert versiones == sorted(set(versiones))
+
+
+def test_discover_incluye_migraciones_python(tmp_path):
+    (tmp_path / "0001_inicial.sql").write_text("CREATE TABLE t (x INT);\n")
+    (tmp_path / "0002_datos.py").write_text(
+        '"""Backfill."""\nTRANSACTIONAL = False\n\nasync def upgrade(conn):\n    pass\n\n'
+        'async def downgrade(conn):\n    pass\n')
+
+    inicial, datos = discover(tmp_path)
+    assert not inicial.reversible
+    assert datos.module is not None and not datos.transactional and datos.reversible
+    assert datos.describe() == "Backfill."
+    assert any(m.module is not None for m in discover(MIGRATIONS_DIR))
@@ -0,0 +1,24 @@
+import pytest
+
+from querylog import analyzable
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT user_id, count FROM bumps WHERE guild_id = $1",
+    "SELECT count(*) AS n, COALESCE(sum(balance), 0) FROM euros WHERE user_id IN (1, 2)",
+    "WITH t AS (SELECT balance FROM euros) SELECT max(balance) FROM t",
+])
+def test_select_de_tablas_se_analiza(sql):
+    assert analyzable(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT pg_advisory_lock($1)",
+    "SELECT pg_advisory_xact_lock($1)",
+    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid",
+    "SELECT ok, sender_balance FROM transferir_euros($1, $2, $3, $4)",
+    "WITH previo AS (SELECT balance FROM euros FOR UPDATE) UPDATE euros SET balance = 0",
+    "DELETE FROM euros WHERE guild_id = $1",
+])
+def test_lo_que_escribe_o_llama_funciones_no_se_analiza(sql):
+    assert not analyzable(sql)
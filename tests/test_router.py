@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from router import MessageRouter
+
+
+def _mensaje(canal, autor, contenido="Hola", bot=False, guild=1):
+    return SimpleNamespace(
+        channel=SimpleNamespace(id=canal),
+        author=SimpleNamespace(id=autor, bot=bot),
+        guild=SimpleNamespace(id=guild),
+        content=contenido,
+    )
+
+
+def _handler(nombre, vistos):
+    async def handler(message, content):
+        vistos.append((nombre, content))
+    handler.__qualname__ = nombre
+    return handler
+
+
+async def test_despacha_solo_las_rutas_que_coinciden():
+    vistos = []
+    router = MessageRouter()
+    router.register(_handler("canal", vistos), channel_id=100)
+    router.register(_handler("canal_autor", vistos), channel_id=100, author_id=7)
+    router.register(_handler("autor", vistos), author_id=8)
+    router.register(_handler("global", vistos), ignore_bots=True)
+
+    await router.dispatch(_mensaje(100, 7, "  HOLA "))
+    assert sorted(vistos) == [("canal", "hola"), ("canal_autor", "hola"), ("global", "hola")]
+
+    vistos.clear()
+    await router.dispatch(_mensaje(100, 8, bot=True))
+    assert sorted(n for n, _ in vistos) == ["autor", "canal"]
+    assert router.messages == 2
+
+
+async def test_unregister_y_errores_contados():
+    async def falla(message, content):
+        raise RuntimeError("roto")
+
+    router = MessageRouter()
+    router.register(falla, channel_id=1, name="falla")
+    await router.dispatch(_mensaje(1, 2))
+    assert router.stats["falla"].calls == 1
+    assert router.stats["falla"].errors == 1
+    router.unregister(falla)
+    await router.dispatch(_mensaje(1, 2))
+    assert router.stats["falla"].calls == 1
+
+
+async def test_channel_key_sale_de_la_configuracion(config):
+    config._valores = {1: {"canal_bumps": 300}}
+    vistos = []
+    router = MessageRouter(config)
+    router.register(_handler("bumps", vistos), channel_key="canal_bumps")
+    await router.dispatch(_mensaje(300, 7, guild=1))
+    await router.dispatch(_mensaje(300, 7, guild=2))  # en otro servidor es otro canal
+    assert vistos == [("bumps", "hola")]
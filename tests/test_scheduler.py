@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from scheduler import Scheduler
+
+
+async def test_dispara_en_orden_y_respeta_reprogramar_y_cancelar():
+    disparos = []
+    listo = asyncio.Event()
+
+    async def callback(key, payload, due):
+        disparos.append((key, payload))
+        if len(disparos) == 2:
+            listo.set()
+
+    sched = Scheduler(callback)
+    ahora = time.time()
+    sched.schedule("b", ahora + 0.04, "B")
+    sched.schedule("a", ahora + 0.02, "A")
+    sched.schedule("c", ahora + 0.01, "C")
+    sched.cancel("c")
+    sched.schedule("b", ahora + 0.03, "B2")  # reprogramado: la vieja se descarta
+    sched.start()
+    await asyncio.wait_for(listo.wait(), 1)
+    await asyncio.sleep(0.05)
+    await sched.close()
+    assert disparos == [("a", "A"), ("b", "B2")]
+    assert len(sched) == 0
+
+
+async def test_un_error_en_el_callback_no_frena_el_driver():
+    listo = asyncio.Event()
+
+    async def callback(key, payload, due):
+        if key == "malo":
+            raise RuntimeError("falló")
+        listo.set()
+
+    sched = Scheduler(callback)
+    ahora = time.time()
+    sched.schedule("malo", ahora)
+    sched.schedule("bueno", ahora + 0.01)
+    sched.start()
+    await asyncio.wait_for(listo.wait(), 1)
+    await sched.close()
+
+
+async def test_upcoming_y_compactacion():
+    async def callback(key, payload, due):
+        pass
+
+    sched = Scheduler(callback)
+    for i in range(200):
+        sched.schedule("x", 1000 + i)
+    assert len(sched._heap) < 200
+    sched.schedule("y", 500)
+    assert [key for key, _ in sched.upcoming()] == ["y", "x"]
+    assert sched.get("x").due == 1199
+
+
+async def test_un_callback_lento_no_atrasa_a_los_demas():
+    rapido = asyncio.Event()
+    bloqueado = asyncio.Event()
+
+    async def callback(key, payload, due):
+        if key == "lento":
+            await bloqueado.wait()
+        else:
+            rapido.set()
+
+    sched = Scheduler(callback)
+    ahora = time.time()
+    sched.schedule("lento", ahora)
+    sched.schedule("rapido", ahora + 0.01)
+    sched.start()
+    await asyncio.wait_for(rapido.wait(), 1)
+    await sched.close()  # cancela el que sigue esperando
+    assert not sched._running
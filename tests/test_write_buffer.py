@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+from write_buffer import CounterBuffer
+
+
+async def test_add_suma_sobre_lo_persistido(contador, persistido):
+    persistido[(1, 10)] = 5
+    assert await contador.add(1, 10, 2) == 7
+    assert await contador.add(1, 10, 3) == 10
+    assert contador.pending(1, 10) == 5
+    assert persistido[(1, 10)] == 5
+    await contador.flush()
+    assert persistido[(1, 10)] == 10
+    assert contador.pending(1, 10) == 0
+    assert not contador.has_pending(1, 10)
+
+
+async def test_flush_reencola_si_falla():
+    async def load(guild_id, user_id):
+        return 0
+
+    async def write(rows):
+        raise RuntimeError("base caída")
+
+    buf = CounterBuffer("test", load, write)
+    await buf.add(1, 10, 4)
+    with pytest.raises(RuntimeError):
+        await buf.flush()
+    assert buf.pending(1, 10) == 4
+    assert buf.has_pending(1, 10)
+
+
+async def test_assign_descarta_lo_pendiente(contador, persistido):
+    await contador.add(1, 10, 3)
+    escrito = []
+
+    async def write():
+        escrito.append(7)
+
+    await contador.assign(1, 10, 7, write)
+    assert escrito == [7]
+    assert not contador.has_pending(1, 10)
+    assert await contador.add(1, 10, 1) == 8
+
+
+async def test_forget_guild_y_forget_no_pierden_lo_pendiente(contador, persistido):
+    await contador.add(1, 10, 1)
+    await contador.add(2, 10, 1)
+    contador.forget_guild(1)
+    persistido[(1, 10)] = 5  # cambió por otra vía: se relee
+    assert contador.has_pending(1, 10)
+    assert await contador.add(1, 10, 1) == 7
+    contador.forget(2, 10)
+    assert contador.has_pending(2, 10)
+
+
+async def test_direct_escribe_lo_pendiente_y_frena_los_flush(contador, persistido):
+    await contador.add(1, 10, 3)
+    await contador.add(1, 11, 2)
+    async with contador.direct(1, 10):
+        assert persistido == {(1, 10): 3, (1, 11): 2}
+        await contador.add(1, 11, 1)
+        flush = asyncio.create_task(contador.flush())
+        await asyncio.sleep(0.01)
+        assert not flush.done()  # espera a que termine la escritura directa
+        persistido[(1, 10)] = 0  # lo que hizo la escritura directa
+    await flush
+    assert persistido[(1, 11)] == 3
+    assert await contador.add(1, 10, 1) == 1  # el total se releyó
+
+
+async def test_exclusive_escribe_todo_antes(contador, persistido):
+    await contador.add(1, 10, 3)
+
+    async def borrar():
+        vistos = dict(persistido)
+        persistido.clear()
+        return vistos
+
+    assert await contador.exclusive(borrar) == {(1, 10): 3}
+    assert not contador.has_pending(1, 10)
+
+
+async def test_on_flushed_recibe_el_lote(contador):
+    vistos = []
+    contador._on_flushed = vistos.extend
+    await contador.add(1, 10, 2)
+    await contador.add(1, 11, 3)
+    await contador.flush()
+    assert sorted(vistos) == [(1, 10, 2), (1, 11, 3)]
+
+
+async def test_batch_writer_reencola_respetando_el_limite():
+    from write_buffer import BatchWriter
+
+    escritos = []
+    falla = True
+
+    async def write(batch):
+        if falla:
+            raise RuntimeError("base caída")
+        escritos.extend(batch)
+
+    writer = BatchWriter("test", write, max_pending=3)
+    writer.add((0,))
+    writer.add((1,))
+    with pytest.raises(RuntimeError):
+        await writer.flush()
+    writer.add((2,))
+    writer.add((3,))  # pasa el límite: se descarta la más vieja
+    assert len(writer) == 3
+    assert writer.dropped == 1
+    falla = False
+    await writer.flush()
+    assert escritos == [(1,), (2,), (3,)]
+    assert len(writer) == 0
+
+
+async def test_has_pending_incluye_el_lote_en_escritura():
+    empezo, seguir = asyncio.Event(), asyncio.Event()
+
+    async def load(guild_id, user_id):
+        return 0
+
+    async def write(rows):
+        empezo.set()
+        await seguir.wait()
+
+    buf = CounterBuffer("test", load, write)
+    await buf.add(1, 10, 1)
+    flush = asyncio.create_task(buf.flush())
+    await empezo.wait()
+    assert buf.has_pending(1, 10)
+    assert buf.pending(1, 10) == 1
+    seguir.set()
+    await flush
+    assert not buf.has_pending(1, 10)
+
+
+async def test_max_keys_olvida_los_menos_usados_sin_perder_pendientes(contador, persistido):
+    contador.max_keys = 2
+    persistido[(1, 1)] = 100
+    await contador.add(1, 1, 1)
+    await contador.add(1, 2, 1)
+    await contador.add(1, 3, 1)  # expulsa (1, 1), que sigue pendiente
+    assert len(contador._totals) == 2
+    # Al volver se relee persistido + pendiente
+    assert await contador.add(1, 1, 1) == 102
+    await contador.flush()
+    assert persistido[(1, 1)] == 102
+
+
+async def test_unwritten_incluye_el_lote_en_escritura_y_merge_rows_no_repite():
+    from write_buffer import BatchWriter, merge_rows
+
+    empezo, seguir = asyncio.Event(), asyncio.Event()
+
+    async def write(batch):
+        empezo.set()
+        await seguir.wait()
+
+    writer = BatchWriter("test", write)
+    writer.add((1, "a"))
+    writer.add((2, "b"))
+    flush = asyncio.create_task(writer.flush())
+    await empezo.wait()
+    writer.add((3, "a"))
+    assert writer.unwritten(lambda row: row[1] == "a") == [(1, "a"), (3, "a")]
+    seguir.set()
+    await flush
+    assert writer.unwritten(lambda row: True) == [(3, "a")]
+
+    base = [{"ts": 2, "v": "x"}, {"ts": 1, "v": "y"}]
+    sin_escribir = [{"ts": 2, "v": "x"}, {"ts": 3, "v": "z"}]  # la primera ya llegó a la base
+    assert merge_rows(base, sin_escribir, ("ts", "v"), 2) == [{"ts": 3, "v": "z"}, {"ts": 2, "v": "x"}]
@@ -1,16 +1,20 @@
+import asyncio
 import discord
 from discord.ext import commands
 import json
 from datetime import datetime, timezone
+import database
+from leaderboard import format_rank
 
 class UserCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.user_commands_channel_id = 1392893710848622734
         self.bump_data_file = "bump_data.json"
-        self.bump_data = self.load_bump_data()
+        self.bump_data = {}
 
-        self.rol_entrada_id = 1394791826812043326
+    async def cog_load(self):
+        # Lectura de disco fuera del event loop
+        self.bump_data = await asyncio.to_thread(self.load_bump_data)
 
     def load_bump_data(self) -> dict:
         try:
@@ -25,27 +29,29 @@ class UserCommands(commands.Cog):
 
     @commands.command(name="misbumps")
     async def misbumps(self, ctx: commands.Context):
-        if ctx.channel.id != self.user_commands_channel_id:
+        canal_id = database.config.get(ctx.guild.id, "canal_comandos")
+        if ctx.channel.id != canal_id:
             embed = discord.Embed(
-                description=f"⚠️ Este comando sólo puede usarse en <#{self.user_commands_channel_id}>.",
+                description=f"⚠️ Este comando sólo puede usarse en <#{canal_id}>.",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
             return
 
-        from database import get_bumps
-        bumps = await get_bumps(ctx.author.id, ctx.guild.id)
+        bumps = await database.get_bumps(ctx.author.id, ctx.guild.id)
 
         embed = discord.Embed(
             description=f"💪 {ctx.author.mention}, actualmente tenés **{bumps}** bumps en total. ¡Excelente trabajo!",
             color=0x00ffff,
             timestamp=datetime.now(timezone.utc)
         )
+        if rank := await database.bump_rank(ctx.author.id, ctx.guild.id):
+            embed.add_field(name="🏅 Ranking", value=format_rank(*rank))
         await ctx.send(embed=embed)
 
     @commands.command(name='tienda')
     async def ver_tienda(self, ctx):
-        productos = await self.bot.db.fetch("SELECT nombre, precio FROM tienda ORDER BY precio ASC")
+        productos = await database.catalogo.objetos()
 
         if not productos:
             embed = discord.Embed(
@@ -55,7 +61,7 @@ class UserCommands(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        descripcion = "\n".join([f"• **{p['nombre']}** – {p['precio']}€" for p in productos])
+        descripcion = "\n".join([f"• **{p.nombre}** – {p.precio}€" for p in productos])
         embed = discord.Embed(
             title="🛒 Productos Disponibles",
             description=descripcion,
@@ -64,16 +70,19 @@ class UserCommands(commands.Cog):
         embed.set_footer(text="Usá !comprar nombre_del_objeto para adquirirlo")
         await ctx.send(embed=embed)
 
+    async def objeto_no_encontrado(self, ctx, nombre_objeto: str, mensaje: str):
+        # Sugiere objetos que empiecen igual (o se parezcan) al nombre escrito
+        sugerencias = await database.catalogo.sugerencias(nombre_objeto)
+        if sugerencias:
+            mensaje += "\n¿Quisiste decir: " + ", ".join(f"**{o.nombre}**" for o in sugerencias) + "?"
+        embed = discord.Embed(description=mensaje, color=discord.Color.red())
+        await ctx.send(embed=embed)
+
     @commands.command(name='inventario')
     async def ver_inventario(self, ctx, miembro: discord.Member = None):
         miembro = miembro or ctx.author
 
-        inventario = await self.bot.db.fetch("""
-            SELECT t.nombre, i.cantidad
-            FROM inventario i
-            JOIN tienda t ON i.objeto_id = t.id
-            WHERE i.usuario_id = $1
-        """, miembro.id)
+        inventario = await database.get_inventario(miembro.id, ctx.guild.id)
 
         if not inventario:
             embed = discord.Embed(
@@ -93,38 +102,16 @@ class UserCommands(commands.Cog):
 
     @commands.command(name='comprar')
     async def comprar_objeto(self, ctx, *, nombre_objeto: str):
-        nombre_objeto = nombre_objeto.lower()
-        user_id = str(ctx.author.id)
-        guild_id = str(ctx.guild.id)
-
-        # Buscar producto en tienda
-        producto = await self.bot.db.fetchrow(
-            "SELECT id, nombre, precio FROM tienda WHERE LOWER(nombre) = $1",
-            nombre_objeto
-        )
+        objeto = await database.catalogo.buscar(nombre_objeto)
+        # Cobra y suma al inventario en una sola sentencia atómica
+        producto = objeto and await database.comprar_objeto(ctx.author.id, ctx.guild.id, objeto.id)
         if not producto:
-            embed = discord.Embed(
-                description="❌ Ese objeto no existe. Usá `!tienda` para ver los productos.",
-                color=discord.Color.red()
+            await self.objeto_no_encontrado(
+                ctx, nombre_objeto, "❌ Ese objeto no existe. Usá `!tienda` para ver los productos."
             )
-            await ctx.send(embed=embed)
             return
 
-        # Consultar o crear saldo
-        cuenta = await self.bot.db.fetchrow(
-            "SELECT balance FROM euros WHERE user_id = $1 AND guild_id = $2",
-            user_id, guild_id
-        )
-        if not cuenta:
-            await self.bot.db.execute(
-                "INSERT INTO euros (user_id, guild_id, balance) VALUES ($1, $2, 0)",
-                user_id, guild_id
-            )
-            balance = 0
-        else:
-            balance = cuenta["balance"]
-
-        if balance < producto["precio"]:
+        if not producto["ok"]:
             embed = discord.Embed(
                 description=f"💸 No tenés suficiente saldo para comprar **{producto['nombre']}**.",
                 color=discord.Color.red()
@@ -132,29 +119,7 @@ class UserCommands(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        # Descontar dinero
-        await self.bot.db.execute(
-            "UPDATE euros SET balance = balance - $1 WHERE user_id = $2 AND guild_id = $3",
-            producto["precio"], user_id, guild_id
-        )
-
-        # Verificar si ya tiene el objeto
-        existente = await self.bot.db.fetchrow(
-            "SELECT id, cantidad FROM inventario WHERE usuario_id = $1 AND objeto_id = $2",
-            ctx.author.id, producto['id']
-        )
-        if existente:
-            await self.bot.db.execute(
-                "UPDATE inventario SET cantidad = cantidad + 1 WHERE id = $1",
-                existente['id']
-            )
-        else:
-            await self.bot.db.execute(
-                "INSERT INTO inventario (usuario_id, objeto_id, cantidad) VALUES ($1, $2, 1)",
-                ctx.author.id, producto['id']
-            )
-
-        nuevo_saldo = balance - producto["precio"]
+        nuevo_saldo = producto["balance"]
         embed = discord.Embed(
             title="Compra exitosa 🛒",
             description=f"✅ Has comprado **{producto['nombre']}** por {producto['precio']}€.\n"
@@ -166,31 +131,18 @@ class UserCommands(commands.Cog):
     @commands.command(name='usar')
     async def usar_objeto(self, ctx, *, nombre_objeto: str):
         nombre_objeto = nombre_objeto.lower()
-        user_id = str(ctx.author.id)
         guild = ctx.guild
 
-        # Buscar objeto en tienda
-        producto = await self.bot.db.fetchrow(
-            "SELECT id, nombre FROM tienda WHERE LOWER(nombre) = $1",
-            nombre_objeto
-        )
+        objeto = await database.catalogo.buscar(nombre_objeto)
+        # Descuenta una unidad (o borra la fila) en una sola sentencia
+        producto = objeto and await database.usar_objeto(ctx.author.id, guild.id, objeto.id)
         if not producto:
-            embed = discord.Embed(
-                description="❌ Ese objeto no existe.",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
+            await self.objeto_no_encontrado(ctx, nombre_objeto, "❌ Ese objeto no existe.")
             return
 
-        objeto_id = producto['id']
         nombre_real = producto['nombre']
 
-        # Verificar si el usuario tiene el objeto en inventario
-        inventario = await self.bot.db.fetchrow(
-            "SELECT id, cantidad FROM inventario WHERE usuario_id = $1 AND objeto_id = $2",
-            ctx.author.id, objeto_id
-        )
-        if not inventario or inventario['cantidad'] < 1:
+        if producto['restante'] is None:
             embed = discord.Embed(
                 description="❌ No tenés ese objeto en tu inventario.",
                 color=discord.Color.red()
@@ -198,21 +150,9 @@ class UserCommands(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        # Restar 1 del inventario o borrar si queda 0
-        if inventario['cantidad'] == 1:
-            await self.bot.db.execute(
-                "DELETE FROM inventario WHERE id = $1",
-                inventario['id']
-            )
-        else:
-            await self.bot.db.execute(
-                "UPDATE inventario SET cantidad = cantidad - 1 WHERE id = $1",
-                inventario['id']
-            )
-
         # Solo para el objeto "entrada" asignar el rol
         if nombre_objeto == "entrada":
-            rol = guild.get_role(self.rol_entrada_id)
+            rol = guild.get_role(database.config.get(guild.id, "rol_entrada"))
             if not rol:
                 embed = discord.Embed(
                     description="❌ No se encontró el rol para asignar.",
@@ -0,0 +1,143 @@
+# views/ranking_buttons.py
+
+import math
+from typing import Awaitable, Callable, Optional
+
+import discord
+
+from leaderboard import Leaderboards
+
+# Paginadores registrados por los cogs ("e" = euros, "b" = bumps)
+PAGINADORES: dict[str, "Paginador"] = {}
+
+
+def _positivas(filas: list) -> list:
+    return [(uid, score) for uid, score in filas if score > 0]
+
+
+class Paginador:
+    """Arma las páginas de un ranking a partir de su índice en memoria."""
+
+    def __init__(
+        self,
+        tipo: str,
+        boards: Leaderboards,
+        titulo: str,
+        color,
+        formatear: Callable[[discord.Guild, int, int, float], str],
+        preparar: Optional[Callable[[discord.Guild, list[int]], Awaitable[None]]] = None,
+    ) -> None:
+        self.tipo = tipo
+        self.boards = boards
+        self.titulo = titulo
+        self.color = color
+        self.formatear = formatear  # (guild, puesto, user_id, puntaje) -> línea
+        self.preparar = preparar    # se espera antes de formatear (p. ej. resolver nombres)
+        PAGINADORES[tipo] = self
+
+    async def primera(self, guild: discord.Guild, tam: int):
+        board = await self.boards.get(guild.id)
+        start, filas = board.page_after(None, tam)
+        return await self._render(guild, board, start, filas, tam)
+
+    async def siguiente(self, guild: discord.Guild, cursor: tuple[float, int], tam: int):
+        board = await self.boards.get(guild.id)
+        start, filas = board.page_after(cursor, tam)
+        return await self._render(guild, board, start, filas, tam)
+
+    async def anterior(self, guild: discord.Guild, cursor: tuple[float, int], tam: int):
+        board = await self.boards.get(guild.id)
+        start, filas = board.page_before(cursor, tam)
+        return await self._render(guild, board, start, filas, tam)
+
+    async def del_usuario(self, guild: discord.Guild, user_id: int, tam: int):
+        board = await self.boards.get(guild.id)
+        pagina = board.page_of(user_id, tam)
+        if pagina is None or (board.score(user_id) or 0) <= 0:
+            return None
+        return await self._render(guild, board, *pagina, tam)
+
+    async def _render(self, guild, board, start, filas, tam):
+        """Devuelve (embed, view), o None si el ranking está vacío."""
+        total = board.count_above(0)  # sólo entran puntajes positivos
+        filas = _positivas(filas)
+        if not filas:
+            if total == 0:
+                return None
+            # El cursor quedó fuera de rango (el ranking cambió): primera página
+            start, filas = board.page_after(None, tam)
+            filas = _positivas(filas)
+
+        if self.preparar:
+            await self.preparar(guild, [uid for uid, _ in filas])
+        description = "\n".join(
+            self.formatear(guild, start + i, uid, score)
+            for i, (uid, score) in enumerate(filas, start=1)
+        )
+        embed = discord.Embed(title=self.titulo, description=description, color=self.color)
+        embed.set_footer(text=f"Página {start // tam + 1} de {math.ceil(total / tam)} · {total} usuarios")
+
+        primera, ultima = filas[0], filas[-1]
+        view = discord.ui.View(timeout=None)
+        view.add_item(RankingButton(self.tipo, "prev", tam, (primera[1], primera[0]), disabled=start == 0))
+        view.add_item(RankingButton(self.tipo, "me", tam))
+        view.add_item(RankingButton(self.tipo, "next", tam, (ultima[1], ultima[0]),
+                                    disabled=start + len(filas) >= total))
+        return embed, view
+
+
+ETIQUETAS = {"prev": "◀ Anterior", "me": "📍 Mi posición", "next": "Siguiente ▶"}
+
+
+class RankingButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"rank:(?P<tipo>\w):(?P<accion>prev|me|next):(?P<tam>\d+):(?P<score>[^:]*):(?P<uid>\d*)",
+):
+    """Botón persistente: el cursor de la página viaja en el custom_id."""
+
+    def __init__(self, tipo: str, accion: str, tam: int,
+                 cursor: Optional[tuple[float, int]] = None, disabled: bool = False) -> None:
+        self.tipo = tipo
+        self.accion = accion
+        self.tam = tam
+        self.cursor = cursor
+        score, uid = cursor if cursor else ("", "")
+        super().__init__(
+            discord.ui.Button(
+                label=ETIQUETAS[accion],
+                style=discord.ButtonStyle.primary if accion == "me" else discord.ButtonStyle.secondary,
+                custom_id=f"rank:{tipo}:{accion}:{tam}:{score}:{uid}",
+                disabled=disabled,
+            )
+        )
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        cursor = None
+        if match["uid"]:
+            cursor = (float(match["score"]), int(match["uid"]))
+        tam = min(max(int(match["tam"]), 1), 20)
+        return cls(match["tipo"], match["accion"], tam, cursor)
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        paginador = PAGINADORES.get(self.tipo)
+        if paginador is None:
+            await interaction.response.send_message("⚠️ Este ranking ya no está disponible.", ephemeral=True)
+            return
+
+        guild = interaction.guild
+        if self.accion == "me":
+            pagina = await paginador.del_usuario(guild, interaction.user.id, self.tam)
+            if pagina is None:
+                await interaction.response.send_message("📭 Todavía no aparecés en este ranking.", ephemeral=True)
+                return
+        elif self.accion == "next":
+            pagina = await paginador.siguiente(guild, self.cursor, self.tam)
+        else:
+            pagina = await paginador.anterior(guild, self.cursor, self.tam)
+
+        if pagina is None:
+            await interaction.response.send_message("📭 El ranking está vacío.", ephemeral=True)
+            return
+        embed, view = pagina
+        await interaction.response.edit_message(embed=embed, view=view)
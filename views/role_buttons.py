@@ -2,6 +2,8 @@
 
 import discord
 
+from database import config
+
 class RoleButtonView(discord.ui.View):
     def __init__(self, role_id: int):
         super().__init__(timeout=None)
@@ -31,8 +33,7 @@ class VerificacionView(discord.ui.View):
 
     @discord.ui.button(label="✅ Verificarse", style=discord.ButtonStyle.success, custom_id="verificar_button")
     async def verificar(self, interaction: discord.Interaction, button: discord.ui.Button):
-        rol_id = 1391832974361886740
-        rol = interaction.guild.get_role(rol_id)
+        rol = interaction.guild.get_role(config.get(interaction.guild.id, "rol_verificado"))
 
         if rol is None:
             await interaction.response.send_message(
@@ -59,8 +60,7 @@ class VerAvisosView(discord.ui.View):
 
     @discord.ui.button(emoji="🔔", label="Notificaciones", style=discord.ButtonStyle.primary, custom_id="rol_avisos")
     async def toggle_notificaciones(self, interaction: discord.Interaction, button: discord.ui.Button):
-        rol_id = 1394757542919540776
-        rol = interaction.guild.get_role(rol_id)
+        rol = interaction.guild.get_role(config.get(interaction.guild.id, "rol_avisos"))
 
         if rol is None:
             await interaction.response.send_message("❌ No encontré el rol de notificaciones. Contactá a un admin.", ephemeral=True)
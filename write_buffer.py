@@ -0,0 +1,294 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Hashable, Optional, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+Number = Union[int, float]
+Key = tuple[Hashable, Hashable]  # (guild_id, user_id)
+T = TypeVar("T")
+
+
+class CounterBuffer:
+    """Buffer write-behind de contadores por (guild, usuario).
+
+    Los incrementos se suman en memoria y se devuelve el total al instante;
+    un único task los escribe en lote cada `interval` segundos o en cuanto
+    hay `threshold` claves pendientes. `close()` garantiza el último flush.
+    Se recuerdan a lo sumo `max_keys` totales; los menos usados se olvidan y
+    se vuelven a leer de la base la próxima vez.
+
+    Las escrituras que van directo a la base (débitos, transferencias) usan
+    `direct`: un flush nunca corre a la vez que ellas.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        load: Callable[[Hashable, Hashable], Awaitable[Number]],
+        write: Callable[[list[tuple[Hashable, Hashable, Number]]], Awaitable[None]],
+        interval: float = 5.0,
+        threshold: int = 200,
+        on_flushed: Optional[Callable[[list[tuple[Hashable, Hashable, Number]]], None]] = None,
+        max_keys: int = 50000,
+    ) -> None:
+        self.name = name
+        self._load = load      # lee el total persistido de una clave
+        self._write = write    # persiste una lista de (guild, user, delta)
+        self._on_flushed = on_flushed  # se llama con el lote ya escrito
+        self.interval = interval
+        self.threshold = threshold
+        self.max_keys = max_keys
+
+        self._totals: OrderedDict[Key, Number] = OrderedDict()  # total conocido (persistido + pendiente), LRU
+        self._pending: dict[Key, Number] = {}  # deltas todavía no escritos
+        self._inflight: dict[Key, Number] = {}  # lote que se está escribiendo
+        self._lock = asyncio.Lock()
+        self._writers = 0  # escrituras directas en curso
+        self._idle = asyncio.Event()  # sin escrituras directas
+        self._idle.set()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # ───────────── API ─────────────
+    async def add(self, guild_id, user_id, delta: Number) -> Number:
+        """Suma `delta` y devuelve el total actualizado sin esperar a la base."""
+        key = (guild_id, user_id)
+        if key not in self._totals:
+            # Primera vez que vemos la clave: se lee bajo el lock para no
+            # cruzarse con un flush que esté moviendo pendientes a la base.
+            async with self._lock:
+                if key not in self._totals:
+                    base = await self._load(guild_id, user_id) or 0
+                    self._totals[key] = base + self._pending.get(key, 0)
+
+        self._totals[key] += delta
+        self._totals.move_to_end(key)
+        self._pending[key] = self._pending.get(key, 0) + delta
+        while len(self._totals) > self.max_keys:
+            # Olvidar un total es seguro aunque tenga pendientes: al volver se
+            # relee bajo el lock (persistido + pendiente)
+            self._totals.popitem(last=False)
+        if len(self._pending) >= self.threshold:
+            self._wake.set()
+        return self._totals[key]
+
+    def pending(self, guild_id, user_id) -> Number:
+        """Delta aún no confirmado en la base (incluye el lote en escritura)."""
+        key = (guild_id, user_id)
+        return self._pending.get(key, 0) + self._inflight.get(key, 0)
+
+    async def persisted(self, guild_id, user_id) -> Number:
+        """Lee el valor persistido sin cruzarse con un flush en curso."""
+        async with self._lock:
+            return await self._load(guild_id, user_id) or 0
+
+    def has_pending(self, guild_id, user_id) -> bool:
+        """Si hay un delta sin confirmar, incluido el del lote en escritura."""
+        key = (guild_id, user_id)
+        return key in self._pending or key in self._inflight
+
+    def forget(self, guild_id, user_id) -> None:
+        """Olvida el total en memoria (la clave se modificó por otra vía)."""
+        self._totals.pop((guild_id, user_id), None)
+
+    def forget_guild(self, guild_id) -> None:
+        """Olvida los totales de un servidor; lo pendiente se sigue escribiendo."""
+        for key in [k for k in self._totals if k[0] == guild_id]:
+            del self._totals[key]
+
+    async def assign(self, guild_id, user_id, value: Number,
+                     write: Callable[[], Awaitable[None]]) -> None:
+        """Fija un valor absoluto: descarta lo pendiente y escribe bajo el lock."""
+        key = (guild_id, user_id)
+        async with self._lock:
+            await self._idle.wait()
+            await write()
+            self._pending.pop(key, None)
+            self._totals[key] = value
+
+    @asynccontextmanager
+    async def direct(self, guild_id, *user_ids) -> AsyncIterator[None]:
+        """Escritura directa a la base de esas claves, fuera del buffer.
+
+        Lo pendiente de esas claves se escribe antes (la base lo tiene que ver
+        al validar saldo), y mientras dura no corre ningún flush: el valor que
+        devuelve la base no se cruza con un lote a medio escribir. Al salir se
+        olvidan sus totales.
+        """
+        keys = [(guild_id, uid) for uid in user_ids]
+        async with self._lock:
+            if any(key in self._pending for key in keys):
+                await self._flush_locked()
+            self._writers += 1
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            for key in keys:
+                self._totals.pop(key, None)
+            self._writers -= 1
+            if not self._writers:
+                self._idle.set()
+
+    async def exclusive(self, write: Callable[[], Awaitable[T]]) -> T:
+        """Corre `write()` con todo lo pendiente ya escrito y sin otras escrituras en curso."""
+        async with self._lock:
+            await self._idle.wait()
+            await self._flush_locked()
+            return await write()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            await self._idle.wait()
+            await self._flush_locked()
+
+    async def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self._inflight = batch
+        rows = [(g, u, d) for (g, u), d in batch.items()]
+        try:
+            await self._write(rows)
+        except Exception:
+            # Se reencolan para el próximo intento
+            for key, delta in batch.items():
+                self._pending[key] = self._pending.get(key, 0) + delta
+            raise
+        else:
+            if self._on_flushed:
+                self._on_flushed(rows)
+        finally:
+            self._inflight = {}
+
+    # ───────────── Ciclo de vida ─────────────
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error escribiendo el buffer {self.name}: {e}")
+
+
+class BatchWriter:
+    """Cola de filas que se insertan en lote, sin esperar a la base.
+
+    `add` sólo encola; un único task escribe cada `interval` segundos o en
+    cuanto hay `threshold` filas. Si la escritura falla las filas vuelven a
+    la cola, hasta `max_pending` (después se descartan las más viejas).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write: Callable[[list[tuple]], Awaitable[None]],
+        interval: float = 2.0,
+        threshold: int = 100,
+        max_pending: int = 10000,
+    ) -> None:
+        self.name = name
+        self._write = write
+        self.interval = interval
+        self.threshold = threshold
+        self.max_pending = max_pending
+        self.dropped = 0
+
+        self._pending: list[tuple] = []
+        self._inflight: list[tuple] = []  # lote que se está escribiendo
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, row: tuple) -> None:
+        self._pending.append(row)
+        if len(self._pending) > self.max_pending:
+            sobrante = len(self._pending) - self.max_pending
+            del self._pending[:sobrante]
+            self.dropped += sobrante
+            logger.error(f"Buffer {self.name} lleno: se descartaron {sobrante} filas")
+        if len(self._pending) >= self.threshold:
+            self._wake.set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def unwritten(self, match: Callable[[tuple], bool]) -> list[tuple]:
+        """Filas que cumplen `match` y todavía no están confirmadas en la base.
+
+        Incluye el lote en escritura: puede que la base ya lo tenga, así que
+        quien las mezcle con una consulta tiene que descartar repetidas.
+        """
+        return [row for row in self._inflight + self._pending if match(row)]
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            self._inflight = batch
+            try:
+                await self._write(batch)
+            except Exception:
+                # Se reencolan delante de las nuevas, respetando el límite
+                filas = batch + self._pending
+                self.dropped += max(0, len(filas) - self.max_pending)
+                self._pending = filas[-self.max_pending:]
+                raise
+            finally:
+                self._inflight = []
+
+    # ───────────── Ciclo de vida ─────────────
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error escribiendo el buffer {self.name}: {e}")
+
+
+def merge_rows(rows, unwritten: list[dict], key: tuple[str, ...], limit: int) -> list:
+    """Une filas de la base con las de `BatchWriter.unwritten`, sin repetidas, por `ts` descendente."""
+    seen = {tuple(row[k] for k in key) for row in rows}
+    extra = [row for row in unwritten if tuple(row[k] for k in key) not in seen]
+    return sorted([*rows, *extra], key=lambda row: row["ts"], reverse=True)[:limit]